@@ -1,199 +1,214 @@
 import os
-from openai import OpenAI
-import streamlit as st
-from typing import List, Dict, Any, Optional
+import time
+import asyncio
+from typing import List, Dict, Any, MutableMapping, Optional, Tuple
+from context_builder import build_api_messages
+from openai_client import get_openai_client, chat_completion, async_chat_completion
+from model_registry import get_registry
+from response_cache import ResponseCache, hash_text
+from data_manager import DataFrameManager
+from context_encoder import ensure_data_context
+from image_pipeline import ImageAttachment, image_parts
+from job_manager import get_job_manager
+from telemetry import Trace, current_trace, instrument_stream, record_completion, span
+
+IMAGES_KEY = "images"  # 메시지에 함께 보낸 이미지(ImageAttachment 목록)를 보관하는 키
+
+SYSTEM_PROMPT = "당신은 도움이 되는 AI 어시스턴트입니다. 사용자의 질문에 친절하고 정확하게 답변해주세요. 한국어로 답변해주세요."
 
 def get_model_templates() -> Dict[str, Dict[str, Any]]:
-    """OpenAI 모델 템플릿 정의 - 2025년 최신 모델 반영"""
-    return {
-        "🧠 Reasoning Models": {
-            "o3": {
-                "name": "o3",
-                "description": "가장 강력한 추론 모델 (복잡한 수학, 과학, 코딩 문제에 최적화)",
-                "max_tokens": 100000,
-                "supports_streaming": False,
-                "context_window": 200000
-            },
-            "o4-mini": {
-                "name": "o4-mini",
-                "description": "빠르고 효율적인 추론 모델 (멀티모달 지원, 도구 통합)",
-                "max_tokens": 100000,
-                "supports_streaming": False,
-                "context_window": 200000
-            },
-            "o3-mini": {
-                "name": "o3-mini",
-                "description": "o3의 소형 대안 모델 (추론 능력 유지, 비용 효율적)",
-                "max_tokens": 100000,
-                "supports_streaming": False,
-                "context_window": 200000
-            },
-            "o1": {
-                "name": "o1",
-                "description": "이전 o-시리즈 추론 모델 (안정적인 추론 성능)",
-                "max_tokens": 100000,
-                "supports_streaming": False,
-                "context_window": 200000
-            },
-            "o1-mini": {
-                "name": "o1-mini",
-                "description": "o1의 소형 대안 (코딩 및 수학 문제에 특화) - Deprecated",
-                "max_tokens": 65536,
-                "supports_streaming": False,
-                "context_window": 128000,
-                "deprecated": True
-            }
-        },
-        "🚀 Flagship Chat Models": {
-            "gpt-4.1": {
-                "name": "gpt-4.1",
-                "description": "복잡한 작업을 위한 플래그십 GPT 모델 (최고 성능)",
-                "max_tokens": 32768,
-                "supports_streaming": True,
-                "context_window": 1047576
-            },
-            "gpt-4o": {
-                "name": "gpt-4o",
-                "description": "빠르고 지능적이며 유연한 GPT 모델 (멀티모달 지원)",
-                "max_tokens": 16384,
-                "supports_streaming": True,
-                "context_window": 128000
-            },
-            "gpt-4o-audio": {
-                "name": "gpt-4o-audio",
-                "description": "GPT-4o 오디오 입출력 지원 모델",
-                "max_tokens": 4096,
-                "supports_streaming": True,
-                "context_window": 128000
-            },
-            "chatgpt-4o": {
-                "name": "chatgpt-4o",
-                "description": "ChatGPT에서 사용되는 GPT-4o 모델",
-                "max_tokens": 16384,
-                "supports_streaming": True,
-                "context_window": 128000
-            }
-        },
-        "💡 Cost-Optimized Models": {
-            "gpt-4.1-mini": {
-                "name": "gpt-4.1-mini",
-                "description": "지능성, 속도, 비용의 균형을 맞춘 모델",
-                "max_tokens": 32768,
-                "supports_streaming": True,
-                "context_window": 1047576,
-                "size": "Medium"
-            },
-            "gpt-4.1-nano": {
-                "name": "gpt-4.1-nano",
-                "description": "가장 빠르고 비용 효율적인 GPT-4.1 모델",
-                "max_tokens": 32768,
-                "supports_streaming": True,
-                "context_window": 1047576,
-                "size": "Small"
-            },
-            "gpt-4o-mini": {
-                "name": "gpt-4o-mini",
-                "description": "집중된 작업을 위한 빠르고 저렴한 소형 모델",
-                "max_tokens": 16384,
-                "supports_streaming": True,
-                "context_window": 128000,
-                "size": "Small"
-            },
-            "gpt-4o-mini-audio": {
-                "name": "gpt-4o-mini-audio",
-                "description": "오디오 입출력이 가능한 소형 모델",
-                "max_tokens": 4096,
-                "supports_streaming": True,
-                "context_window": 128000,
-                "size": "Small"
-            },
-            "gpt-3.5-turbo": {
-                "name": "gpt-3.5-turbo",
-                "description": "빠르고 효율적인 범용 모델 (일반적인 대화에 최적)",
-                "max_tokens": 4096,
-                "supports_streaming": True,
-                "context_window": 16385,
-                "size": "Small"
-            }
-        }
-    }
+    """OpenAI 모델 템플릿 반환 (카테고리별) - 모델 레지스트리에서 한 번만 로드됨"""
+    return get_registry().categories
 
 class AIHandler:
     """AI 응답 처리를 위한 클래스"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, response_cache: Optional[ResponseCache] = None):
         if api_key:
-            self.client = OpenAI(api_key=api_key)
+            self.client = get_openai_client(api_key)
+            self.api_key = api_key
         else:
             raise ValueError("OpenAI API 키가 설정되지 않았습니다.")
+        self.response_cache = response_cache
     
     def get_ai_response(self, messages: List[Dict], model_name: str = "gpt-3.5-turbo", 
-                       temperature: float = 0.7, uploaded_files: Optional[List] = None):
-        """OpenAI API를 사용하여 AI 응답 생성"""
+                       temperature: float = 0.7, uploaded_files: Optional[List] = None,
+                       use_cache: bool = False, df_manager: Optional[DataFrameManager] = None,
+                       images: Optional[List[ImageAttachment]] = None,
+                       context_state: Optional[MutableMapping[str, Any]] = None):
+        """OpenAI API를 사용하여 AI 응답 생성
+
+        df_manager: 현재 편집 중인 데이터 - 압축된 데이터 정보를 시스템 프롬프트 바로 뒤에 넣음
+            (데이터가 바뀌었을 때만 새로 만들고, 대화 기록 messages는 수정하지 않음)
+        context_state: 최신 데이터 컨텍스트를 보관할 곳 (세션 상태 등, 없으면 매번 캐시에서 가져옴)
+        images: 이번 턴에 보낼 이미지 - 비전 지원 모델이면 모델별 해상도로 축소·인코딩해 마지막 메시지에 첨부
+            (이전 턴의 이미지는 각 메시지의 IMAGES_KEY 항목으로 해당 메시지에만 첨부)
+        """
         try:
-            model_templates = get_model_templates()
+            api_params, cache_key = self._build_request(
+                messages, model_name, temperature, uploaded_files, use_cache, df_manager, images,
+                context_state
+            )
             
-            # 선택된 모델의 정보 찾기
-            selected_model_info = None
-            for category in model_templates.values():
-                if model_name in category:
-                    selected_model_info = category[model_name]
-                    break
+            # 응답 캐시 (opt-in): 동일한 요청이면 API 호출 없이 저장된 응답을 같은 형태로 재생
+            cache = self.response_cache if cache_key is not None else None
+            if cache is not None:
+                cached_content = cache.get(cache_key)
+                if cached_content is not None:
+                    replay = cache.replay(cached_content, stream=api_params.get("stream", False))
+                    if api_params.get("stream"):
+                        return instrument_stream(replay, current_trace(), model_name, span_name="cached_completion")
+                    return replay
             
-            if not selected_model_info:
-                selected_model_info = {"max_tokens": 1000, "supports_streaming": True}
+            start = time.perf_counter()
+            response = chat_completion(self.client, **api_params)
             
-            # 시스템 메시지 추가
-            system_message = {
-                "role": "system",
-                "content": "당신은 도움이 되는 AI 어시스턴트입니다. 사용자의 질문에 친절하고 정확하게 답변해주세요. 한국어로 답변해주세요."
-            }
+            if api_params.get("stream"):
+                if cache is not None:
+                    response = cache.record_stream(cache_key, model_name, response)
+                # 첫 토큰 시간, 초당 토큰 수, 토큰 사용량은 스트림을 끝까지 읽을 때 기록
+                return instrument_stream(response, current_trace(), model_name)
             
-            # 메시지 구성
-            api_messages = [system_message] + messages
+            trace = current_trace()
+            if trace is not None:
+                end = time.perf_counter()
+                record_completion(trace, "completion", model_name, start, end, None,
+                                  getattr(response, "usage", None), response.choices[0].message.content or "")
+            if cache is not None:
+                content = response.choices[0].message.content
+                if content:
+                    cache.put(cache_key, model_name, content)
             
+            return response
+        except Exception as e:
+            return f"AI 응답 생성 중 오류가 발생했습니다: {str(e)}"
+    
+    def submit_ai_response(self, messages: List[Dict], model_name: str = "gpt-3.5-turbo",
+                           temperature: float = 0.7, uploaded_files: Optional[List] = None,
+                           use_cache: bool = False, df_manager: Optional[DataFrameManager] = None,
+                           images: Optional[List[ImageAttachment]] = None,
+                           context_state: Optional[MutableMapping[str, Any]] = None) -> str:
+        """응답 생성을 백그라운드 작업으로 제출하고 작업 ID 반환 (응답을 기다리지 않음)
+
+        추론 모델처럼 비스트리밍 응답이 오래 걸리는 경우에 사용합니다. 결과(응답 텍스트)는
+        get_job_manager().get(job_id)로 조회하고, cancel(job_id)로 HTTP 요청까지 중단할 수 있습니다.
+        """
+        api_params, cache_key = self._build_request(
+            messages, model_name, temperature, uploaded_files, use_cache, df_manager, images,
+            context_state
+        )
+        api_params.pop("stream", None)
+        api_params.pop("stream_options", None)
+        cache = self.response_cache if cache_key is not None else None
+        manager = get_job_manager()
+        # 응답은 턴이 끝난 뒤에 오므로 같은 턴 ID의 별도 추적으로 기록
+        turn = current_trace()
+        trace = Trace("background_completion", turn_id=turn.turn_id if turn else None,
+                      **(turn.attributes if turn else {"model": model_name}))
+        
+        async def complete() -> str:
+            start = time.perf_counter()
+            try:
+                if cache is not None:
+                    cached_content = await asyncio.to_thread(cache.get, cache_key)
+                    if cached_content is not None:
+                        trace.set(cached=True)
+                        return cached_content
+                response = await async_chat_completion(manager.openai_client(self.api_key), **api_params)
+                content = response.choices[0].message.content or ""
+                record_completion(trace, "completion", model_name, start, time.perf_counter(), None,
+                                  getattr(response, "usage", None), content)
+                if cache is not None and content:
+                    await asyncio.to_thread(cache.put, cache_key, model_name, content)
+                return content
+            except asyncio.CancelledError:
+                trace.set(status="cancelled")
+                raise
+            except Exception as e:
+                trace.set(status="error", error=type(e).__name__)
+                raise
+            finally:
+                trace.finish()
+        
+        return manager.submit(complete, description=model_name)
+    
+    def _build_request(self, messages: List[Dict], model_name: str, temperature: float,
+                       uploaded_files: Optional[List], use_cache: bool,
+                       df_manager: Optional[DataFrameManager],
+                       images: Optional[List[ImageAttachment]],
+                       context_state: Optional[MutableMapping[str, Any]] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+        """API 호출 파라미터와 응답 캐시 키(캐시를 쓰지 않으면 None) 구성"""
+        # 선택된 모델의 정보 찾기
+        selected_model_info = get_registry().get_or_default(model_name)
+        
+        # 컨텍스트 구성 (파일 정보, 데이터 정보, 대화 기록 선택, 이미지 인코딩)
+        with span("context_assembly") as attrs:
             # 업로드된 파일이 있는 경우 컨텍스트에 추가
-            context_added = False
+            attachments = []
             if uploaded_files:
                 file_context = "\n\n업로드된 파일 정보:\n"
                 for file_info in uploaded_files:
                     file_context += f"- {file_info}\n"
-                
-                if api_messages:
-                    api_messages[-1]["content"] += file_context
-                    context_added = True
+                attachments.append(file_context)
             
-            # 현재 편집 중인 DataFrame이 있는 경우 컨텍스트에 추가
-            if st.session_state.current_df is not None:
-                df_context = "\n\n현재 편집 중인 데이터프레임 정보:\n"
-                df_context += f"- 행 수: {len(st.session_state.current_df)}\n"
-                df_context += f"- 열 수: {len(st.session_state.current_df.columns)}\n"
-                df_context += f"- 컬럼명: {', '.join(st.session_state.current_df.columns.tolist())}\n"
-                df_context += f"- 최근 편집된 데이터 (최대 10행):\n{st.session_state.current_df.head(10).to_string()}\n"
-                
-                if api_messages:
-                    if not context_added:
-                        api_messages[-1]["content"] += df_context
-                    else:
-                        api_messages[-1]["content"] += df_context
+            # 현재 편집 중인 데이터 정보 (버전이 바뀌었을 때만 새로 만들고, 대화 기록과 별도로 보관)
+            data_context = ensure_data_context(context_state if context_state is not None else {}, df_manager)
             
-            # API 호출 파라미터 설정
-            api_params = {
-                "model": model_name,
-                "messages": api_messages,
-                "max_tokens": selected_model_info["max_tokens"],
-            }
+            # 이미지는 비전 지원 모델에만, 보낸 턴의 메시지에만 첨부 (인코딩 결과는 이미지 내용 해시별로 캐시됨)
+            if selected_model_info["supports_vision"]:
+                messages = _attach_images(messages, images, selected_model_info)
             
-            # Reasoning 모델의 경우 temperature 지원하지 않음
-            if not model_name.startswith("o1"):
-                api_params["temperature"] = temperature
-            
-            # 스트리밍 지원 여부에 따라 설정
-            if selected_model_info["supports_streaming"]:
-                api_params["stream"] = True
-            
-            response = self.client.chat.completions.create(**api_params)
-            
-            return response
-        except Exception as e:
-            return f"AI 응답 생성 중 오류가 발생했습니다: {str(e)}" 
\ No newline at end of file
+            # 모델 컨텍스트 예산 안에서 메시지 구성 (세션의 메시지는 수정하지 않음, 이미지 토큰도 예산에 포함)
+            api_messages = build_api_messages(
+                messages,
+                system_prompt=SYSTEM_PROMPT,
+                model_name=model_name,
+                model_info=selected_model_info,
+                attachments=attachments,
+                pinned_message=data_context
+            )
+            attrs.update(messages=len(api_messages), attachment_chars=sum(map(len, attachments)),
+                         images=len(images or []))
+        
+        # API 호출 파라미터 설정
+        api_params = {
+            "model": model_name,
+            "messages": api_messages,
+            "max_tokens": selected_model_info["max_tokens"],
+        }
+        
+        # Reasoning 모델의 경우 temperature 지원하지 않음
+        if selected_model_info["supports_temperature"]:
+            api_params["temperature"] = temperature
+        
+        # 스트리밍 지원 여부에 따라 설정 (마지막 조각으로 토큰 사용량을 받음)
+        if selected_model_info["supports_streaming"]:
+            api_params["stream"] = True
+            api_params["stream_options"] = {"include_usage": True}
+        
+        cache_key = None
+        if use_cache and self.response_cache is not None:
+            cache_key = ResponseCache.make_key(
+                model_name, api_messages, api_params.get("temperature"),
+                context_hash=hash_text("".join(attachments))
+            )
+        return api_params, cache_key
+
+def _attach_images(messages: List[Dict], images: Optional[List[ImageAttachment]],
+                   model_info: Dict[str, Any]) -> List[Dict]:
+    """이미지가 있는 메시지만 image_url 조각을 붙인 복사본으로 바꾼 메시지 목록
+
+    images는 마지막 메시지(이번 턴)의 이미지이며, 이전 메시지는 IMAGES_KEY에 보관된 이미지만 사용합니다.
+    """
+    attached = []
+    for index, message in enumerate(messages):
+        message_images = message.get(IMAGES_KEY)
+        if index == len(messages) - 1 and images:
+            message_images = images
+        if not message_images or not isinstance(message.get("content"), str):
+            attached.append(message)
+            continue
+        attached.append({"role": message["role"],
+                         "content": ([{"type": "text", "text": message["content"]}]
+                                     + image_parts(message_images, model_info))})
+    return attached
\ No newline at end of file
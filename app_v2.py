@@ -1,110 +1,191 @@
-import os, re
+import os, re, time
 import pandas as pd
 import streamlit as st
-from io import BytesIO
-from openai import OpenAI
+from functools import partial
 from dotenv import load_dotenv
+from openai_client import get_openai_client, chat_completion
+from data_manager import DataFrameManager
+from paged_editor import paged_data_editor
+from export_manager import EXPORT_FORMATS
+from code_runner import CodeExecutionError, get_code_runner
+from code_cache import CodeCache
 
 load_dotenv()
 API_KEY = os.environ.get('OPENAI_APIKEY')
-client = OpenAI(api_key=API_KEY)
+client = get_openai_client(API_KEY)
+get_code_runner()  # 코드 실행 작업자를 미리 띄워 둠
+
+CODE_CACHE_DISPLAY = 20  # 사이드바에 표시할 최근 캐시 항목 수
+CODE_POLL_SECONDS = 0.5  # 코드 실행 완료 확인 간격
+
+@st.cache_resource
+def get_code_cache() -> CodeCache:
+    """프로세스 전체에서 공유하는 생성 코드 캐시"""
+    return CodeCache()
 
 # ---------- 세션 상태 초기화 ----------
 if "chat" not in st.session_state:      # 대화 내역
     st.session_state.chat = []
-if "df" not in st.session_state:        # 작업할 DataFrame
-    st.session_state.df = None
+if "df_manager" not in st.session_state:  # 작업할 데이터 (버전 관리)
+    st.session_state.df_manager = None
+if "upload_id" not in st.session_state:   # 마지막으로 읽은 업로드 파일
+    st.session_state.upload_id = None
 if "fname" not in st.session_state:     # 원본 파일명
     st.session_state.fname = None
+if "code_task" not in st.session_state:  # 실행 중인 코드 작업 (스크립트는 완료를 기다리지 않음)
+    st.session_state.code_task = None
 # -------------------------------------
 
+def cancel_code_task():
+    """실행 중인 코드 작업 취소 (작업자 프로세스 종료)"""
+    pending = st.session_state.code_task
+    if pending is not None and not pending["task"].done():
+        pending["task"].cancel()
+        st.session_state.chat.append({"role": "assistant", "content": "⏹️ 코드 실행이 중지되었습니다."})
+        st.session_state.code_task = None
+    # 이미 완료된 작업이면 그대로 두어 다음 확인 때 결과를 반영
+
+@st.fragment(run_every=CODE_POLL_SECONDS)
+def render_code_task():
+    """코드 실행 상태 표시 - 이 부분만 주기적으로 다시 실행하고, 완료되면 데이터에 반영"""
+    pending = st.session_state.code_task
+    if pending is None:
+        st.rerun()  # 중지 버튼 등으로 작업이 정리되었으면 전체 화면 갱신
+    task = pending["task"]
+    if task.done():
+        try:
+            pending["manager"].update_current_df(task.result())
+            # 실행에 성공한 코드만 캐시
+            if not pending["cached"]:
+                code_cache.put(pending["cache_key"], pending["prompt"], pending["code"])
+            content = "🔄 데이터 갱신 완료!"
+        except CodeExecutionError as e:
+            content = f"🚫 코드 실행 오류: {e}"
+            # 재사용한 코드가 실패하면 같은 명령에 다시 쓰이지 않도록 캐시에서 삭제
+            if pending["cached"] and code_cache.invalidate(pending["cache_key"]):
+                content += "\n\n🗑️ 실행에 실패한 캐시 코드를 삭제했습니다."
+        except Exception as e:
+            content = f"🚫 코드 실행 오류: {e}"
+        st.session_state.chat.append({"role": "assistant", "content": content})
+        st.session_state.code_task = None
+        st.rerun()
+
+    with st.chat_message("assistant"):
+        st.caption(f"⏳ 코드 실행 중... {time.monotonic() - pending['started']:.0f}초")
+        st.button("⏹️ 실행 중지", key="cancel_code", on_click=cancel_code_task)
+
 st.title("📊 File-Aware Chat CRUD Bot")
 
+# 생성 코드 캐시 관리 (잘못된 코드 삭제)
+code_cache = get_code_cache()
+with st.sidebar.expander(f"🧠 코드 캐시 ({len(code_cache)}개)"):
+    for key, entry in code_cache.entries()[:CODE_CACHE_DISPLAY]:
+        st.caption(entry["instruction"])
+        st.code(entry["code"], language="python")
+        st.button("🗑️ 삭제", key=f"cache_delete_{key}", on_click=code_cache.invalidate, args=(key,))
+    if len(code_cache):
+        st.button("전체 삭제", key="cache_clear", on_click=code_cache.clear)
+
 # 1) 파일 업로드 -----------------------------------------------------------
 uploaded = st.file_uploader(
     "CSV 또는 XLSX 파일을 올려주세요",
     type=["csv", "xlsx"],
     accept_multiple_files=False
 )
-if uploaded:
+if uploaded and st.session_state.upload_id != (uploaded.name, uploaded.size):
+    # 새 파일일 때만 읽음 (재실행마다 다시 파싱하면 편집 내용도 사라짐)
     ext = uploaded.name.rsplit(".", 1)[-1].lower()
     if ext == "csv":
-        st.session_state.df = pd.read_csv(uploaded)
+        df = pd.read_csv(uploaded)
     else:
-        st.session_state.df = pd.read_excel(uploaded)
+        df = pd.read_excel(uploaded)
+    st.session_state.df_manager = DataFrameManager(df, uploaded.name)
+    st.session_state.upload_id = (uploaded.name, uploaded.size)
     st.session_state.fname = uploaded.name
     st.success(f"✅ **{uploaded.name}** 업로드 완료!")
 
 # 2) 데이터 표시 & 직접 편집(옵션) -----------------------------------------
-if st.session_state.df is not None:
+manager = st.session_state.df_manager
+if manager is not None:
     st.subheader("🔍 현재 데이터")
-    # data_editor → 사용자가 셀, 행 추가/삭제 가능 :contentReference[oaicite:0]{index=0}
-    edited_df = st.data_editor(
-        st.session_state.df,
-        use_container_width=True,
-        num_rows="dynamic",
-        key="editor"
-    )
-    st.session_state.df = edited_df  # 실시간 반영
+    # 페이지 단위 편집기 → 현재 페이지만 전송, 셀 편집/행 추가·삭제는 매니저에 병합 :contentReference[oaicite:0]{index=0}
+    paged_data_editor(manager, key="editor")
 
     # 3) 채팅 인터페이스 ---------------------------------------------------
-    for msg in st.session_state.chat:
+    for i, msg in enumerate(st.session_state.chat):
         with st.chat_message(msg["role"]):
             st.markdown(msg["content"])
+            if msg.get("cached"):
+                st.caption("⚡ 이전에 생성된 코드를 재사용했습니다.")
+            # 생성 코드 응답은 캐시에 남아 있는 동안 삭제 버튼 표시
+            cache_key = msg.get("cache_key")
+            if cache_key is not None and cache_key in code_cache:
+                st.button("🗑️ 이 코드를 캐시에서 삭제", key=f"invalidate_{i}_{cache_key}",
+                          on_click=code_cache.invalidate, args=(cache_key,))
 
-    prompt = st.chat_input("데이터 조작 명령을 입력하세요")  # :contentReference[oaicite:1]{index=1}
+    # 코드 실행 중에는 중복 요청을 막기 위해 입력 비활성화
+    prompt = st.chat_input("데이터 조작 명령을 입력하세요", disabled=st.session_state.code_task is not None)  # :contentReference[oaicite:1]{index=1}
     if prompt:
         # (1) 화면에 사용자 메시지 표시
         st.session_state.chat.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        # (2) LLM에게 “pandas 코드만” 요청
+        # (2) 같은 명령 + 같은 스키마로 생성한 코드가 있으면 재사용, 없으면 LLM에게 “pandas 코드만” 요청
+        cache_key = code_cache.make_key(prompt, manager.current_df)
+        cached_code = code_cache.get(cache_key)
         system = (
             "You are a DataFrame assistant. "
             "There is a pandas DataFrame named df. "
             "Translate the user's Korean instruction into **valid, safe pandas code that modifies df in-place**. "
             "Respond ONLY with the code inside a ```python``` block."
         )
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": prompt}
-            ]
-        ).choices[0].message.content
-
-        # (3) 코드 표시
-        st.session_state.chat.append({"role": "assistant", "content": resp})
+        if cached_code is not None:
+            resp = f"```python\n{cached_code}```"
+        else:
+            resp = chat_completion(
+                client,
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": prompt}
+                ]
+            ).choices[0].message.content
+
+        # (3) 코드 표시 (캐시 키를 함께 보관해 대화 기록에서 재사용 표시와 삭제 버튼을 그림)
+        st.session_state.chat.append({"role": "assistant", "content": resp,
+                                      "cache_key": cache_key, "cached": cached_code is not None})
         with st.chat_message("assistant"):          # :contentReference[oaicite:2]{index=2}
             st.markdown(resp)
+            if cached_code is not None:
+                st.caption("⚡ 이전에 생성된 코드를 재사용했습니다.")
 
-        # (4) 코드 실행 (아주 제한된 exec)
+        # (4) 코드 실행 (격리된 작업자 프로세스, 시간/메모리 한도) - 완료 여부는 주기적으로 확인
         code = re.search(r"```python\n([\s\S]+?)```", resp)
         if code:
-            try:
-                local = {"df": st.session_state.df.copy()}
-                exec(code.group(1), {}, local)
-                st.session_state.df = local["df"]
-                st.success("🔄 데이터 갱신 완료!")
-            except Exception as e:
-                st.error(f"🚫 코드 실행 오류: {e}")
+            st.session_state.code_task = {
+                "task": get_code_runner().submit(code.group(1), manager.current_df),
+                "started": time.monotonic(),
+                "manager": manager,
+                "cache_key": cache_key,
+                "prompt": prompt,
+                "code": code.group(1),
+                "cached": cached_code is not None,
+            }
+            st.rerun()
         else:
             st.error("🚫 유효한 파이썬 코드가 감지되지 않았습니다.")
 
+    # 코드 실행 중이면 상태만 표시 (스크립트는 실행 완료를 기다리지 않음)
+    if st.session_state.code_task is not None:
+        render_code_task()
+
     # 4) 다운로드 버튼 ------------------------------------------------------
-    if st.session_state.df is not None:
-        buf = BytesIO()
-        if st.session_state.fname and st.session_state.fname.lower().endswith(".csv"):
-            st.session_state.df.to_csv(buf, index=False)
-            mime, label = "text/csv", "CSV 다운로드"
-            file_out = f"edited_{st.session_state.fname}"
+    if manager is not None:
+        # 파일은 버튼을 누를 때 생성 (데이터 버전/형식별 캐시, 묶음 단위 기록)
+        fname = st.session_state.fname or "file"
+        if fname.lower().endswith(".csv"):
+            fmt, label, file_out = "csv", "CSV 다운로드", f"edited_{fname}"
         else:
-            with pd.ExcelWriter(buf, engine="xlsxwriter") as writer:
-                st.session_state.df.to_excel(writer, index=False)
-            mime, label = (
-                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                "XLSX 다운로드"
-            )
-            file_out = f"edited_{(st.session_state.fname or 'file')}.xlsx"
-        st.download_button(label, buf.getvalue(), file_out, mime=mime)  # :contentReference[oaicite:3]{index=3}
+            fmt, label, file_out = "xlsx", "XLSX 다운로드", f"edited_{fname}.xlsx"
+        st.download_button(label, partial(manager.export_bytes, fmt), file_out, mime=EXPORT_FORMATS[fmt].mime)  # :contentReference[oaicite:3]{index=3}
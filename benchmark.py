@@ -0,0 +1,383 @@
+import os
+import io
+import sys
+import json
+import time
+import uuid
+import argparse
+import logging
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 벤치마크 데이터가 실제 데이터셋 저장소를 채우지 않도록 임시 디렉터리 사용 (모듈 import 전에 설정)
+os.environ.setdefault("DATASET_STORE_DIR", tempfile.mkdtemp(prefix="chatbot-bench-store-"))
+# 측정 중 추적 기록(turns.jsonl) 파일 쓰기 제외
+os.environ.setdefault("TELEMETRY_DIR", "")
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from ai_handler import AIHandler
+from column_index import get_index_store
+from data_manager import DataFrameManager, process_data_request
+from export_manager import get_export_manager, write_xlsx
+from file_processor import process_uploaded_file
+from intent_router import get_router
+from response_cache import make_completion, make_stream_chunk
+from summary_engine import SummaryEngine
+
+# streamlit run 없이 세션 상태를 사용할 때 나오는 경고 숨김 (Streamlit이 로그 레벨을 다시 설정하므로 필터 사용)
+for _logger in ("streamlit.runtime.scriptrunner_utils.script_run_context", "streamlit.runtime.state.session_state_proxy"):
+    logging.getLogger(_logger).addFilter(lambda record: record.levelno >= logging.ERROR)
+
+# 데이터셋 크기 (행 수, 컬럼 수)
+PRESETS: Dict[str, List[Tuple[int, int]]] = {
+    "quick": [(1_000, 5), (10_000, 20), (100_000, 50)],
+    "full": [(1_000, 5), (10_000, 20), (100_000, 50), (100_000, 500), (1_000_000, 20), (10_000_000, 5)],
+}
+DEFAULT_REPEATS = 3
+# 라우팅처럼 아주 빠른 작업은 여러 번 실행한 평균을 한 번의 측정값으로 사용
+ROUTE_ITERATIONS = 1_000
+# XLSX 작성/파싱은 셀 수에 비례해 느리므로 이 셀 수 이하의 데이터셋만 측정
+XLSX_MAX_CELLS = 2_000_000
+# 비교 시 이보다 짧은 측정값은 잡음으로 보고 회귀 판정에서 제외
+COMPARE_MIN_SECONDS = 0.005
+DEFAULT_THRESHOLD = 1.25
+DEFAULT_OUTPUT_DIR = os.path.join(".cache", "benchmarks")
+
+ROUTING_PROMPTS = [
+    "급여 기준 상위 10개",
+    "서울 지역 데이터만",
+    "급여 50000 이상",
+    "급여 내림차순으로 정렬해줘",
+    "job_title에서 AI 관련 데이터만",
+    "상위 10개 데이터 보여줘",
+]
+
+_REGIONS = np.array(["서울", "부산", "대구", "인천", "광주", "대전", "울산", "세종", "경기", "강원", "충북", "제주"],
+                    dtype=object)
+_JOB_TITLES = np.array([
+    "AI Engineer", "Data Scientist", "데이터 분석가", "Machine Learning Engineer", "백엔드 개발자",
+    "Product Manager", "마케팅 매니저", "Sales Representative", "인사 담당자", "Financial Analyst",
+    "AI 연구원", "Frontend Developer", "DevOps Engineer", "고객 상담원", "UX Designer",
+], dtype=object)
+_DEPARTMENTS = np.array(["Sales", "Engineering", "Marketing", "HR", "Finance", "Research", "Support", "Legal"],
+                        dtype=object)
+_SURNAMES = list("김이박최정강조윤장임한오서신권황안송류홍")
+_SYLLABLES = list("민서준지현우진영수아하은도윤예성호경태연")
+_ENGLISH_NAMES = ["James", "Mary", "John", "Linda", "David", "Susan", "Daniel", "Emily", "Kevin", "Grace"]
+
+# ---------- 합성 데이터 ----------
+def _name_pool(rng: np.random.Generator, size: int = 5_000) -> np.ndarray:
+    """한국어/영어 이름 후보 (행마다 문자열을 만들지 않고 후보에서 고름)"""
+    korean = [rng.choice(_SURNAMES) + "".join(rng.choice(_SYLLABLES, 2)) for _ in range(size // 2)]
+    english = [f"{rng.choice(_ENGLISH_NAMES)} {chr(65 + i % 26)}." for i in range(size - size // 2)]
+    return np.array(korean + english, dtype=object)
+
+def _with_nulls(values: pd.Series, rng: np.random.Generator, ratio: float = 0.01) -> pd.Series:
+    return values.mask(rng.random(len(values)) < ratio)
+
+def make_dataset(rows: int, columns: int, seed: int = 0) -> pd.DataFrame:
+    """한국어/영어가 섞인 합성 데이터셋 - 앞 5개 컬럼은 고정(id, 지역, job_title, 급여, 입사일),
+    나머지는 정수/실수/범주/이름/날짜/불리언 컬럼을 돌아가며 추가"""
+    rng = np.random.default_rng(seed)
+    names = _name_pool(rng)
+    base = pd.Timestamp("2015-01-01")
+    data: Dict[str, Any] = {
+        "id": np.arange(1, rows + 1),
+        "지역": _REGIONS[rng.integers(0, len(_REGIONS), rows)],
+        "job_title": _JOB_TITLES[rng.integers(0, len(_JOB_TITLES), rows)],
+        "급여": _with_nulls(pd.Series(rng.normal(60_000, 20_000, rows).round(0)), rng),
+        "입사일": base + pd.to_timedelta(rng.integers(0, 3_650, rows), unit="D"),
+    }
+    generators: List[Tuple[str, str, Callable[[], Any]]] = [
+        ("수량", "quantity", lambda: rng.integers(0, 1_000, rows)),
+        ("금액", "amount", lambda: _with_nulls(pd.Series(rng.exponential(50_000, rows).round(2)), rng)),
+        ("부서", "dept", lambda: _DEPARTMENTS[rng.integers(0, len(_DEPARTMENTS), rows)]),
+        ("이름", "name", lambda: names[rng.integers(0, len(names), rows)]),
+        ("일자", "date", lambda: base + pd.to_timedelta(rng.integers(0, 3_650, rows), unit="D")),
+        ("여부", "flag", lambda: rng.random(rows) < 0.5),
+    ]
+    for i in range(len(data), columns):
+        korean, english, generate = generators[i % len(generators)]
+        data[f"{korean if i % 2 else english}_{i}"] = generate()
+    return pd.DataFrame(dict(list(data.items())[:columns]))
+
+class _Upload(io.BytesIO):
+    """Streamlit UploadedFile과 같은 속성을 가진 업로드 파일 (file_processor에 그대로 전달)"""
+
+    def __init__(self, data: bytes, name: str, mime: str):
+        super().__init__(data)
+        self.name = name
+        self.type = mime
+        self.size = len(data)
+        self.file_id = uuid.uuid4().hex  # 매번 새 업로드로 취급 (내용 해시 메모 무효화)
+
+def _xlsx_bytes(df: pd.DataFrame) -> bytes:
+    with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as f:
+        path = f.name
+    try:
+        write_xlsx(df, path)
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+# ---------- 외부 호출 없는 OpenAI 클라이언트 ----------
+class _StubCompletions:
+    def create(self, **params):
+        content = "벤치마크 응답입니다."
+        if params.get("stream"):
+            return iter([make_stream_chunk(content)])
+        return make_completion(content)
+
+class StubOpenAI:
+    """chat.completions.create만 흉내 내는 클라이언트 (네트워크 없이 요청 구성 비용만 측정)"""
+
+    def __init__(self):
+        self.chat = type("Chat", (), {"completions": _StubCompletions()})()
+
+# ---------- 측정 ----------
+def rss_mb(field: str) -> Optional[float]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def reset_peak_rss() -> bool:
+    """최대 RSS(VmHWM) 초기화 (Linux 전용) - 단계별 메모리 최대치를 따로 잴 수 있게 함"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def measure(fn: Callable[[], Any], repeats: int, setup: Optional[Callable[[], Any]] = None,
+            iterations: int = 1) -> Dict[str, Any]:
+    """fn을 repeats번 실행해 첫 실행(캐시 없음)과 최소(캐시 적용) 시간, 최대 메모리 측정"""
+    timings = []
+    peak_delta = None
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        before = rss_mb("VmRSS")
+        tracked = reset_peak_rss()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        timings.append((time.perf_counter() - start) / iterations)
+        peak = rss_mb("VmHWM") if tracked else None
+        if peak is not None and before is not None:
+            peak_delta = max(peak_delta or 0.0, peak - before)
+    return {
+        "first_seconds": timings[0],
+        "best_seconds": min(timings),
+        "repeats": repeats,
+        "peak_rss_delta_mb": round(peak_delta, 1) if peak_delta is not None else None,
+    }
+
+def _fresh_session():
+    """업로드 관련 세션 캐시 초기화 (매 측정을 새 업로드로 처리)"""
+    for key in ("ingestion_cache", "file_hashes", "df_managers", "current_file"):
+        st.session_state.pop(key, None)
+
+def run_dataset(rows: int, columns: int, repeats: int, steps: Optional[set], seed: int) -> List[Dict[str, Any]]:
+    """데이터셋 하나에 대해 모든 단계 측정"""
+    label = f"{rows}x{columns}"
+    results: List[Dict[str, Any]] = []
+
+    def record(step: str, measurement: Dict[str, Any], **extra):
+        results.append({"dataset": label, "rows": rows, "columns": columns, "step": step, **measurement, **extra})
+        print(f"  {step:<22} first {measurement['first_seconds'] * 1000:10.2f}ms  "
+              f"best {measurement['best_seconds'] * 1000:10.2f}ms  "
+              f"peak +{measurement['peak_rss_delta_mb'] or 0:8.1f}MB", flush=True)
+
+    def enabled(step: str) -> bool:
+        return steps is None or step in steps or step.split("_")[0] in steps
+
+    print(f"[{label}] 데이터 생성 중...", flush=True)
+    df = make_dataset(rows, columns, seed)
+    csv_data = df.to_csv(index=False).encode("utf-8")
+    xlsx_allowed = rows * columns <= XLSX_MAX_CELLS
+
+    # 업로드 파싱 → 데이터셋 저장소 기록 → 요약 (세션 캐시 없이)
+    managers: List[DataFrameManager] = []
+
+    def ingest(data: bytes, name: str, mime: str):
+        info, manager = process_uploaded_file(_Upload(data, name, mime))
+        if manager is None:
+            raise RuntimeError(info)
+        managers.append(manager)
+
+    if enabled("ingest_csv"):
+        record("ingest_csv", measure(lambda: ingest(csv_data, "bench.csv", "text/csv"), repeats, _fresh_session),
+               input_mb=round(len(csv_data) / 1024 / 1024, 2))
+    if enabled("ingest_xlsx") and xlsx_allowed:
+        xlsx_data = _xlsx_bytes(df)
+        mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        record("ingest_xlsx", measure(lambda: ingest(xlsx_data, "bench.xlsx", mime), repeats, _fresh_session),
+               input_mb=round(len(xlsx_data) / 1024 / 1024, 2))
+
+    # 백그라운드 인덱스 생성이 이후 측정과 겹치지 않도록 완료까지 대기
+    start = time.perf_counter()
+    get_index_store().wait()
+    index_seconds = time.perf_counter() - start
+    print(f"  (인덱스 생성 대기 {index_seconds * 1000:.0f}ms)", flush=True)
+
+    if not managers:
+        _fresh_session()
+        ingest(csv_data, "bench.csv", "text/csv")
+        get_index_store().wait()
+    manager = managers[-1]
+
+    if enabled("summary"):
+        engine = SummaryEngine()
+        record("summary", measure(lambda: engine.summarize(manager, "벤치마크 요약"), repeats))
+
+    if enabled("route"):
+        router = get_router(manager.columns)
+        record("route", measure(lambda: [router.route(prompt) for prompt in ROUTING_PROMPTS], repeats,
+                                iterations=ROUTE_ITERATIONS))
+
+    # 데이터 조작 - 매 측정 전에 원본으로 복원
+    reset = manager.reset_to_original
+    operations = {
+        "op_top_k": lambda: manager.top_k_by_column("급여", 10),
+        "op_sort": lambda: (manager.sort_by_column("급여", ascending=False), manager.view_rows(np.arange(min(50, rows)))),
+        "op_filter_text": lambda: (manager.filter_by_column("지역", "서울"), manager.collect()),
+        "op_filter_numeric": lambda: manager.filter_by_mask(manager.compare_column("급여", "ge", 50_000), "급여 필터"),
+    }
+    for step, operation in operations.items():
+        if enabled(step):
+            record(step, measure(operation, repeats, reset))
+    for number, prompt in enumerate(ROUTING_PROMPTS, 1):
+        step = f"request_{number}"
+        if enabled(step):
+            record(step, measure(lambda: process_data_request(prompt, manager), repeats, reset), prompt=prompt)
+    reset()
+
+    # 내보내기 - 매번 캐시를 비워 파일 생성 비용 측정
+    export_formats = ["csv"] + (["xlsx"] if xlsx_allowed else [])
+    for fmt in export_formats:
+        step = f"export_{fmt}"
+        if enabled(step):
+            record(step, measure(lambda: manager.export_file(fmt).close(), repeats, get_export_manager().clear))
+    get_export_manager().clear()
+
+    # AI 요청 구성 (데이터 컨텍스트 인코딩 + 메시지 구성) - 스텁 클라이언트로 네트워크 없이
+    if enabled("ai_request"):
+        handler = AIHandler("benchmark")
+        handler.client = StubOpenAI()
+
+        def ai_request():
+            messages = [{"role": "user", "content": "급여 평균과 지역별 분포를 알려줘"}]
+            response = handler.get_ai_response(messages, model_name="gpt-4o", df_manager=manager)
+            if isinstance(response, str):
+                raise RuntimeError(response)
+            for _ in response:
+                pass
+
+        record("ai_request", measure(ai_request, repeats))
+
+    for item in managers:
+        item.release()
+    return results
+
+# ---------- 결과 저장/비교 ----------
+def _git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def collect_metadata() -> Dict[str, Any]:
+    return {
+        "commit": _git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """기준 결과와 비교해 best_seconds가 threshold배 이상 느려진 항목 목록 반환"""
+    previous = {(item["dataset"], item["step"]): item for item in baseline.get("results", [])}
+    regressions = []
+    print(f"\n기준 결과와 비교 (commit {baseline.get('meta', {}).get('commit')}, 기준 {threshold:g}배)")
+    for item in results:
+        old = previous.get((item["dataset"], item["step"]))
+        if old is None:
+            continue
+        ratio = item["best_seconds"] / old["best_seconds"] if old["best_seconds"] > 0 else float("inf")
+        slower = ratio >= threshold and item["best_seconds"] >= COMPARE_MIN_SECONDS
+        mark = "⚠️ 느려짐" if slower else ("빨라짐" if ratio <= 1 / threshold else "")
+        print(f"  {item['dataset']:<14} {item['step']:<22} {old['best_seconds'] * 1000:10.2f}ms → "
+              f"{item['best_seconds'] * 1000:10.2f}ms  ({ratio:5.2f}x) {mark}")
+        if slower:
+            regressions.append({**item, "baseline_seconds": old["best_seconds"], "ratio": ratio})
+    return regressions
+
+def parse_size(text: str) -> Tuple[int, int]:
+    """'100k x 20', '1M×5', '1000x5' 형식의 크기 파싱"""
+    def number(value: str) -> int:
+        value = value.strip().lower().replace("_", "").replace(",", "")
+        scale = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+        return int(float(value[:-1] if scale > 1 else value) * scale)
+    rows, columns = text.lower().replace("×", "x").split("x")
+    return number(rows), number(columns)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="업로드 파싱, 요약, 의도 라우팅, 필터/정렬/상위 k, 내보내기 성능 벤치마크 (네트워크 불필요)")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick", help="데이터셋 크기 묶음")
+    parser.add_argument("--sizes", help="직접 지정한 크기 목록 (예: 1k x5,1M x20)")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="단계별 반복 횟수")
+    parser.add_argument("--steps", help="측정할 단계 (쉼표 구분, 예: ingest,op,export_csv)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help=f"결과 JSON 경로 (기본: {DEFAULT_OUTPUT_DIR}/<커밋>.json)")
+    parser.add_argument("--compare", help="비교할 기준 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="회귀로 판단할 배율")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(size) for size in args.sizes.split(",")] if args.sizes else PRESETS[args.preset]
+    steps = {step.strip() for step in args.steps.split(",")} if args.steps else None
+    meta = collect_metadata()
+
+    results: List[Dict[str, Any]] = []
+    for rows, columns in sizes:
+        results += run_dataset(rows, columns, max(args.repeats, 1), steps, args.seed)
+
+    output = args.output or os.path.join(
+        DEFAULT_OUTPUT_DIR, f"{meta['commit'] or 'unknown'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n⚠️ 성능 회귀 {len(regressions)}건")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
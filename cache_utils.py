@@ -0,0 +1,64 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Iterator, Optional, Tuple
+
+
+def content_hash(data: bytes) -> str:
+    """바이트 데이터의 내용 해시 반환 (업로드 파일 식별용)"""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+class LRUCache:
+    """크기가 제한된 LRU(Least Recently Used) 캐시"""
+
+    def __init__(self, max_entries: int = 8):
+        if max_entries < 1:
+            raise ValueError("max_entries는 1 이상이어야 합니다.")
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """캐시 조회 - 조회된 항목은 가장 최근 사용으로 갱신"""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> Optional[Tuple[Hashable, Any]]:
+        """캐시 저장 - 용량 초과 시 가장 오래된 항목을 제거하여 반환"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                return self._entries.popitem(last=False)
+            return None
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """캐시 항목 제거"""
+        with self._lock:
+            return self._entries.pop(key, default)
+
+    def clear(self):
+        """캐시 전체 비우기"""
+        with self._lock:
+            self._entries.clear()
+
+    def keys(self) -> Iterator[Hashable]:
+        with self._lock:
+            return iter(list(self._entries.keys()))
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        """(키, 값) 목록 - 오래된 항목부터, 사용 순서는 갱신하지 않음"""
+        with self._lock:
+            return iter(list(self._entries.items()))
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
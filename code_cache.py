@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from cache_utils import LRUCache
+from response_cache import hash_text, normalize_content
+
+_DEFAULT_PATH = os.path.join(".cache", "code_cache.json")
+# 빈 문자열이면 파일에 저장하지 않음 (메모리 캐시만 사용)
+CODE_CACHE_PATH = os.environ.get("CODE_CACHE_PATH", _DEFAULT_PATH) or None
+CODE_CACHE_SIZE = 500
+_TRAILING_PUNCTUATION = " .!?~。"
+
+Schema = Tuple[Tuple[str, str], ...]
+
+def normalize_instruction(instruction: str) -> str:
+    """명령 정규화 (공백 통일, 소문자, 끝 문장부호 제거) - 표현만 다른 같은 명령을 같은 키로"""
+    return normalize_content(instruction).lower().rstrip(_TRAILING_PUNCTUATION)
+
+def schema_of(df: pd.DataFrame) -> Schema:
+    """DataFrame 스키마 (컬럼 이름, 타입) 목록"""
+    return tuple((str(column), str(dtype)) for column, dtype in df.dtypes.items())
+
+class CodeCache:
+    """(정규화된 명령, 스키마) → 생성된 코드 캐시 (LRU, 선택적으로 JSON 파일에 저장)
+
+    같은 명령을 같은 컬럼 구성의 데이터에 다시 내리면 LLM 호출 없이 저장된 코드를 재사용합니다.
+    잘못된 코드는 invalidate()로 지울 수 있습니다.
+    """
+
+    def __init__(self, path: Optional[str] = CODE_CACHE_PATH, max_entries: int = CODE_CACHE_SIZE):
+        self.path = path
+        self._entries = LRUCache(max_entries=max_entries)
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def make_key(instruction: str, df: pd.DataFrame) -> str:
+        return hash_text(json.dumps([normalize_instruction(instruction), schema_of(df)], ensure_ascii=False))
+
+    def get(self, key: str) -> Optional[str]:
+        """캐시된 코드 (없으면 None)"""
+        entry = self._entries.get(key)
+        return entry["code"] if entry is not None else None
+
+    def put(self, key: str, instruction: str, code: str):
+        """코드 저장 (실행에 성공한 코드만 저장하는 것을 권장)"""
+        self._entries.put(key, {"instruction": normalize_instruction(instruction), "code": code,
+                                "created_at": time.time()})
+        self._save()
+
+    def invalidate(self, key: str) -> bool:
+        """항목 삭제 - 삭제했으면 True"""
+        removed = self._entries.pop(key) is not None
+        if removed:
+            self._save()
+        return removed
+
+    def clear(self):
+        self._entries.clear()
+        self._save()
+
+    def entries(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """(키, 항목) 목록 - 최근 사용 순"""
+        return list(reversed(list(self._entries.items())))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        """항목 존재 여부 (사용 순서는 갱신하지 않음)"""
+        return key in self._entries
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            return  # 손상된 파일은 무시하고 새로 시작
+        for record in records:
+            self._entries.put(record.pop("key"), record)
+
+    def _save(self):
+        """오래된 항목부터 순서대로 기록 (다시 불러와도 LRU 순서 유지)"""
+        if not self.path:
+            return
+        with self._lock:
+            records = [{"key": key, **entry} for key, entry in self._entries.items()]
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(records, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
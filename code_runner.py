@@ -0,0 +1,258 @@
+import multiprocessing
+import os
+import pickle
+import queue
+import signal
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # pyarrow가 없으면 pickle 파일로 주고받음
+    pa = None
+
+try:
+    import resource
+except ImportError:  # Windows에는 resource 모듈이 없어 한도 없이 실행
+    resource = None
+
+CODE_RUNNER_WORKERS = int(os.environ.get("CODE_RUNNER_WORKERS", str(min(4, os.cpu_count() or 1))))
+CODE_CPU_SECONDS = int(os.environ.get("CODE_CPU_SECONDS", "30"))           # 작업당 CPU 시간 한도
+CODE_MEMORY_MB = int(os.environ.get("CODE_MEMORY_MB", "2048"))             # 작업자당 추가 메모리 한도
+CODE_TIMEOUT_SECONDS = float(os.environ.get("CODE_TIMEOUT_SECONDS", "60"))  # 작업당 실제 시간 한도
+# 데이터를 주고받을 디렉터리 (가능하면 메모리 기반 /dev/shm)
+SHARED_DIR = os.environ.get("CODE_RUNNER_SHARED_DIR",
+                            "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+POLL_INTERVAL_SECONDS = 0.05
+
+class CodeExecutionError(RuntimeError):
+    """생성된 코드 실행 실패 (코드 오류, 시간/메모리 한도 초과, 취소)"""
+
+# ---------- 데이터 전달 (Arrow IPC 파일, 변환할 수 없으면 pickle) ----------
+def _write_frame(df: pd.DataFrame, path: str) -> str:
+    """DataFrame을 파일로 기록하고 사용한 형식 반환"""
+    if pa is not None and all(isinstance(column, str) for column in df.columns):
+        try:
+            table = pa.Table.from_pandas(df)
+            with pa.OSFile(path, "wb") as sink, pa_ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            return "arrow"
+        except (pa.ArrowException, TypeError, ValueError):
+            pass  # 혼합 타입 컬럼 등은 pickle로 전달
+    df.to_pickle(path)
+    return "pickle"
+
+def _read_frame(path: str, fmt: str) -> pd.DataFrame:
+    if fmt == "arrow":
+        return pa_ipc.open_file(pa.memory_map(path, "r")).read_all().to_pandas()
+    return pd.read_pickle(path)
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+# ---------- 작업자 프로세스 ----------
+def _limit_memory(memory_mb: int):
+    """현재 가상 메모리 크기 + memory_mb로 주소 공간 제한 (라이브러리 로드분은 제외)"""
+    if resource is None or memory_mb <= 0:
+        return
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        limit = current + memory_mb * 1024 * 1024
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (OSError, ValueError):
+        pass
+
+def _limit_cpu(cpu_seconds: int):
+    """지금까지 사용한 CPU 시간 + cpu_seconds에서 SIGXCPU가 발생하도록 설정"""
+    if resource is None or cpu_seconds <= 0:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = int(usage.ru_utime + usage.ru_stime) + cpu_seconds + 1
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    except ValueError:
+        pass
+
+def _worker_main(conn, memory_mb: int):
+    """작업자 루프 - (코드, 입력 파일, 출력 파일)을 받아 실행하고 결과를 파일로 돌려줌"""
+    import numpy  # noqa: F401  첫 작업 전에 미리 로드 (pre-warm)
+
+    _limit_memory(memory_mb)
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        code, input_path, input_format, output_path, cpu_seconds = message
+        _limit_cpu(cpu_seconds)
+        try:
+            local = {"df": _read_frame(input_path, input_format)}
+            exec(code, {}, local)
+            result = local.get("df")
+            if not isinstance(result, pd.DataFrame):
+                conn.send(("error", "실행 후 df가 DataFrame이 아닙니다."))
+                continue
+            conn.send(("ok", _write_frame(result, output_path)))
+        except MemoryError:
+            # 메모리 부족 이후에는 상태를 믿을 수 없으므로 작업자를 교체
+            conn.send(("fatal", f"메모리 한도({memory_mb}MB)를 초과했습니다."))
+            return
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+class _Worker:
+    """미리 띄워 둔 작업자 프로세스"""
+
+    def __init__(self, context, memory_mb: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_mb),
+                                       daemon=True, name="code-runner")
+        self.process.start()
+        child_conn.close()
+
+    def exit_message(self, cpu_seconds: int) -> str:
+        """비정상 종료된 작업자의 종료 원인"""
+        self.process.join(timeout=1)
+        if self.process.exitcode == -getattr(signal, "SIGXCPU", -1):
+            return f"CPU 시간 한도({cpu_seconds}초)를 초과했습니다."
+        if self.process.exitcode == -signal.SIGKILL:
+            return "작업자 프로세스가 강제 종료되었습니다 (메모리 부족 가능성)."
+        return f"작업자 프로세스가 비정상 종료되었습니다 (종료 코드 {self.process.exitcode})."
+
+    def stop(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+class CodeTask:
+    """실행 중인 코드 작업 - 완료 확인, 결과 대기, 취소"""
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._future: Optional[Future] = None
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def result(self, timeout: Optional[float] = None) -> pd.DataFrame:
+        """실행 결과 DataFrame (실패 시 CodeExecutionError)"""
+        return self._future.result(timeout)
+
+    def cancel(self):
+        """작업 취소 - 실행 중이면 작업자 프로세스를 종료하고 새로 띄움 (완료된 작업에는 영향 없음)"""
+        self._cancelled.set()
+        self._future.cancel()
+
+class CodeRunnerPool:
+    """생성된 pandas 코드를 격리된 작업자 프로세스에서 실행하는 풀
+
+    - 작업자는 미리 띄워 두고 재사용 (pandas 로드 시간 없음)
+    - 작업마다 CPU 시간/실제 시간 한도, 작업자마다 메모리 한도 적용
+    - 한도 초과, 취소, 비정상 종료 시 해당 작업자만 교체
+    - DataFrame은 공유 메모리 디렉터리의 Arrow IPC 파일로 주고받음 (pickle 직렬화 없음)
+    """
+
+    def __init__(self, workers: int = CODE_RUNNER_WORKERS, cpu_seconds: int = CODE_CPU_SECONDS,
+                 memory_mb: int = CODE_MEMORY_MB, timeout: float = CODE_TIMEOUT_SECONDS):
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.timeout = timeout
+        # Streamlit 서버의 스레드 상태를 물려받지 않도록 spawn으로 시작
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        for _ in range(workers):
+            self._idle.put(self._spawn())
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="code-runner")
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._context, self.memory_mb)
+
+    def submit(self, code: str, df: pd.DataFrame) -> CodeTask:
+        """코드 실행 요청 - 코드는 df 변수를 수정하며, 실행 후 df를 결과로 반환"""
+        task = CodeTask()
+        task._future = self._executor.submit(self._run, code, df, task._cancelled)
+        return task
+
+    def run(self, code: str, df: pd.DataFrame) -> pd.DataFrame:
+        """코드를 실행하고 결과를 기다림"""
+        return self.submit(code, df).result()
+
+    def _run(self, code: str, df: pd.DataFrame, cancelled: threading.Event) -> pd.DataFrame:
+        prefix = os.path.join(SHARED_DIR, f"code-runner-{uuid.uuid4().hex}")
+        input_path, output_path = f"{prefix}-in", f"{prefix}-out"
+        worker = self._idle.get()
+        healthy = True
+        try:
+            input_format = _write_frame(df, input_path)
+            worker.conn.send((code, input_path, input_format, output_path, self.cpu_seconds))
+            status, payload = self._wait(worker, cancelled)
+            if status == "ok":
+                return _read_frame(output_path, payload)
+            healthy = status == "error"
+            raise CodeExecutionError(payload)
+        except CodeExecutionError:
+            raise
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            if not healthy:
+                worker.stop()
+                worker = self._spawn()
+            self._idle.put(worker)
+            _remove(input_path)
+            _remove(output_path)
+
+    def _wait(self, worker: _Worker, cancelled: threading.Event) -> Tuple[str, str]:
+        """작업자 응답 대기 - 취소/시간 초과/비정상 종료는 ("fatal", 사유)로 반환"""
+        deadline = time.monotonic() + self.timeout
+        while not worker.conn.poll(POLL_INTERVAL_SECONDS):
+            if cancelled.is_set():
+                return "fatal", "코드 실행이 취소되었습니다."
+            if time.monotonic() > deadline:
+                return "fatal", f"실행 시간 한도({self.timeout:g}초)를 초과했습니다."
+        try:
+            return worker.conn.recv()
+        except (EOFError, OSError):
+            return "fatal", worker.exit_message(self.cpu_seconds)
+
+    def shutdown(self):
+        """작업자 프로세스 모두 종료"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+_pool: Optional[CodeRunnerPool] = None
+_pool_lock = threading.Lock()
+
+def get_code_runner() -> CodeRunnerPool:
+    """프로세스 전체에서 공유하는 코드 실행 풀 (처음 사용할 때 작업자를 띄움)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = CodeRunnerPool()
+    return _pool
@@ -0,0 +1,340 @@
+import math
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Hashable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from cache_utils import LRUCache
+from dataset_store import IDLE_RELEASE_SECONDS, register_idle_resource
+
+# 이보다 작은 컬럼은 전체 스캔도 충분히 빠르므로 인덱스를 만들지 않음
+INDEX_MIN_ROWS = int(os.environ.get("COLUMN_INDEX_MIN_ROWS", "10000"))
+# 고유값이 이보다 많으면 n-gram 역색인 없이 고유값만 스캔
+NGRAM_MAX_UNIQUES = 200_000
+NGRAM_SIZE = 3
+INDEX_CACHE_SIZE = 64
+# 인덱스 전체가 차지할 수 있는 메모리 (추정치) - 넘으면 오래 사용하지 않은 인덱스부터 제거
+INDEX_CACHE_MAX_BYTES = int(float(os.environ.get("COLUMN_INDEX_MAX_MB", "256")) * 1024 * 1024)
+# 업로드 직후 미리 만드는 인덱스의 메모리 예산 (추정치) - 나머지 컬럼은 처음 조회할 때 생성
+INDEX_EAGER_MAX_BYTES = int(float(os.environ.get("COLUMN_INDEX_EAGER_MB", "64")) * 1024 * 1024)
+# 행당 인덱스 크기 추정치 (예산 계산용, 고유값이 많은 문자열 컬럼 기준)
+INDEX_BYTES_PER_ROW = {"numeric": 24, "text": 136}
+# 포스팅 목록 하나(딕셔너리 항목, 키 문자열, 배열 객체)의 고정 비용 추정치
+_POSTING_OVERHEAD_BYTES = 200
+# 컬럼 토큰별로 판정한 인덱스 종류 (인덱스가 필요 없는 컬럼도 기록해 다시 판정하지 않음)
+INDEX_KIND_CACHE_SIZE = 1024
+INDEX_WORKERS = 2
+
+_REGEX_META = re.compile(r"[.^$*+?{}\[\]\\|()]")
+_MAX_CHAR = "\U0010ffff"
+_UNRESOLVED = object()
+
+class TextIndex:
+    """문자열 컬럼 인덱스 - 고유값 단위로 조건을 평가하고 n-gram 역색인으로 후보를 좁힘
+
+    match_series()와 같은 결과(contains는 대소문자 무시, startswith/endswith는 구분)를 반환합니다.
+    """
+
+    def __init__(self, series: pd.Series):
+        codes, uniques = pd.factorize(series.astype(str), use_na_sentinel=False)
+        self._codes = codes
+        uniques = pd.Series(np.asarray(uniques, dtype=object))
+        # 문자열 변환 후에도 결측값으로 남는 값은 어떤 조건에도 일치하지 않음 (na=False)
+        self._missing = uniques.isna().to_numpy()
+        self._uniques = uniques.fillna("")
+        self._lowered = self._uniques.str.lower()
+        self._sorted = self._sorted_order(self._uniques)
+        self._sorted_reversed = self._sorted_order(self._uniques.str[::-1])
+        self._postings: Optional[Dict[str, np.ndarray]] = None
+        if len(self._uniques) <= NGRAM_MAX_UNIQUES:
+            self._postings = self._build_postings(self._lowered)
+        self.nbytes = self._estimate_nbytes()
+
+    def _estimate_nbytes(self) -> int:
+        """인덱스가 차지하는 메모리 추정치 (행 코드, 고유값 문자열, 정렬 배열, 역색인)"""
+        nbytes = (self._codes.nbytes + self._missing.nbytes
+                  + int(self._uniques.memory_usage(deep=True)) + int(self._lowered.memory_usage(deep=True)))
+        for values, order in (self._sorted, self._sorted_reversed):
+            nbytes += values.nbytes + order.nbytes
+        if self._postings is not None:
+            nbytes += sum(ids.nbytes + _POSTING_OVERHEAD_BYTES for ids in self._postings.values())
+        return nbytes
+
+    @staticmethod
+    def _sorted_order(values: pd.Series):
+        array = values.to_numpy(dtype=object)
+        order = np.argsort(array, kind="stable")
+        return array[order], order
+
+    @staticmethod
+    def _build_postings(lowered: pd.Series) -> Dict[str, np.ndarray]:
+        postings: Dict[str, list] = {}
+        for unique_id, text in enumerate(lowered):
+            for gram in {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}:
+                postings.setdefault(gram, []).append(unique_id)
+        return {gram: np.asarray(ids, dtype=np.int64) for gram, ids in postings.items()}
+
+    def _contains(self, condition: str) -> np.ndarray:
+        if _REGEX_META.search(condition):
+            # 정규식 조건은 고유값에만 원래 방식대로 평가
+            return self._uniques.str.contains(condition, case=False, na=False).to_numpy()
+        needle = condition.lower()
+        matched = np.zeros(len(self._uniques), dtype=bool)
+        if self._postings is not None and len(needle) >= NGRAM_SIZE:
+            candidates = None
+            for gram in {needle[i:i + NGRAM_SIZE] for i in range(len(needle) - NGRAM_SIZE + 1)}:
+                ids = self._postings.get(gram)
+                if ids is None:
+                    return matched
+                candidates = ids if candidates is None else np.intersect1d(candidates, ids, assume_unique=True)
+            matched[candidates[self._lowered.iloc[candidates].str.contains(needle, regex=False).to_numpy()]] = True
+            return matched
+        return self._lowered.str.contains(needle, regex=False).to_numpy()
+
+    @staticmethod
+    def _prefix_range(sorted_index, prefix: str) -> np.ndarray:
+        """정렬된 고유값에서 prefix로 시작하는 값의 고유값 번호"""
+        values, order = sorted_index
+        start = np.searchsorted(values, prefix, side="left")
+        end = np.searchsorted(values, prefix + _MAX_CHAR, side="left")
+        return order[start:end]
+
+    def match(self, condition: str, method: str = "contains") -> Optional[np.ndarray]:
+        """조건을 만족하는 행의 불리언 배열 (지원하지 않는 방식이면 None)"""
+        if method == "contains":
+            matched = self._contains(condition)
+        elif method in ("startswith", "endswith"):
+            matched = np.zeros(len(self._uniques), dtype=bool)
+            if method == "startswith":
+                matched[self._prefix_range(self._sorted, condition)] = True
+            else:
+                matched[self._prefix_range(self._sorted_reversed, condition[::-1])] = True
+        else:
+            return None
+        return (matched & ~self._missing)[self._codes]
+
+class NumericIndex:
+    """숫자 범위 조회용 인덱스 - 숫자로 변환한 값을 정렬해 두고 이진 탐색 (이상/이하/초과/미만)
+
+    정수 컬럼은 float64로 바꾸지 않고 정수 그대로 정렬하므로 2**53보다 큰 값도 정확히 비교합니다.
+    """
+
+    def __init__(self, series: pd.Series):
+        numeric = pd.to_numeric(series, errors="coerce")
+        if pd.api.types.is_integer_dtype(numeric.dtype):
+            # 결측값이 있는 정수 컬럼(Int64 등)은 결측 자리를 0으로 채우고 정렬 대상에서 제외
+            values = numeric.to_numpy(dtype=np.dtype(getattr(numeric.dtype, "numpy_dtype", numeric.dtype)),
+                                      na_value=0)
+            valid_mask = numeric.notna().to_numpy()
+        else:
+            values = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+            valid_mask = ~np.isnan(values)
+        valid = np.flatnonzero(valid_mask)
+        order = valid[np.argsort(values[valid], kind="stable")]
+        self._length = len(values)
+        self._order = order
+        self._sorted = values[order]
+        self.nbytes = self._order.nbytes + self._sorted.nbytes
+
+    def _integer_condition(self, operator: str, value: float):
+        """정수 컬럼 비교를 같은 결과의 정수 경계 이상/이하 조건으로 변환 (만족하는 값이 없으면 None)"""
+        limits = np.iinfo(self._sorted.dtype)
+        lower = operator in ("ge", "gt")
+        if math.isnan(value):
+            return None
+        if math.isinf(value):
+            if (value > 0) == lower:
+                return None
+            return "ge" if lower else "le", self._sorted.dtype.type(limits.min if lower else limits.max)
+        if operator == "ge":
+            bound = math.ceil(value)
+        elif operator == "gt":
+            bound = math.floor(value) + 1
+        elif operator == "le":
+            bound = math.floor(value)
+        else:
+            bound = math.ceil(value) - 1
+        if lower:
+            if bound > limits.max:
+                return None
+            return "ge", self._sorted.dtype.type(max(bound, limits.min))
+        if bound < limits.min:
+            return None
+        return "le", self._sorted.dtype.type(min(bound, limits.max))
+
+    def compare(self, operator: str, value: float) -> np.ndarray:
+        """비교 조건(ge/le/gt/lt)을 만족하는 행의 불리언 배열"""
+        if operator not in ("ge", "le", "gt", "lt"):
+            raise ValueError(f"지원하지 않는 비교 연산자입니다: {operator}")
+        if self._sorted.dtype.kind in "iu":
+            condition = self._integer_condition(operator, value)
+            if condition is None:
+                return np.zeros(self._length, dtype=bool)
+            operator, value = condition
+        if operator in ("ge", "gt"):
+            start = np.searchsorted(self._sorted, value, side="left" if operator == "ge" else "right")
+            positions = self._order[start:]
+        else:
+            end = np.searchsorted(self._sorted, value, side="right" if operator == "le" else "left")
+            positions = self._order[:end]
+        mask = np.zeros(self._length, dtype=bool)
+        mask[positions] = True
+        return mask
+
+ColumnIndex = Union[TextIndex, NumericIndex]
+
+def dtype_index_kind(dtype) -> Optional[str]:
+    """컬럼 dtype에 맞는 기본 인덱스 종류 ("numeric" / "text"), 인덱스를 만들지 않는 타입이면 None"""
+    if pd.api.types.is_bool_dtype(dtype):
+        return None
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "numeric"
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        return "text"
+    return None
+
+def index_kind(series: pd.Series) -> Optional[str]:
+    """컬럼 타입에 맞는 기본 인덱스 종류 ("numeric" / "text"), 인덱스가 필요 없으면 None"""
+    if len(series) < INDEX_MIN_ROWS:
+        return None
+    return dtype_index_kind(series.dtype)
+
+def estimated_index_bytes(kind: str, rows: int) -> int:
+    """인덱스를 만들기 전에 쓰는 메모리 추정치 (미리 만들 컬럼을 고를 때 사용)"""
+    return INDEX_BYTES_PER_ROW[kind] * rows
+
+_INDEX_TYPES = {"text": TextIndex, "numeric": NumericIndex}
+
+class ColumnIndexStore:
+    """컬럼 내용 토큰별 인덱스 저장소 - 백그라운드에서 만들고, 준비된 인덱스만 조회에 사용
+
+    키에 컬럼 내용 토큰(DataFrameManager.column_token)을 쓰므로 편집된 컬럼의 인덱스는
+    자동으로 사용되지 않고, 새 내용에 대한 인덱스가 다시 만들어집니다.
+
+    메모리는 개수와 추정 크기(max_bytes)로 제한하고, 일정 시간 조회되지 않은 인덱스는
+    유휴 리소스 해제 때 함께 제거됩니다 (필요하면 다음 조회 때 다시 생성).
+    """
+
+    def __init__(self, max_entries: int = INDEX_CACHE_SIZE, max_workers: int = INDEX_WORKERS,
+                 max_bytes: int = INDEX_CACHE_MAX_BYTES, max_idle_seconds: float = IDLE_RELEASE_SECONDS):
+        self.max_bytes = max_bytes
+        self.max_idle_seconds = max_idle_seconds
+        self._indexes = LRUCache(max_entries=max_entries)
+        self._kinds = LRUCache(max_entries=INDEX_KIND_CACHE_SIZE)
+        self._accessed: Dict[Hashable, float] = {}   # 인덱스별 마지막 조회 시각
+        self._bytes = 0
+        self._pending: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="column-index")
+        register_idle_resource(self)
+
+    @property
+    def nbytes(self) -> int:
+        """보관 중인 인덱스의 메모리 추정치 합계"""
+        return self._bytes
+
+    @property
+    def last_access(self) -> float:
+        """가장 오래 조회되지 않은 인덱스의 마지막 조회 시각 (유휴 해제 판단용)"""
+        with self._lock:
+            return min(self._accessed.values(), default=time.monotonic())
+
+    def get(self, token: Hashable, kind: str) -> Optional[ColumnIndex]:
+        """준비된 인덱스 반환 (없으면 None)"""
+        index = self._indexes.get((token, kind))
+        if index is not None:
+            with self._lock:
+                self._accessed[(token, kind)] = time.monotonic()
+        return index
+
+    def _put(self, key: Hashable, index: ColumnIndex):
+        """인덱스 저장 - 개수/크기 한도를 넘으면 오래 사용하지 않은 인덱스부터 제거"""
+        if index.nbytes > self.max_bytes:
+            return  # 한도보다 큰 인덱스는 보관하지 않음 (전체 스캔 사용)
+        with self._lock:
+            evicted = self._indexes.put(key, index)
+            self._accessed[key] = time.monotonic()
+            self._bytes += index.nbytes
+            if evicted is not None:
+                self._forget(evicted[0], evicted[1])
+            for old_key, old_index in self._indexes.items():
+                if self._bytes <= self.max_bytes:
+                    break
+                if old_key != key:
+                    self._indexes.pop(old_key)
+                    self._forget(old_key, old_index)
+
+    def _forget(self, key: Hashable, index: ColumnIndex):
+        self._accessed.pop(key, None)
+        self._bytes -= index.nbytes
+
+    def release(self):
+        """max_idle_seconds 동안 조회되지 않은 인덱스 제거"""
+        threshold = time.monotonic() - self.max_idle_seconds
+        with self._lock:
+            for key, accessed in list(self._accessed.items()):
+                if accessed <= threshold:
+                    index = self._indexes.pop(key)
+                    if index is not None:
+                        self._forget(key, index)
+                    else:
+                        self._accessed.pop(key, None)
+
+    def schedule(self, token: Hashable, loader: Callable[[], pd.Series], kind: Optional[str] = None):
+        """인덱스를 백그라운드에서 생성 (kind가 없으면 컬럼 타입에 맞게, 이미 있거나 생성 중이면 무시)
+
+        kind 없이 요청한 컬럼은 판정한 종류를 토큰별로 기억하므로, 인덱스가 필요 없는 컬럼
+        (불리언/날짜 등)은 다음 요청부터 컬럼을 다시 읽지 않습니다.
+        """
+        key = (token, kind)
+        with self._lock:
+            if kind is None:
+                resolved = self._kinds.get(token, _UNRESOLVED)
+                if resolved is None or (resolved is not _UNRESOLVED and (token, resolved) in self._indexes):
+                    return
+            if key in self._pending or (kind is not None and key in self._indexes):
+                return
+            self._pending[key] = self._executor.submit(self._build, key, loader)
+
+    def _build(self, key, loader: Callable[[], pd.Series]):
+        token, kind = key
+        try:
+            series = loader()
+            if kind is None:
+                kind = index_kind(series)
+                self._kinds.put(token, kind)
+            if kind is not None and (token, kind) not in self._indexes:
+                self._put((token, kind), _INDEX_TYPES[kind](series))
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """생성 중인 인덱스가 모두 준비될 때까지 대기 (벤치마크 등) - 시간 안에 끝났으면 True"""
+        with self._lock:
+            pending = list(self._pending.values())
+        return not wait(pending, timeout).not_done
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+            self._accessed.clear()
+            self._bytes = 0
+        self._kinds.clear()
+
+_store: Optional[ColumnIndexStore] = None
+_store_lock = threading.Lock()
+
+def get_index_store() -> ColumnIndexStore:
+    """프로세스 전체에서 공유하는 컬럼 인덱스 저장소"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ColumnIndexStore()
+    return _store
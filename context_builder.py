@@ -0,0 +1,154 @@
+from typing import List, Dict, Any, Optional
+from image_pipeline import image_part_tokens
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken이 없으면 근사치로 토큰 수 계산
+    tiktoken = None
+
+# 메시지 하나당 역할/구분자에 쓰이는 토큰 수 (근사치)
+MESSAGE_OVERHEAD_TOKENS = 4
+# 모델 정보에 컨텍스트 윈도우가 없을 때 사용할 기본값
+DEFAULT_CONTEXT_WINDOW = 16385
+# 응답 외에 추가로 남겨두는 안전 여유분
+SAFETY_MARGIN_TOKENS = 512
+# 오래된 대화를 압축할 때 남기는 최대 토큰 수
+COMPACTED_TURN_TOKENS = 256
+COMPACTED_SUFFIX = "\n…(이전 대화 일부 생략)"
+# 첨부 컨텍스트가 사용할 수 있는 최대 예산 비율 (나머지는 대화 기록용)
+ATTACHMENT_BUDGET_RATIO = 0.5
+
+_encodings: Dict[str, Any] = {}
+
+def _get_encoding(model_name: str):
+    """모델에 맞는 tiktoken 인코딩 반환 (없으면 None)"""
+    if tiktoken is None:
+        return None
+    if model_name not in _encodings:
+        try:
+            _encodings[model_name] = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            _encodings[model_name] = tiktoken.get_encoding("o200k_base")
+    return _encodings[model_name]
+
+def count_tokens(text: str, model_name: str = "gpt-4o") -> int:
+    """텍스트의 토큰 수 계산 (tiktoken이 없으면 ASCII 4자당 1토큰, 그 외 문자당 1토큰으로 근사)"""
+    if not text:
+        return 0
+    encoding = _get_encoding(model_name)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    ascii_chars = sum(1 for char in text if ord(char) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+def truncate_to_tokens(text: str, max_tokens: int, model_name: str = "gpt-4o", suffix: str = "") -> str:
+    """텍스트를 max_tokens 이하로 앞부분만 남기고 자름"""
+    if count_tokens(text, model_name) <= max_tokens:
+        return text
+    budget = max_tokens - count_tokens(suffix, model_name)
+    if budget <= 0:
+        return ""
+    encoding = _get_encoding(model_name)
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text, disallowed_special=())[:budget]) + suffix
+    # 근사 계산: 토큰 비율만큼 글자를 잘라가며 맞춤
+    end = len(text)
+    while end > 0 and count_tokens(text[:end], model_name) > budget:
+        end = int(end * budget / count_tokens(text[:end], model_name)) if end > 1 else 0
+    return text[:end] + suffix
+
+def message_tokens(message: Dict[str, Any], model_name: str = "gpt-4o") -> int:
+    """메시지 하나의 토큰 수 (역할 오버헤드, 이미지 조각 추정치 포함)"""
+    content = message.get("content")
+    if isinstance(content, str):
+        return MESSAGE_OVERHEAD_TOKENS + count_tokens(content, model_name)
+    tokens = MESSAGE_OVERHEAD_TOKENS
+    for part in content or []:
+        if part.get("type") == "text":
+            tokens += count_tokens(part.get("text", ""), model_name)
+        elif part.get("type") == "image_url":
+            tokens += image_part_tokens(part)
+    return tokens
+
+def get_context_budget(model_info: Dict[str, Any]) -> int:
+    """모델의 컨텍스트 윈도우에서 응답용 토큰과 여유분을 뺀 입력 토큰 예산"""
+    context_window = model_info.get("context_window", DEFAULT_CONTEXT_WINDOW)
+    max_tokens = model_info.get("max_tokens", 0)
+    # 응답 토큰이 컨텍스트의 절반을 넘는 모델(추론 모델 등)은 입력에 최소 절반을 보장
+    reserved = min(max_tokens, context_window // 2)
+    return max(context_window - reserved - SAFETY_MARGIN_TOKENS, 0)
+
+def _api_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    """API로 보낼 필드(역할, 내용)만 남긴 복사본"""
+    return {"role": message["role"], "content": message.get("content")}
+
+def _append_text(message: Dict[str, Any], text: str):
+    """메시지 복사본의 텍스트 끝에 덧붙임 (이미지가 있는 메시지는 첫 텍스트 조각에)"""
+    content = message.get("content")
+    if isinstance(content, str):
+        message["content"] = content + text
+        return
+    parts = list(content or [])
+    for index, part in enumerate(parts):
+        if part.get("type") == "text":
+            parts[index] = {**part, "text": part.get("text", "") + text}
+            break
+    else:
+        parts.insert(0, {"type": "text", "text": text})
+    message["content"] = parts
+
+def build_api_messages(messages: List[Dict[str, Any]], system_prompt: str,
+                       model_name: str, model_info: Dict[str, Any],
+                       attachments: Optional[List[str]] = None,
+                       pinned_message: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """토큰 예산 안에서 API로 보낼 메시지 목록 구성
+
+    - 세션에 저장된 메시지는 수정하지 않고 복사본만 사용
+    - 첨부 컨텍스트(파일 정보)는 마지막 메시지 복사본에만 덧붙임
+    - pinned_message(데이터 컨텍스트 등)는 항상 시스템 프롬프트 바로 뒤에 넣어 앞부분이 턴마다 바뀌지 않게 함
+    - 예산을 넘으면 가장 오래된 대화부터 압축하거나 제외
+    """
+    budget = get_context_budget(model_info)
+    system_message = {"role": "system", "content": system_prompt}
+    used = message_tokens(system_message, model_name)
+    prefix = [system_message]
+    if pinned_message is not None:
+        pinned_message = _api_message(pinned_message)
+        used += message_tokens(pinned_message, model_name)
+        prefix.append(pinned_message)
+    if not messages:
+        return prefix
+
+    # 마지막 메시지 + 첨부 컨텍스트는 항상 포함 (첨부 컨텍스트는 예산의 일정 비율까지만)
+    last_message = _api_message(messages[-1])
+    attachment_text = "".join(attachments or [])
+    if attachment_text:
+        remaining = min(int(budget * ATTACHMENT_BUDGET_RATIO),
+                        budget - used - message_tokens(last_message, model_name))
+        attachment_text = truncate_to_tokens(attachment_text, max(remaining, 0), model_name, COMPACTED_SUFFIX)
+        _append_text(last_message, attachment_text)
+    used += message_tokens(last_message, model_name)
+
+    # 최근 대화부터 역순으로 예산이 허락하는 만큼 포함
+    history: List[Dict[str, Any]] = []
+    for index in range(len(messages) - 2, -1, -1):
+        message = messages[index]
+        tokens = message_tokens(message, model_name)
+        if used + tokens <= budget:
+            history.append(_api_message(message))
+            used += tokens
+            continue
+
+        # 예산을 넘는 긴 메시지는 앞부분만 남겨 압축 시도
+        content = message.get("content")
+        if isinstance(content, str):
+            compacted = _api_message(message)
+            compacted["content"] = truncate_to_tokens(content, COMPACTED_TURN_TOKENS, model_name, COMPACTED_SUFFIX)
+            tokens = message_tokens(compacted, model_name)
+            if used + tokens <= budget:
+                history.append(compacted)
+                used += tokens
+                continue
+        break  # 이보다 오래된 대화는 제외
+
+    return prefix + list(reversed(history)) + [last_message]
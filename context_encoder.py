@@ -0,0 +1,123 @@
+from typing import Any, Dict, List, MutableMapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from cache_utils import LRUCache
+from context_builder import count_tokens, truncate_to_tokens
+from data_manager import DataFrameManager
+from summary_engine import get_summary_engine
+
+# 데이터 컨텍스트 최대 토큰 수
+DATA_CONTEXT_TOKENS = 800
+# 통계를 계산해 보여줄 최대 컬럼 수 (나머지는 이름만)
+CONTEXT_MAX_COLUMNS = 40
+# 대표 행 수 (앞/중간/끝에서 고르게 선택)
+CONTEXT_SAMPLE_ROWS = 5
+CONTEXT_MAX_CELL_CHARS = 40
+CONTEXT_CACHE_SIZE = 64
+CONTEXT_TRUNCATED_SUFFIX = "\n…(데이터 정보 일부 생략)"
+
+# 세션 상태에서 최신 데이터 컨텍스트를 보관하는 키 (대화 기록과 별도)
+DATA_CONTEXT_KEY = "data_context"
+
+_contexts = LRUCache(max_entries=CONTEXT_CACHE_SIZE)
+
+def _format_number(value: Any) -> str:
+    if isinstance(value, (int, np.integer)):
+        return f"{value:,}"
+    if isinstance(value, (float, np.floating)):
+        return f"{value:.4g}"
+    return str(value)
+
+def _shorten(value: Any) -> str:
+    text = f"{value:.6g}" if isinstance(value, (float, np.floating)) else str(value)
+    return text if len(text) <= CONTEXT_MAX_CELL_CHARS else text[:CONTEXT_MAX_CELL_CHARS - 1] + "…"
+
+def _column_line(manager: DataFrameManager, column: str, stats: Dict[str, Any]) -> str:
+    """컬럼 한 줄 요약 - 타입, 범위/평균(숫자), 범위(날짜) 또는 고유값 수/최빈값(그 외), 결측 수"""
+    parts = [f"- {_shorten(column)} ({stats['dtype']})"]
+    if pd.api.types.is_datetime64_any_dtype(stats["dtype"]):
+        if stats["count"]:
+            values = manager.get_column(column)
+            parts.append(f"{values.min()} ~ {values.max()}")
+    elif "mean" in stats:
+        if stats["count"]:
+            parts.append(f"{_format_number(stats['min'])} ~ {_format_number(stats['max'])}, "
+                         f"평균 {_format_number(stats['mean'])}")
+    else:
+        parts.append(f"고유 {stats['unique']:,}")
+        if stats["count"]:
+            parts.append(f"최빈 '{_shorten(stats['top'])}'({stats['freq']:,})")
+    if stats["nulls"]:
+        parts.append(f"결측 {stats['nulls']:,}")
+    return ": ".join([parts[0], ", ".join(parts[1:])]) if len(parts) > 1 else parts[0]
+
+def _sample_positions(n_rows: int, k: int) -> np.ndarray:
+    """앞/중간/끝에서 고르게 고른 행 위치"""
+    if n_rows <= k:
+        return np.arange(n_rows)
+    return np.unique(np.linspace(0, n_rows - 1, k).astype(np.int64))
+
+def _sample_text(manager: DataFrameManager, columns: List[str], k: int) -> str:
+    if k <= 0 or manager.row_count == 0:
+        return ""
+    sample = manager.view_rows(_sample_positions(manager.row_count, k))[columns]
+    sample = sample.astype(object).where(sample.notna(), "").map(_shorten)
+    return sample.to_csv(index=False).strip()
+
+def data_context_key(manager: DataFrameManager) -> str:
+    """데이터 컨텍스트 식별 키 (데이터가 바뀌면 함께 바뀜)"""
+    return f"{manager.name}@{manager.version}"
+
+def encode_data_context(manager: DataFrameManager, max_tokens: int = DATA_CONTEXT_TOKENS,
+                        model_name: str = "gpt-4o") -> str:
+    """LLM에 보낼 압축된 데이터 설명 (스키마, 컬럼 통계, 대표 행) - 토큰 상한 적용, 버전별 캐시"""
+    key = (data_context_key(manager), max_tokens, model_name)
+    text = _contexts.get(key)
+    if text is not None:
+        return text
+
+    all_columns = manager.columns
+    columns = all_columns[:CONTEXT_MAX_COLUMNS]
+    stats = get_summary_engine().column_stats(manager, columns)
+
+    header = f"데이터 '{manager.name}': {manager.row_count:,}행 × {len(all_columns)}열"
+    if manager.sampled:
+        header += f" (원본 {manager.total_rows:,}행 중 표본)"
+    lines = [header, "컬럼:"]
+    lines += [_column_line(manager, column, stats[column]) for column in columns]
+    if len(columns) < len(all_columns):
+        lines.append(f"- 그 외 컬럼: {', '.join(map(str, all_columns[len(columns):]))}")
+    schema = "\n".join(lines)
+
+    # 상한을 넘으면 대표 행 수를 줄이고, 그래도 넘으면 뒷부분을 자름
+    for k in range(CONTEXT_SAMPLE_ROWS, -1, -1):
+        sample = _sample_text(manager, columns, k)
+        text = schema + (f"\n대표 행 (CSV):\n{sample}" if sample else "")
+        if count_tokens(text, model_name) <= max_tokens:
+            break
+    text = truncate_to_tokens(text, max_tokens, model_name, CONTEXT_TRUNCATED_SUFFIX)
+    _contexts.put(key, text)
+    return text
+
+def ensure_data_context(state: MutableMapping[str, Any], manager: Optional[DataFrameManager]) -> Optional[Dict[str, Any]]:
+    """최신 데이터 컨텍스트 메시지 반환 - 대화 기록이 아닌 state(세션 상태 등)에 버전 키와 함께 보관
+
+    데이터 버전이 바뀌었을 때만 새로 만들고, 그 전까지는 같은 메시지를 재사용하므로
+    build_api_messages()가 시스템 프롬프트 바로 뒤에 넣는 프롬프트 앞부분(prefix)이 턴마다 바뀌지 않습니다.
+    데이터가 없으면 보관한 컨텍스트를 지우고 None을 반환합니다.
+    """
+    if manager is None:
+        state.pop(DATA_CONTEXT_KEY, None)
+        return None
+    key = data_context_key(manager)
+    current = state.get(DATA_CONTEXT_KEY)
+    if current is None or current[0] != key:
+        message = {
+            "role": "system",
+            "content": f"현재 편집 중인 데이터 정보 (데이터가 바뀌면 새 정보가 전달됩니다):\n{encode_data_context(manager)}",
+        }
+        current = (key, message)
+        state[DATA_CONTEXT_KEY] = current
+    return current[1]
@@ -1,138 +1,655 @@
 import pandas as pd
-import io
-import re
-from typing import Union, List, Tuple, Optional
+import numpy as np
+import itertools
+import time
+from functools import partial
+from typing import BinaryIO, Dict, Hashable, Iterable, Union, List, Tuple, Optional, NamedTuple
 from datetime import datetime
+from intent_router import get_router
+from dataset_store import DataSource, StoredFrame, column_dtype, load_column, load_frame, register_idle_resource
+from query_plan import QueryPlan, Filter, Sort, Head, Tail, TopK, sort_positions, top_k_positions
+from column_index import INDEX_EAGER_MAX_BYTES, INDEX_MIN_ROWS, dtype_index_kind, estimated_index_bytes, get_index_store
+from export_manager import get_export_manager
+from cache_utils import LRUCache
+from telemetry import span
+
+class _Delta(NamedTuple):
+    """기준 프레임에 대한 편집 내역 - 기준 프레임은 그대로 두고 바뀐 값만 기록"""
+    cells: Dict[str, pd.Series]         # 컬럼 -> 새 값 (인덱스는 기준 행 위치)
+    added: Optional[pd.DataFrame]       # 추가된 행 (기준 행 위치 len(base)부터 이어짐)
+
+class _Version(NamedTuple):
+    """데이터 버전 - 기준 프레임에 대한 행/열 선택으로 표현 (전체 복사 없음)"""
+    version_id: int
+    description: str
+    base: DataSource                  # 행/열 선택의 기준이 되는 프레임 (메모리 또는 Arrow 파일)
+    rows: Optional[np.ndarray]        # base 기준 행 위치 (None이면 전체 행)
+    columns: Optional[List[str]]      # 선택된 컬럼 (None이면 전체 컬럼)
+    source_id: int                    # 컬럼 내용을 결정하는 (base, rows) 조합 식별자
+    column_sources: Optional[Dict[str, int]] = None  # 편집 시 바뀌지 않은 컬럼의 이전 식별자
+    plan: Optional[QueryPlan] = None  # 아직 실행하지 않은 작업 (rows에 적용할 지연 계획)
+    delta: Optional[_Delta] = None    # 편집기에서 병합된 셀/행 변경 (base에 덧씌움)
+
+_version_ids = itertools.count(1)
+
+# 컬럼 정렬 순서(행 위치 순열) 캐시 - (컬럼 내용 토큰, 오름차순 여부) 기준
+SORT_CACHE_SIZE = 16
+_sort_cache = LRUCache(max_entries=SORT_CACHE_SIZE)
+
+def _base_length(version: _Version) -> int:
+    """버전의 기준 행 수 (추가된 행 포함)"""
+    if version.delta is None or version.delta.added is None:
+        return len(version.base)
+    return len(version.base) + len(version.delta.added)
+
+def _assign_values(series: pd.Series, mask: np.ndarray, values: np.ndarray) -> pd.Series:
+    """mask 위치에 새 값을 넣은 Series (타입이 맞지 않으면 값에 맞는 타입으로 변환)"""
+    values = pd.Series(values, dtype=object).infer_objects().to_numpy()
+    try:
+        series.iloc[mask] = values
+        return series
+    except (TypeError, ValueError):
+        series = series.astype(object)
+        series.iloc[mask] = values
+        return series.infer_objects()
+
+def match_series(series: pd.Series, condition: str, method: str = "contains") -> pd.Series:
+    """컬럼 값이 조건을 만족하는지 나타내는 불리언 마스크"""
+    try:
+        if method == "contains":
+            # 대소문자 구분 없이 포함 여부 확인
+            return series.astype(str).str.contains(condition, case=False, na=False)
+        elif method == "equals":
+            return series == condition
+        elif method == "startswith":
+            return series.astype(str).str.startswith(condition, na=False)
+        elif method == "endswith":
+            return series.astype(str).str.endswith(condition, na=False)
+        else:
+            return series.astype(str).str.contains(condition, case=False, na=False)
+    except Exception as e:
+        raise ValueError(f"필터링 중 오류 발생: {str(e)}")
 
 class DataFrameManager:
-    """데이터프레임 조작 및 관리를 위한 클래스"""
+    """데이터프레임 조작 및 관리를 위한 클래스
+
+    원본은 한 번만 보관하고, 각 작업은 원본에 대한 행 위치/컬럼 선택(버전)으로 기록합니다.
+    되돌리기(undo)/다시 실행(redo)과 특정 시점 버전 조회를 전체 복사 없이 지원합니다.
+    원본이 데이터셋 저장소(StoredFrame)에 있으면 필요한 컬럼만 지연 로드하고, 유휴 시 메모리를 해제합니다.
+
+    lazy=True이면 필터/정렬은 실행하지 않고 계획(QueryPlan)으로 쌓아 두었다가, 결과가 필요할 때
+    (current_df, collect(), 조회, 내보내기) 최적화하여 한 번에 실행합니다. 이 모드에서 작업 메서드는
+    결과 DataFrame 대신 자기 자신을 반환하므로 연결해서 호출할 수 있습니다.
+    """
     
-    def __init__(self, df: pd.DataFrame, name: str = "data"):
-        self.original_df = df.copy()  # 원본 데이터 보존
-        self.current_df = df.copy()   # 현재 작업 중인 데이터
+    def __init__(self, df: DataSource, name: str = "data", total_rows: Optional[int] = None,
+                 lazy: bool = False):
         self.name = name
+        self.lazy = lazy
+        # 원본 파일의 전체 행 수 (표본만 로드한 경우 로드된 행 수보다 큼)
+        self.total_rows = total_rows if total_rows is not None else len(df)
+        self.sampled = self.total_rows > len(df)
         self.operation_history = []   # 작업 히스토리
+        version_id = next(_version_ids)
+        self._versions = [_Version(version_id, "원본 데이터", df, None, None, version_id)]
+        self._cursor = 0
+        self._materialized = None     # (version_id, DataFrame) - 현재 버전 결과 캐시
+        self.last_access = time.monotonic()
+        register_idle_resource(self)
+    
+    @property
+    def original_df(self) -> pd.DataFrame:
+        """원본 데이터"""
+        return load_frame(self._versions[0].base)
+    
+    @property
+    def current_df(self) -> pd.DataFrame:
+        """현재 작업 중인 데이터 (현재 버전을 필요할 때만 생성)"""
+        self.last_access = time.monotonic()
+        version = self._current_version()
+        materialized = self._materialized
+        if materialized is None or materialized[0] != version.version_id:
+            materialized = (version.version_id, self._materialize(version))
+            self._materialized = materialized
+        return materialized[1]
+    
+    def release(self):
+        """메모리에 올라온 데이터 해제 (저장소에 있는 원본은 필요할 때 다시 로드)"""
+        self._materialized = None
+        for version in self._versions:
+            if isinstance(version.base, StoredFrame):
+                version.base.release()
+    
+    @property
+    def columns(self) -> List[str]:
+        """현재 버전의 컬럼 목록"""
+        return self._current_columns()
+    
+    @property
+    def row_count(self) -> int:
+        """현재 버전의 행 수"""
+        version = self._current_version()
+        return _base_length(version) if version.rows is None else len(version.rows)
+    
+    @property
+    def version(self) -> int:
+        """현재 버전 식별자 (작업마다 새로 발급되어 캐시 키로 사용 가능)"""
+        return self._versions[self._cursor].version_id
+    
+    @property
+    def can_undo(self) -> bool:
+        return self._cursor > 0
+    
+    @property
+    def can_redo(self) -> bool:
+        return self._cursor < len(self._versions) - 1
+    
+    def _materialize(self, version: _Version, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """버전(또는 그 일부 행)을 실제 DataFrame으로 생성 - 선택된 컬럼만 로드"""
+        if rows is None:
+            rows = version.rows
+        elif version.rows is not None:
+            rows = version.rows[rows]
+        if version.delta is None:
+            return load_frame(version.base, version.columns, rows)
+        # 편집 내역이 있으면 컬럼별로 요청한 행만 꺼내 변경을 반영
+        columns = version.base.columns.tolist() if version.columns is None else version.columns
+        return pd.DataFrame({column: self._take_column(version, column, rows).array for column in columns},
+                            index=self._take_index(version, rows), columns=columns)
+    
+    def _current_version(self) -> _Version:
+        """현재 버전 (지연 계획이 있으면 실행하여 행 위치를 확정)"""
+        return self._resolve(self._cursor)
+    
+    def _resolve(self, index: int) -> _Version:
+        version = self._versions[index]
+        if version.plan is not None:
+            version = version._replace(rows=self._execute_plan(version, version.plan), plan=None)
+            self._versions[index] = version
+        return version
+    
+    def _execute_plan(self, version: _Version, plan: QueryPlan) -> np.ndarray:
+        """버전의 기준 행 위치에 계획을 적용 - 조건/정렬에 필요한 컬럼만 로드"""
+        rows = version.rows if version.rows is not None else np.arange(_base_length(version))
+        return plan.execute(rows, partial(self._take_column, version))
+    
+    def _result(self) -> Union[pd.DataFrame, "DataFrameManager"]:
+        """작업 결과 - 지연 모드에서는 실행하지 않고 자기 자신 반환"""
+        return self if self.lazy else self.current_df
+    
+    def collect(self) -> pd.DataFrame:
+        """쌓인 계획을 실행하여 현재 데이터 반환"""
+        return self.current_df
+    
+    def _current_rows(self) -> np.ndarray:
+        """현재 버전의 행 위치 (base 기준)"""
+        version = self._current_version()
+        if version.rows is None:
+            return np.arange(_base_length(version))
+        return version.rows
+    
+    def _current_columns(self) -> List[str]:
+        version = self._versions[self._cursor]
+        if version.columns is None:
+            return version.base.columns.tolist()
+        return version.columns
+    
+    def column_token(self, column: str) -> Hashable:
+        """현재 버전에서 컬럼 내용을 식별하는 토큰 - 내용이 같으면 버전이 달라도 같은 토큰 (캐시 키용)"""
+        version = self._current_version()
+        source_id = version.source_id
+        if version.column_sources is not None:
+            source_id = version.column_sources.get(column, source_id)
+        return (source_id, column)
+    
+    def get_column(self, column: str) -> pd.Series:
+        """현재 버전의 단일 컬럼만 추출 (전체 프레임을 만들지 않음)"""
+        self.last_access = time.monotonic()
+        return self._version_column(self._current_version(), column)
+    
+    @staticmethod
+    def _version_column(version: _Version, column: str) -> pd.Series:
+        return DataFrameManager._take_column(version, column, version.rows)
+    
+    @staticmethod
+    def _take_column(version: _Version, column: str, positions: Optional[np.ndarray] = None) -> pd.Series:
+        """기준 행 위치(None이면 전체)의 컬럼 값 - 편집 내역(추가된 행, 셀 변경)을 요청한 행에만 반영"""
+        series = load_column(version.base, column)
+        delta = version.delta
+        if delta is None:
+            return series if positions is None else series.take(positions)
+        if positions is None:
+            positions = np.arange(_base_length(version))
+        n_base = len(series)
+        in_base = positions < n_base
+        if delta.added is None or in_base.all():
+            result = series.take(positions)
+        else:
+            # 기준 프레임의 행과 추가된 행을 나눠 꺼낸 뒤 요청 순서로 복원
+            parts = pd.concat([series.take(positions[in_base]),
+                               delta.added[column].take(positions[~in_base] - n_base)])
+            order = np.concatenate([np.flatnonzero(in_base), np.flatnonzero(~in_base)])
+            result = parts.take(np.argsort(order, kind="stable"))
+        patch = delta.cells.get(column)
+        if patch is not None:
+            hit = np.isin(positions, patch.index.to_numpy())
+            if hit.any():
+                result = _assign_values(result, hit, patch.reindex(positions[hit]).to_numpy())
+        return result
+    
+    @staticmethod
+    def _take_index(version: _Version, positions: Optional[np.ndarray] = None) -> pd.Index:
+        """기준 행 위치(None이면 전체)의 행 인덱스 (추가된 행 포함)"""
+        index = version.base.index
+        if version.delta is not None and version.delta.added is not None:
+            index = index.append(version.delta.added.index)
+        return index if positions is None else index.take(positions)
+    
+    def _current_index(self) -> pd.Index:
+        """현재 버전의 행 인덱스"""
+        version = self._current_version()
+        return self._take_index(version, version.rows)
+    
+    def build_indexes(self, columns: Optional[List[str]] = None, max_bytes: int = INDEX_EAGER_MAX_BYTES):
+        """현재 버전 컬럼들의 검색 인덱스를 백그라운드에서 미리 생성 (문자열: n-gram, 숫자: 정렬 배열)
+
+        컬럼 타입은 데이터를 읽지 않고 판정하며, 문자열/숫자 컬럼만 추정 크기 합계가 max_bytes 이내인
+        만큼 만듭니다. 나머지 컬럼은 처음 조회할 때(match_column/compare_column) 생성됩니다.
+        """
+        n_rows = self.row_count
+        if n_rows < INDEX_MIN_ROWS:
+            return
+        version = self._current_version()
+        remaining = max_bytes
+        for column in (self._current_columns() if columns is None else columns):
+            if column not in version.base.columns:
+                continue  # 편집으로 추가된 컬럼은 조회할 때 생성
+            kind = dtype_index_kind(column_dtype(version.base, column))
+            if kind is None:
+                continue
+            size = estimated_index_bytes(kind, n_rows)
+            if size > remaining:
+                continue
+            remaining -= size
+            self._schedule_index(version, column, kind)
+    
+    def _schedule_index(self, version: _Version, column: str, kind: Optional[str] = None):
+        get_index_store().schedule(self.column_token(column), partial(self._version_column, version, column), kind)
+    
+    def _push_version(self, description: str, base: Optional[DataSource] = None,
+                      rows: Optional[np.ndarray] = None, columns: Optional[List[str]] = None,
+                      keep_rows: bool = False, keep_columns: bool = False,
+                      source_id: Optional[int] = None, column_sources: Optional[Dict[str, int]] = None,
+                      delta: Optional[_Delta] = None):
+        """새 버전 기록 - 되돌리기 이후의 버전(redo 대상)은 폐기"""
+        current = self._versions[self._cursor]
+        version_id = next(_version_ids)
+        plan = None
+        if base is None:
+            base = current.base
+            # 같은 기준 프레임이면 편집 내역도 이어받음 (행 위치가 추가된 행을 가리킬 수 있음)
+            if delta is None:
+                delta = current.delta
+            if keep_rows:
+                rows, plan = current.rows, current.plan
+                # 행이 그대로면 컬럼 내용도 그대로
+                source_id, column_sources = current.source_id, current.column_sources
+            if keep_columns:
+                columns = current.columns
+        if source_id is None:
+            source_id = version_id
+        del self._versions[self._cursor + 1:]
+        self._versions.append(_Version(version_id, description, base, rows, columns, source_id, column_sources,
+                                       plan, delta))
+        self._cursor += 1
+    
+    def _push_operation(self, description: str, operation):
+        """지연 모드 - 행을 계산하지 않고 현재 계획에 작업을 추가한 버전 기록"""
+        current = self._versions[self._cursor]
+        plan = (current.plan or QueryPlan()).then(operation)
+        del self._versions[self._cursor + 1:]
+        version_id = next(_version_ids)
+        self._versions.append(_Version(version_id, description, current.base, current.rows, current.columns,
+                                       version_id, None, plan, current.delta))
+        self._cursor += 1
+    
+    def view_rows(self, positions: np.ndarray) -> pd.DataFrame:
+        """현재 버전에서 일부 행만 생성 (조회용, 버전 기록 없음)"""
+        return self._materialize(self._current_version(), rows=positions)
+    
+    def _view_plan(self, operation) -> Optional[pd.DataFrame]:
+        """지연 계획이 남아 있으면 조회 작업까지 합쳐 실행 (정렬 + 앞부분 k개 → 부분 정렬)"""
+        version = self._versions[self._cursor]
+        if version.plan is None:
+            return None
+        rows = self._execute_plan(version, version.plan.then(operation))
+        return self._materialize(version._replace(rows=rows, plan=None))
+    
+    def preview(self, k: int = 5) -> pd.DataFrame:
+        """현재 데이터의 앞부분 k개 행 (히스토리 기록 없음)"""
+        result_df = self._view_plan(Head(k))
+        if result_df is not None:
+            return result_df
+        return self.view_rows(np.arange(min(k, self.row_count)))
+    
+    def preview_tail(self, k: int = 5) -> pd.DataFrame:
+        """현재 데이터의 마지막 k개 행 (히스토리 기록 없음)"""
+        result_df = self._view_plan(Tail(k))
+        if result_df is not None:
+            return result_df
+        n_rows = self.row_count
+        return self.view_rows(np.arange(max(n_rows - k, 0), n_rows))
     
     def get_top_k(self, k: int = 10) -> pd.DataFrame:
         """상위 k개 데이터 반환"""
-        result_df = self.current_df.head(k)
+        result_df = self.preview(k)
         self.operation_history.append(f"상위 {k}개 데이터 조회")
         return result_df
     
     def get_bottom_k(self, k: int = 10) -> pd.DataFrame:
         """하위 k개 데이터 반환"""
-        result_df = self.current_df.tail(k)
+        result_df = self.preview_tail(k)
         self.operation_history.append(f"하위 {k}개 데이터 조회")
         return result_df
     
-    def filter_by_column(self, column: str, condition: str, method: str = "contains") -> pd.DataFrame:
-        """특정 컬럼의 조건에 따라 데이터 필터링"""
-        if column not in self.current_df.columns:
+    def match_column(self, column: str, condition: str, method: str = "contains") -> pd.Series:
+        """현재 데이터에서 컬럼 조건을 만족하는 행의 불리언 마스크 반환 (버전 기록 없음)"""
+        if column not in self._current_columns():
             raise ValueError(f"컬럼 '{column}'이 존재하지 않습니다.")
         
-        try:
-            if method == "contains":
-                # 대소문자 구분 없이 포함 여부 확인
-                result_df = self.current_df[self.current_df[column].astype(str).str.contains(condition, case=False, na=False)]
-            elif method == "equals":
-                result_df = self.current_df[self.current_df[column] == condition]
-            elif method == "startswith":
-                result_df = self.current_df[self.current_df[column].astype(str).str.startswith(condition, na=False)]
-            elif method == "endswith":
-                result_df = self.current_df[self.current_df[column].astype(str).str.endswith(condition, na=False)]
-            else:
-                result_df = self.current_df[self.current_df[column].astype(str).str.contains(condition, case=False, na=False)]
-            
-            self.operation_history.append(f"'{column}' 컬럼에서 '{condition}' 조건으로 필터링 ({method})")
-            return result_df
-        except Exception as e:
-            raise ValueError(f"필터링 중 오류 발생: {str(e)}")
+        index = get_index_store().get(self.column_token(column), "text")
+        if index is not None:
+            mask = index.match(condition, method)
+            if mask is not None:
+                return pd.Series(mask, index=self._current_index())
+        elif self.row_count >= INDEX_MIN_ROWS:
+            # 같은 컬럼을 다시 조회할 때를 위해 인덱스 생성 (이번 조회는 전체 스캔)
+            self._schedule_index(self._current_version(), column)
+        return match_series(self.get_column(column), condition, method)
+    
+    def compare_column(self, column: str, operator: str, value: float) -> pd.Series:
+        """컬럼을 숫자로 변환해 비교(ge/le/gt/lt)한 불리언 마스크 반환 (버전 기록 없음)"""
+        if column not in self._current_columns():
+            raise ValueError(f"컬럼 '{column}'이 존재하지 않습니다.")
+        
+        index = get_index_store().get(self.column_token(column), "numeric")
+        if index is not None:
+            return pd.Series(index.compare(operator, value), index=self._current_index())
+        if self.row_count >= INDEX_MIN_ROWS:
+            self._schedule_index(self._current_version(), column, "numeric")
+        numeric_values = pd.to_numeric(self.get_column(column), errors='coerce')
+        return _NUMBER_COMPARATORS[operator](numeric_values, value)
     
-    def drop_columns(self, columns: Union[str, List[str]]) -> pd.DataFrame:
+    def filter_by_column(self, column: str, condition: str,
+                         method: str = "contains") -> Union[pd.DataFrame, "DataFrameManager"]:
+        """특정 컬럼의 조건에 따라 데이터 필터링"""
+        description = f"'{column}' 컬럼에서 '{condition}' 조건으로 필터링 ({method})"
+        if not self.lazy:
+            mask = self.match_column(column, condition, method)
+            return self.filter_by_mask(mask, description)
+        
+        if column not in self._current_columns():
+            raise ValueError(f"컬럼 '{column}'이 존재하지 않습니다.")
+        self._push_operation(description, Filter(column, partial(match_series, condition=condition, method=method)))
+        self.operation_history.append(description)
+        return self
+    
+    def filter_by_mask(self, mask: pd.Series, description: str) -> Union[pd.DataFrame, "DataFrameManager"]:
+        """현재 데이터와 같은 길이의 불리언 마스크로 필터링"""
+        self._push_version(description, rows=self._current_rows()[np.asarray(mask, dtype=bool)],
+                           keep_columns=True)
+        self.operation_history.append(description)
+        return self._result()
+    
+    def drop_columns(self, columns: Union[str, List[str]]) -> Union[pd.DataFrame, "DataFrameManager"]:
         """특정 컬럼 삭제 (원본 유지)"""
         if isinstance(columns, str):
             columns = [columns]
         
-        missing_cols = [col for col in columns if col not in self.current_df.columns]
+        current_columns = self._current_columns()
+        missing_cols = [col for col in columns if col not in current_columns]
         if missing_cols:
             raise ValueError(f"존재하지 않는 컬럼: {missing_cols}")
         
-        result_df = self.current_df.drop(columns=columns)
-        self.operation_history.append(f"컬럼 삭제: {columns}")
-        return result_df
+        description = f"컬럼 삭제: {columns}"
+        remaining = [col for col in current_columns if col not in columns]
+        # 지연 모드에서는 계획도 그대로 이어받으므로 삭제된 컬럼은 로드되지 않음
+        self._push_version(description, columns=remaining, keep_rows=True)
+        self.operation_history.append(description)
+        return self._result()
     
-    def drop_rows(self, indices: Union[int, List[int]]) -> pd.DataFrame:
+    def drop_rows(self, indices: Union[int, List[int]]) -> Union[pd.DataFrame, "DataFrameManager"]:
         """특정 행 삭제 (원본 유지)"""
         if isinstance(indices, int):
             indices = [indices]
         
         # 인덱스 범위 확인
-        valid_indices = [idx for idx in indices if idx in self.current_df.index]
+        rows = self._current_rows()
+        current_index = self._current_index()
+        valid_indices = [idx for idx in indices if idx in current_index]
         if not valid_indices:
             raise ValueError("유효한 인덱스가 없습니다.")
         
-        result_df = self.current_df.drop(index=valid_indices)
-        self.operation_history.append(f"행 삭제: 인덱스 {valid_indices}")
-        return result_df
+        description = f"행 삭제: 인덱스 {valid_indices}"
+        self._push_version(description, rows=rows[~current_index.isin(valid_indices)],
+                           keep_columns=True)
+        self.operation_history.append(description)
+        return self._result()
     
-    def sort_by_column(self, column: str, ascending: bool = True) -> pd.DataFrame:
+    def sort_by_column(self, column: str, ascending: bool = True) -> Union[pd.DataFrame, "DataFrameManager"]:
         """특정 컬럼 기준으로 정렬"""
-        if column not in self.current_df.columns:
+        if column not in self._current_columns():
             raise ValueError(f"컬럼 '{column}'이 존재하지 않습니다.")
         
-        result_df = self.current_df.sort_values(by=column, ascending=ascending)
         order_text = "오름차순" if ascending else "내림차순"
-        self.operation_history.append(f"'{column}' 컬럼 기준 {order_text} 정렬")
+        description = f"'{column}' 컬럼 기준 {order_text} 정렬"
+        if self.lazy and self._versions[self._cursor].plan is not None:
+            # 앞선 지연 작업과 합쳐 실행 (필터 후 정렬, 정렬 후 상위 k개 등)
+            self._push_operation(description, Sort(column, ascending))
+        else:
+            order = self.sort_order(column, ascending)
+            self._push_version(description, rows=self._current_rows()[order], keep_columns=True)
+        self.operation_history.append(description)
+        return self._result()
+    
+    def sort_order(self, column: str, ascending: bool = True) -> np.ndarray:
+        """현재 버전 기준 컬럼 정렬 순서 (같은 컬럼 내용이면 캐시된 순열 재사용)"""
+        key = (self.column_token(column), ascending)
+        order = _sort_cache.get(key)
+        if order is None:
+            order = sort_positions(self.get_column(column), ascending)
+            _sort_cache.put(key, order)
+        return order
+    
+    def _rank_by_column(self, column: str, k: int, ascending: bool) -> pd.DataFrame:
+        """컬럼 기준 앞쪽 k개 행 - 전체 정렬 없이 부분 선택 (캐시된 정렬 순서가 있으면 사용)"""
+        if column not in self._current_columns():
+            raise ValueError(f"컬럼 '{column}'이 존재하지 않습니다.")
+        
+        result_df = self._view_plan(TopK(column, k, ascending))
+        if result_df is not None:
+            return result_df
+        order = _sort_cache.get((self.column_token(column), ascending))
+        if order is None:
+            order = top_k_positions(self.get_column(column), k, ascending)
+        return self.view_rows(order[:k])
+    
+    def top_k_by_column(self, column: str, k: int = 10) -> pd.DataFrame:
+        """컬럼 값이 큰 순서로 상위 k개 행 반환 (버전 기록 없음)"""
+        result_df = self._rank_by_column(column, k, ascending=False)
+        self.operation_history.append(f"'{column}' 컬럼 기준 상위 {k}개 데이터 조회")
         return result_df
     
-    def update_current_df(self, new_df: pd.DataFrame):
-        """현재 작업 중인 데이터프레임 업데이트"""
-        self.current_df = new_df.copy()
+    def bottom_k_by_column(self, column: str, k: int = 10) -> pd.DataFrame:
+        """컬럼 값이 작은 순서로 하위 k개 행 반환 (버전 기록 없음)"""
+        result_df = self._rank_by_column(column, k, ascending=True)
+        self.operation_history.append(f"'{column}' 컬럼 기준 하위 {k}개 데이터 조회")
+        return result_df
+    
+    def apply_edits(self, edited: Dict[int, Dict[str, object]], added: List[Dict[str, object]],
+                    deleted: List[int]):
+        """편집기에서 발생한 변경(행 위치 기준)을 현재 데이터에 병합하여 새 버전으로 기록
+
+        edited: 행 위치 -> {컬럼: 새 값}, added: 추가된 행 목록, deleted: 삭제된 행 위치
+        데이터를 복사하지 않고 변경 내역(delta)만 기록하므로 비용은 변경된 셀/행 수에 비례합니다.
+        셀만 편집한 경우 바뀐 컬럼만 새 내용 토큰을 받아 그 컬럼의 캐시/인덱스/통계만 다시 계산됩니다.
+        """
+        if not (edited or added or deleted):
+            return
+        version = self._current_version()
+        rows = self._current_rows()
+        columns = self._current_columns()
+        delta = version.delta or _Delta({}, None)
+
+        # 셀 변경은 기준 행 위치를 인덱스로 하는 컬럼별 값으로 누적 (같은 위치는 나중 값 우선)
+        cells = dict(delta.cells)
+        changed = sorted({column for changes in edited.values() for column in changes}, key=columns.index)
+        for column in changed:
+            updates = {int(rows[position]): changes[column]
+                       for position, changes in edited.items() if column in changes}
+            patch = pd.Series(list(updates.values()), index=list(updates.keys()), dtype=object)
+            if column in cells:
+                patch = pd.concat([cells[column], patch])
+                patch = patch[~patch.index.duplicated(keep="last")]
+            cells[column] = patch
+
+        new_rows = rows
+        added_frame = delta.added
+        if deleted:
+            new_rows = np.delete(new_rows, list(deleted))
+        if added:
+            base_columns = version.base.columns
+            new_frame = pd.DataFrame(added, columns=base_columns)
+            full_index = self._take_index(version)
+            if len(full_index) and pd.api.types.is_integer_dtype(full_index):
+                start = full_index.max() + 1
+                new_frame.index = pd.RangeIndex(start, start + len(new_frame))
+            start_position = _base_length(version)
+            added_frame = new_frame if added_frame is None else pd.concat([added_frame, new_frame])
+            new_rows = np.concatenate([new_rows, np.arange(start_position, start_position + len(new_frame))])
+
+        new_delta = _Delta(cells, added_frame)
+        parts = []
+        if edited:
+            parts.append(f"셀 {sum(len(changes) for changes in edited.values())}개 수정")
+        if added:
+            parts.append(f"행 {len(added)}개 추가")
+        if deleted:
+            parts.append(f"행 {len(deleted)}개 삭제")
+        description = f"데이터 편집: {', '.join(parts)}"
+        if added or deleted:
+            self._push_version(description, rows=new_rows, keep_columns=True, delta=new_delta)
+        else:
+            # 행 구성이 그대로면 바뀌지 않은 컬럼은 이전 내용 토큰 유지
+            column_sources = {column: self.column_token(column)[0] for column in columns if column not in changed}
+            self._push_version(description, rows=version.rows, keep_columns=True,
+                               column_sources=column_sources, delta=new_delta)
+        self.operation_history.append(description)
+    
+    def update_current_df(self, new_df: pd.DataFrame, changed_columns: Optional[Iterable[str]] = None):
+        """현재 작업 중인 데이터프레임 업데이트 (새 버전으로 기록, 복사 없음)
+
+        changed_columns: 값이 바뀐 컬럼 (행 추가/삭제 없이 셀만 편집한 경우). 생략하면 직접 비교합니다.
+        바뀌지 않은 컬럼은 이전 식별자를 유지하여 컬럼 단위 캐시가 그대로 재사용됩니다.
+        """
+        if changed_columns is None:
+            changed_columns = self._changed_columns(new_df)
+        column_sources = None
+        if changed_columns is not None:
+            changed = set(changed_columns)
+            current_columns = set(self._current_columns())
+            column_sources = {column: self.column_token(column)[0] for column in new_df.columns
+                              if column in current_columns and column not in changed}
+        self._push_version("데이터 편집", base=new_df, column_sources=column_sources)
+    
+    def _changed_columns(self, new_df: pd.DataFrame) -> Optional[List[str]]:
+        """현재 데이터와 비교해 값이 바뀐 컬럼 목록 (행 구성이 달라졌으면 None)"""
+        if len(new_df) != self.row_count:
+            return None
+        if not new_df.index.equals(self._current_index()):
+            return None
+        current_columns = set(self._current_columns())
+        return [column for column in new_df.columns
+                if column not in current_columns or not new_df[column].equals(self.get_column(column))]
     
     def reset_to_original(self):
         """원본 데이터로 복원"""
-        self.current_df = self.original_df.copy()
+        original = self._versions[0]
+        self._push_version("원본 데이터로 복원", base=original.base, source_id=original.source_id)
         self.operation_history.append("원본 데이터로 복원")
     
+    def undo(self) -> bool:
+        """직전 작업 되돌리기"""
+        if not self.can_undo:
+            return False
+        self.operation_history.append(f"작업 되돌리기: {self._versions[self._cursor].description}")
+        self._cursor -= 1
+        return True
+    
+    def redo(self) -> bool:
+        """되돌린 작업 다시 실행"""
+        if not self.can_redo:
+            return False
+        self._cursor += 1
+        self.operation_history.append(f"작업 다시 실행: {self._versions[self._cursor].description}")
+        return True
+    
+    def get_versions(self) -> List[Tuple[int, str]]:
+        """버전 목록 반환 (순번, 작업 설명)"""
+        return [(i, version.description) for i, version in enumerate(self._versions)]
+    
+    def get_version_df(self, index: int) -> pd.DataFrame:
+        """특정 시점(순번)의 데이터 반환"""
+        if not 0 <= index < len(self._versions):
+            raise ValueError(f"존재하지 않는 버전입니다: {index}")
+        return self._materialize(self._resolve(index))
+    
     def get_info(self) -> str:
         """데이터프레임 정보 반환"""
+        columns = self._current_columns()
         info = f"데이터셋: {self.name}\n"
-        info += f"행 수: {len(self.current_df)}\n"
-        info += f"열 수: {len(self.current_df.columns)}\n"
-        info += f"컬럼: {', '.join(self.current_df.columns.tolist())}\n"
+        info += f"행 수: {len(self._current_rows())}\n"
+        if self.sampled:
+            info += f"⚠️ 샘플링됨: 원본 {self.total_rows:,}행 중 {len(self._versions[0].base):,}행만 로드\n"
+        info += f"열 수: {len(columns)}\n"
+        info += f"컬럼: {', '.join(columns)}\n"
         if self.operation_history:
             info += f"수행한 작업:\n" + "\n".join([f"- {op}" for op in self.operation_history[-5:]])  # 최근 5개 작업만 표시
         return info
     
+    def export_file(self, fmt: str) -> BinaryIO:
+        """현재 버전을 파일로 내보내 열기 (버전/형식별로 한 번만 생성, 다운로드 버튼의 지연 생성용)"""
+        version = self._current_version()
+        return get_export_manager().open(("version", version.version_id), partial(self._materialize, version), fmt)
+    
+    def export_bytes(self, fmt: str) -> bytes:
+        """현재 버전의 내보내기 파일 내용 (버전/형식별 캐시, 파일 핸들을 남기지 않음)"""
+        version = self._current_version()
+        return get_export_manager().export_bytes(("version", version.version_id),
+                                                 partial(self._materialize, version), fmt)
+    
     def to_csv(self) -> bytes:
         """CSV 형태로 변환"""
-        return self.current_df.to_csv(index=False).encode('utf-8-sig')
+        return self.export_bytes("csv")
     
     def to_excel(self) -> bytes:
         """Excel 형태로 변환"""
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            self.current_df.to_excel(writer, index=False, sheet_name='Data')
-        return output.getvalue()
+        return self.export_bytes("xlsx")
 
-def process_data_request(user_input: str, df_manager: DataFrameManager) -> Tuple[Optional[str], Optional[pd.DataFrame]]:
-    """사용자의 데이터 조작 요청을 처리"""
-    user_input_lower = user_input.lower()
-    
-    try:
-        # 사용 가능한 작업 안내 요청
-        if any(keyword in user_input_lower for keyword in ['할 수 있는', '가능한', '작업', '명령어', '기능']):
-            guide_text = f"""
+def _guide_text(df_manager: DataFrameManager) -> str:
+    """사용 가능한 데이터 조작 명령어 안내문"""
+    return f"""
 ## 📊 **데이터 조작 가능한 명령어들**
 
 현재 로드된 데이터: **{df_manager.name}**
-- 행 수: {len(df_manager.current_df)}
-- 열 수: {len(df_manager.current_df.columns)}
-- 컬럼: {', '.join(df_manager.current_df.columns.tolist())}
+- 행 수: {df_manager.row_count}
+- 열 수: {len(df_manager.columns)}
+- 컬럼: {', '.join(map(str, df_manager.columns))}
 
 ### 🔍 **데이터 조회**
 - `상위 10개 데이터 보여줘` 또는 `top 5`
 - `하위 10개 데이터 보여줘` 또는 `bottom 3`
+- `[컬럼명] 기준 상위 10개` 또는 `salary 하위 5`
 
 ### 🎯 **데이터 필터링**
 - `[컬럼명]에서 [키워드] 포함된 데이터만`
@@ -148,115 +665,125 @@ def process_data_request(user_input: str, df_manager: DataFrameManager) -> Tuple
 - `salary 내림차순으로 정렬`
 - `이름 오름차순 정렬`
 
+### ↩️ **되돌리기**
+- `되돌려줘` 또는 `undo`
+- `다시 실행` 또는 `redo`
+- `원본 데이터로 복원`
+
 ### 📥 **데이터 다운로드**
 모든 조작된 결과는 **CSV** 또는 **Excel** 형태로 다운로드 가능합니다!
             """
-            return guide_text, df_manager.current_df.head(5)
-        
-        # Top-K 데이터 요청
-        top_match = re.search(r'(?:상위|top)\s*(\d+)', user_input_lower)
-        if top_match:
-            k = int(top_match.group(1))
-            result_df = df_manager.get_top_k(k)
-            return f"상위 {k}개 데이터를 보여드립니다:", result_df
-        
-        # Bottom-K 데이터 요청
-        bottom_match = re.search(r'(?:하위|bottom)\s*(\d+)', user_input_lower)
-        if bottom_match:
-            k = int(bottom_match.group(1))
-            result_df = df_manager.get_bottom_k(k)
-            return f"하위 {k}개 데이터를 보여드립니다:", result_df
-        
-        # 숫자 범위 필터링 (예: "salary 100000 이상")
-        number_pattern = r'(\d+)\s*(?:이상|이하|초과|미만|>=|<=|>|<)'
-        number_match = re.search(number_pattern, user_input)
-        if number_match:
-            value = float(number_match.group(1))
-            operator = user_input[number_match.end()-2:number_match.end()]
-            
-            for column in df_manager.current_df.columns:
-                if column.lower() in user_input_lower:
-                    try:
-                        if '이상' in user_input or '>=' in user_input:
-                            result_df = df_manager.current_df[pd.to_numeric(df_manager.current_df[column], errors='coerce') >= value]
-                        elif '이하' in user_input or '<=' in user_input:
-                            result_df = df_manager.current_df[pd.to_numeric(df_manager.current_df[column], errors='coerce') <= value]
-                        elif '초과' in user_input or '>' in user_input:
-                            result_df = df_manager.current_df[pd.to_numeric(df_manager.current_df[column], errors='coerce') > value]
-                        elif '미만' in user_input or '<' in user_input:
-                            result_df = df_manager.current_df[pd.to_numeric(df_manager.current_df[column], errors='coerce') < value]
-                        
-                        if not result_df.empty:
-                            df_manager.operation_history.append(f"'{column}' 컬럼 숫자 조건 필터링: {value}")
-                            return f"'{column}' 컬럼에서 조건에 맞는 데이터를 필터링했습니다:", result_df
-                    except:
-                        continue
-        
-        # 컬럼 필터링 요청 (개선된 버전)
-        for column in df_manager.current_df.columns:
-            column_lower = column.lower()
-            if column_lower in user_input_lower:
-                # AI, 인공지능, 머신러닝 등의 키워드 검색
-                ai_keywords = ['ai', '인공지능', '머신러닝', 'machine learning', 'data scientist', 'ml', 'artificial intelligence']
-                for keyword in ai_keywords:
-                    if keyword in user_input_lower:
-                        result_df = df_manager.filter_by_column(column, keyword)
-                        if not result_df.empty:
-                            return f"'{column}' 컬럼에서 '{keyword}' 관련 데이터를 필터링했습니다:", result_df
-                
-                # "포함된", "관련된" 등의 키워드와 함께 사용되는 조건 추출
-                patterns = [
-                    rf"{column_lower}.*?(?:포함|관련|해당).*?([가-힣a-z0-9\s]+)",
-                    rf"([가-힣a-z0-9\s]+).*?{column_lower}",
-                    rf"{column_lower}.*?([가-힣a-z0-9\s]+)"
-                ]
-                
-                for pattern in patterns:
-                    filter_match = re.search(pattern, user_input_lower)
-                    if filter_match:
-                        condition = filter_match.group(1).strip()
-                        # 불용어 제거
-                        stop_words = ['에서', '의', '을', '를', '이', '가', '으로', '에', '만', '데이터', '컬럼', '값']
-                        for stop_word in stop_words:
-                            condition = condition.replace(stop_word, '').strip()
-                        
-                        if condition and len(condition) > 1:
-                            result_df = df_manager.filter_by_column(column, condition)
-                            if not result_df.empty:
-                                return f"'{column}' 컬럼에서 '{condition}' 조건으로 필터링했습니다:", result_df
-        
-        # 컬럼 삭제 요청
-        if any(keyword in user_input for keyword in ['삭제', 'delete', '제거', '빼']):
-            for column in df_manager.current_df.columns:
-                if column.lower() in user_input_lower:
-                    result_df = df_manager.drop_columns(column)
-                    return f"'{column}' 컬럼을 삭제했습니다:", result_df
-        
-        # 행 삭제 요청 (인덱스 기반)
-        row_delete_match = re.search(r'(\d+)(?:번째|행|줄).*?삭제', user_input)
-        if row_delete_match:
-            row_index = int(row_delete_match.group(1)) - 1  # 사용자는 1부터 시작
-            if 0 <= row_index < len(df_manager.current_df):
-                result_df = df_manager.drop_rows(row_index)
-                return f"{row_index + 1}번째 행을 삭제했습니다:", result_df
-        
-        # 정렬 요청
-        if any(keyword in user_input for keyword in ['정렬', 'sort', '순서']):
-            for column in df_manager.current_df.columns:
-                if column.lower() in user_input_lower:
-                    ascending = any(keyword in user_input for keyword in ['오름차순', 'asc', '낮은', '작은'])
-                    descending = any(keyword in user_input for keyword in ['내림차순', 'desc', '높은', '큰'])
-                    order = True if ascending else False if descending else True
-                    result_df = df_manager.sort_by_column(column, ascending=order)
-                    order_text = "오름차순" if order else "내림차순"
-                    return f"'{column}' 컬럼 기준으로 {order_text} 정렬했습니다:", result_df
-        
-        # 원본 데이터로 복원 요청
-        if any(keyword in user_input_lower for keyword in ['원본', '복원', '초기화', 'reset']):
-            df_manager.reset_to_original()
-            return "원본 데이터로 복원했습니다:", df_manager.current_df
+
+_NUMBER_COMPARATORS = {
+    'ge': lambda values, value: values >= value,
+    'le': lambda values, value: values <= value,
+    'gt': lambda values, value: values > value,
+    'lt': lambda values, value: values < value,
+}
+
+DataResult = Optional[Tuple[str, pd.DataFrame]]
+
+def _handle_undo(df_manager: DataFrameManager, params: dict) -> DataResult:
+    if df_manager.undo():
+        return "직전 작업을 되돌렸습니다:", df_manager.current_df
+    return "되돌릴 작업이 없습니다.", df_manager.current_df
+
+def _handle_redo(df_manager: DataFrameManager, params: dict) -> DataResult:
+    if df_manager.redo():
+        return "되돌린 작업을 다시 실행했습니다:", df_manager.current_df
+    return "다시 실행할 작업이 없습니다.", df_manager.current_df
+
+def _handle_guide(df_manager: DataFrameManager, params: dict) -> DataResult:
+    return _guide_text(df_manager), df_manager.preview(5)
+
+def _handle_top(df_manager: DataFrameManager, params: dict) -> DataResult:
+    k = params["k"]
+    return f"상위 {k}개 데이터를 보여드립니다:", df_manager.get_top_k(k)
+
+def _handle_bottom(df_manager: DataFrameManager, params: dict) -> DataResult:
+    k = params["k"]
+    return f"하위 {k}개 데이터를 보여드립니다:", df_manager.get_bottom_k(k)
+
+def _handle_top_by_column(df_manager: DataFrameManager, params: dict) -> DataResult:
+    column, k = params["column"], params["k"]
+    return f"'{column}' 컬럼 기준 상위 {k}개 데이터를 보여드립니다:", df_manager.top_k_by_column(column, k)
+
+def _handle_bottom_by_column(df_manager: DataFrameManager, params: dict) -> DataResult:
+    column, k = params["column"], params["k"]
+    return f"'{column}' 컬럼 기준 하위 {k}개 데이터를 보여드립니다:", df_manager.bottom_k_by_column(column, k)
+
+def _handle_numeric_filter(df_manager: DataFrameManager, params: dict) -> DataResult:
+    column, value = params["column"], params["value"]
+    try:
+        mask = df_manager.compare_column(column, params["operator"], value)
+    except Exception:
+        return None
+    if not mask.any():
+        return None
+    df_manager.filter_by_mask(mask, f"'{column}' 컬럼 숫자 조건 필터링: {value}")
+    return f"'{column}' 컬럼에서 조건에 맞는 데이터를 필터링했습니다:", df_manager.collect()
+
+def _handle_filter(df_manager: DataFrameManager, params: dict) -> DataResult:
+    column, condition = params["column"], params["condition"]
+    mask = df_manager.match_column(column, condition)
+    if not mask.any():
+        return None
+    df_manager.filter_by_mask(mask, f"'{column}' 컬럼에서 '{condition}' 조건으로 필터링 (contains)")
+    return f"'{column}' 컬럼에서 '{condition}' {params['label']} 필터링했습니다:", df_manager.collect()
+
+def _handle_drop_column(df_manager: DataFrameManager, params: dict) -> DataResult:
+    column = params["column"]
+    df_manager.drop_columns(column)
+    return f"'{column}' 컬럼을 삭제했습니다:", df_manager.collect()
+
+def _handle_drop_row(df_manager: DataFrameManager, params: dict) -> DataResult:
+    row_index = params["row_number"] - 1  # 사용자는 1부터 시작
+    if not 0 <= row_index < df_manager.row_count:
+        return None
+    df_manager.drop_rows(row_index)
+    return f"{row_index + 1}번째 행을 삭제했습니다:", df_manager.collect()
+
+def _handle_sort(df_manager: DataFrameManager, params: dict) -> DataResult:
+    column, order = params["column"], params["ascending"]
+    df_manager.sort_by_column(column, ascending=order)
+    order_text = "오름차순" if order else "내림차순"
+    return f"'{column}' 컬럼 기준으로 {order_text} 정렬했습니다:", df_manager.collect()
+
+def _handle_reset(df_manager: DataFrameManager, params: dict) -> DataResult:
+    df_manager.reset_to_original()
+    return "원본 데이터로 복원했습니다:", df_manager.current_df
+
+INTENT_HANDLERS = {
+    "undo": _handle_undo,
+    "redo": _handle_redo,
+    "guide": _handle_guide,
+    "top": _handle_top,
+    "bottom": _handle_bottom,
+    "top_by_column": _handle_top_by_column,
+    "bottom_by_column": _handle_bottom_by_column,
+    "numeric_filter": _handle_numeric_filter,
+    "filter": _handle_filter,
+    "drop_column": _handle_drop_column,
+    "drop_row": _handle_drop_row,
+    "sort": _handle_sort,
+    "reset": _handle_reset,
+}
+
+def process_data_request(user_input: str, df_manager: DataFrameManager) -> Tuple[Optional[str], Optional[pd.DataFrame]]:
+    """사용자의 데이터 조작 요청을 처리"""
+    try:
+        # 스키마별로 미리 만들어 둔 라우터가 요청을 한 번 훑어 의도 후보를 우선순위 순으로 반환
+        with span("intent_routing") as attrs:
+            router = get_router(df_manager.columns)
+            intents = router.route(user_input)
+            attrs["candidates"] = len(intents)
+        for intent in intents:
+            with span("data_operation", intent=intent.name, rows=df_manager.row_count):
+                result = INTENT_HANDLERS[intent.name](df_manager, intent.params)
+            if result is not None:
+                return result
         
         return None, None
         
     except Exception as e:
-        return f"데이터 처리 중 오류가 발생했습니다: {str(e)}", None 
\ No newline at end of file
+        return f"데이터 처리 중 오류가 발생했습니다: {str(e)}", None
\ No newline at end of file
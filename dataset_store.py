@@ -0,0 +1,398 @@
+import os
+import time
+import uuid
+import weakref
+import threading
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:  # pyarrow가 없으면 업로드 데이터를 메모리에 그대로 보관
+    pa = None
+
+DATASET_STORE_DIR = os.environ.get("DATASET_STORE_DIR", os.path.join(".cache", "datasets"))
+# 이 시간 동안 사용되지 않은 데이터는 메모리에서 해제 (파일은 유지)
+IDLE_RELEASE_SECONDS = float(os.environ.get("DATASET_IDLE_RELEASE_SECONDS", "300"))
+IDLE_CHECK_INTERVAL_SECONDS = 30
+# 저장소 디렉터리 한도 - 사용 중(StoredFrame이 참조 중)이 아닌 파일은 이 기간이 지나거나
+# 전체 크기가 한도를 넘으면 오래된 것부터 삭제
+DATASET_STORE_MAX_AGE_SECONDS = float(os.environ.get("DATASET_STORE_MAX_AGE_SECONDS", str(7 * 24 * 60 * 60)))
+DATASET_STORE_MAX_BYTES = int(float(os.environ.get("DATASET_STORE_MAX_MB", "5120")) * 1024 * 1024)
+# 다른 프로세스가 쓰는 중일 수 있으므로 이 시간보다 오래된 임시 파일만 삭제
+STALE_TEMP_SECONDS = 60 * 60
+
+
+class StoredFrame:
+    """Arrow IPC 파일에 저장된 데이터셋 - 컬럼 단위로 필요할 때만 메모리 맵으로 로드"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._table = None
+        self._columns_cache: Dict[str, pd.Series] = {}
+        self._index: Optional[pd.Index] = None
+        self.last_access = time.monotonic()
+
+        table = self._open()
+        metadata = table.schema.pandas_metadata or {}
+        self._index_columns = [c for c in metadata.get("index_columns", []) if isinstance(c, str)]
+        self.columns = pd.Index([name for name in table.schema.names if name not in self._index_columns])
+        # 컬럼 타입은 스키마만으로 계산 (데이터를 읽지 않음)
+        self.dtypes = table.schema.empty_table().to_pandas().dtypes.reindex(self.columns)
+        self._num_rows = table.num_rows
+        self.release()
+        register_idle_resource(self)
+
+    def _open(self):
+        """메모리 맵으로 테이블 열기 (데이터는 실제로 접근할 때 페이지 단위로 읽힘)"""
+        with self._lock:
+            if self._table is None:
+                self._table = pa_ipc.open_file(pa.memory_map(self.path, "r")).read_all()
+            return self._table
+
+    def touch(self):
+        self.last_access = time.monotonic()
+
+    def __len__(self) -> int:
+        return self._num_rows
+
+    @property
+    def index(self) -> pd.Index:
+        """원본 인덱스"""
+        self.touch()
+        with self._lock:
+            if self._index is None:
+                table = self._open()
+                self._index = table.select(self._index_columns).to_pandas().index if self._index_columns \
+                    else table.select([]).to_pandas().index
+            return self._index
+
+    def column(self, name: str) -> pd.Series:
+        """단일 컬럼 로드 (캐시됨)"""
+        self.touch()
+        with self._lock:
+            series = self._columns_cache.get(name)
+            if series is None:
+                if name not in self.columns:
+                    raise KeyError(name)
+                series = self._open().column(name).to_pandas()
+                series.index = self.index
+                series.name = name
+                self._columns_cache[name] = series
+            return series
+
+    def frame(self, columns: Optional[List[str]] = None, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """요청한 컬럼(과 행 위치)만 로드하여 DataFrame 구성"""
+        columns = self.columns.tolist() if columns is None else list(columns)
+        if rows is None:
+            return pd.DataFrame({name: self.column(name) for name in columns}, index=self.index, columns=columns)
+        data = {name: self.column(name).iloc[rows] for name in columns}
+        return pd.DataFrame(data, index=self.index.take(rows), columns=columns)
+
+    def release(self):
+        """메모리에 올라온 컬럼과 메모리 맵 해제"""
+        with self._lock:
+            self._table = None
+            self._columns_cache = {}
+            self._index = None
+
+    @property
+    def resident_columns(self) -> int:
+        return len(self._columns_cache)
+
+
+DataSource = Union[pd.DataFrame, StoredFrame]
+
+
+def load_column(source: DataSource, column: str) -> pd.Series:
+    """데이터 소스에서 단일 컬럼 반환"""
+    if isinstance(source, StoredFrame):
+        return source.column(column)
+    return source[column]
+
+
+def column_dtype(source: DataSource, column: str):
+    """데이터 소스에서 컬럼 타입 반환 (저장된 데이터는 로드하지 않음)"""
+    return source.dtypes[column]
+
+
+def load_frame(source: DataSource, columns: Optional[List[str]] = None,
+               rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """데이터 소스에서 요청한 컬럼(과 행 위치)만 DataFrame으로 반환"""
+    if isinstance(source, StoredFrame):
+        return source.frame(columns, rows)
+    if columns is None:
+        return source if rows is None else source.take(rows)
+    col_positions = source.columns.get_indexer(columns)
+    if rows is None:
+        return source.iloc[:, col_positions]
+    return source.iloc[rows, col_positions]
+
+
+class FrameWriter:
+    """DataFrame 청크를 Arrow IPC 파일에 레코드 배치로 이어서 기록 (전체 데이터를 메모리에 모으지 않음)
+
+    스키마는 첫 청크에서 정하며, 이후 청크는 그 스키마로 변환합니다. 변환할 수 없는 청크가 오면
+    write()가 False를 반환하고, abort()로 지금까지 기록한 행을 DataFrame으로 돌려받을 수 있습니다.
+    같은 키의 파일이 이미 있으면 기록하지 않고 기존 파일을 재사용합니다.
+    """
+
+    def __init__(self, store: "DatasetStore", key: str, path: str, existing: Optional[StoredFrame] = None):
+        self._store = store
+        self._key = key
+        self._path = path
+        self._existing = existing
+        self._temp_path = None if existing is not None else f"{path}.{uuid.uuid4().hex}.tmp"
+        self._sink = None
+        self._writer = None
+        self._schema = None
+
+    def write(self, chunk: pd.DataFrame) -> bool:
+        """청크 기록 - 첫 청크의 스키마로 변환할 수 없으면 기록하지 않고 False 반환"""
+        if self._existing is not None:
+            return True
+        if not all(isinstance(column, str) for column in chunk.columns):
+            return False
+        try:
+            if self._writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                self._schema = table.schema
+                self._sink = pa.OSFile(self._temp_path, "wb")
+                self._writer = pa_ipc.new_file(self._sink, self._schema)
+            else:
+                table = pa.Table.from_pandas(chunk, schema=self._schema, preserve_index=False)
+            self._writer.write_table(table)
+            return True
+        except (pa.ArrowException, TypeError, ValueError):
+            return False
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+    def abort(self) -> Optional[pd.DataFrame]:
+        """기록을 중단하고 지금까지 기록한 행을 DataFrame으로 반환 (기록한 행이 없으면 None)"""
+        if self._existing is not None:
+            return load_frame(self._existing)
+        try:
+            self._close()
+            if self._schema is None:
+                return None
+            with pa.memory_map(self._temp_path, "r") as source:
+                return pa_ipc.open_file(source).read_all().to_pandas()
+        finally:
+            self._remove_temp()
+
+    def finish(self) -> DataSource:
+        """기록을 마치고 저장된 프레임 반환 (파일로 남길 수 없으면 기록한 데이터를 DataFrame으로 반환)"""
+        if self._existing is not None:
+            return self._existing
+        if self._schema is None:
+            self._remove_temp()
+            return pd.DataFrame()
+        try:
+            self._close()
+            stored = self._store._publish(self._key, self._path, self._temp_path)
+        except (pa.ArrowException, OSError):
+            df = self.abort()
+            return df if df is not None else pd.DataFrame()
+        self._temp_path = None
+        return stored
+
+    def _remove_temp(self):
+        if self._temp_path is not None:
+            try:
+                os.remove(self._temp_path)
+            except OSError:
+                pass
+            self._temp_path = None
+
+
+class DatasetStore:
+    """업로드된 데이터를 로컬 Arrow IPC 파일로 한 번만 저장하고 공유하는 저장소
+
+    파일은 같은 내용을 다시 올리면 재사용되도록 남겨 두되, 어떤 StoredFrame도 참조하지 않는 파일은
+    기간(max_age_seconds)과 디렉터리 크기(max_bytes) 한도에 따라 오래된 것부터 삭제합니다.
+    """
+
+    def __init__(self, directory: str = DATASET_STORE_DIR, max_age_seconds: float = DATASET_STORE_MAX_AGE_SECONDS,
+                 max_bytes: int = DATASET_STORE_MAX_BYTES):
+        self.directory = directory
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        # 매니저가 더 이상 참조하지 않는 프레임은 자동으로 빠짐 (파일 삭제 대상이 됨)
+        self._frames: "weakref.WeakValueDictionary[str, StoredFrame]" = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self.prune()
+
+    @property
+    def available(self) -> bool:
+        return pa is not None
+
+    def put(self, df: pd.DataFrame, key: str) -> DataSource:
+        """DataFrame을 저장하고 지연 로드 프레임 반환 (저장할 수 없으면 DataFrame 그대로 반환)"""
+        if not self.available or not all(isinstance(column, str) for column in df.columns):
+            return df
+        with self._lock:
+            stored = self._frames.get(key)
+            if stored is not None:
+                return stored
+            path = os.path.join(self.directory, f"{key}.arrow")
+            temp_path = None
+            try:
+                if os.path.exists(path):
+                    os.utime(path)  # 재사용한 파일은 최근 사용으로 표시 (정리 순서)
+                else:
+                    os.makedirs(self.directory, exist_ok=True)
+                    table = pa.Table.from_pandas(df)
+                    temp_path = f"{path}.{os.getpid()}.tmp"
+                    with pa.OSFile(temp_path, "wb") as sink, pa_ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+                    os.replace(temp_path, path)
+                    temp_path = None
+                stored = StoredFrame(path)
+            except (pa.ArrowException, OSError):
+                # 혼합 타입 컬럼 등 Arrow로 변환할 수 없는 데이터는 메모리에 보관
+                if temp_path is not None:
+                    try:
+                        os.remove(temp_path)
+                    except OSError:
+                        pass
+                return df
+            self._frames[key] = stored
+        self.prune()
+        return stored
+
+    def writer(self, key: str) -> Optional[FrameWriter]:
+        """청크 단위로 기록하는 쓰기 객체 (pyarrow가 없으면 None) - 대용량 파일을 메모리에 모으지 않고 저장"""
+        if not self.available:
+            return None
+        path = os.path.join(self.directory, f"{key}.arrow")
+        with self._lock:
+            # 같은 내용의 파일이 이미 있으면 재사용 (프레임을 잡아 두어 정리 대상에서 제외)
+            existing = self._frames.get(key)
+            if existing is None and os.path.exists(path):
+                try:
+                    os.utime(path)
+                    existing = StoredFrame(path)
+                    self._frames[key] = existing
+                except (pa.ArrowException, OSError):
+                    existing = None
+        if existing is None:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+            except OSError:
+                return None
+        return FrameWriter(self, key, path, existing)
+
+    def _publish(self, key: str, path: str, temp_path: str) -> StoredFrame:
+        """기록을 마친 임시 파일을 저장소 파일로 옮기고 프레임 등록"""
+        with self._lock:
+            stored = self._frames.get(key)
+            if stored is None:
+                os.replace(temp_path, path)
+                stored = StoredFrame(path)
+                self._frames[key] = stored
+            else:
+                os.remove(temp_path)  # 같은 내용을 다른 요청이 먼저 저장함
+        self.prune()
+        return stored
+
+    def prune(self) -> int:
+        """참조되지 않는 파일 중 기간이 지난 것, 그리고 크기 한도를 넘는 만큼 오래된 것부터 삭제 - 삭제한 개수 반환"""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        now = time.time()
+        with self._lock:
+            in_use = {os.path.abspath(frame.path) for frame in list(self._frames.values())}
+            files = []
+            total = 0
+            for name in names:
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(".tmp"):
+                    if now - stat.st_mtime > STALE_TEMP_SECONDS:
+                        files.append((0.0, path, stat.st_size))
+                    continue
+                if not name.endswith(".arrow"):
+                    continue
+                total += stat.st_size
+                if os.path.abspath(path) not in in_use:
+                    files.append((stat.st_mtime, path, stat.st_size))
+
+            removed = 0
+            for mtime, path, size in sorted(files):
+                expired = now - mtime > self.max_age_seconds
+                if not expired and total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                if path.endswith(".arrow"):
+                    total -= size
+                removed += 1
+            return removed
+
+
+_store: Optional[DatasetStore] = None
+_store_lock = threading.Lock()
+
+
+def get_dataset_store() -> DatasetStore:
+    """프로세스 전체에서 공유하는 데이터셋 저장소"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DatasetStore()
+        return _store
+
+
+# ---------- 유휴 리소스 해제 ----------
+_idle_resources: "weakref.WeakSet" = weakref.WeakSet()
+_idle_lock = threading.Lock()
+_idle_thread: Optional[threading.Thread] = None
+
+
+def _release_idle_loop():
+    while True:
+        time.sleep(IDLE_CHECK_INTERVAL_SECONDS)
+        release_idle_resources()
+        if _store is not None:
+            _store.prune()
+
+
+def release_idle_resources(max_idle_seconds: float = IDLE_RELEASE_SECONDS) -> int:
+    """일정 시간 사용되지 않은 리소스의 메모리 해제 - 해제한 개수 반환"""
+    now = time.monotonic()
+    with _idle_lock:
+        resources = list(_idle_resources)
+    released = 0
+    for resource in resources:
+        if now - resource.last_access >= max_idle_seconds:
+            resource.release()
+            released += 1
+    return released
+
+
+def register_idle_resource(resource):
+    """last_access 속성과 release() 메서드를 가진 객체를 유휴 해제 대상으로 등록"""
+    global _idle_thread
+    with _idle_lock:
+        _idle_resources.add(resource)
+        if _idle_thread is None:
+            _idle_thread = threading.Thread(target=_release_idle_loop, name="dataset-idle-release", daemon=True)
+            _idle_thread.start()
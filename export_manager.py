@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+import threading
+from typing import BinaryIO, Callable, Dict, Hashable, Iterator, NamedTuple, Optional
+
+import pandas as pd
+
+from cache_utils import LRUCache
+
+# 한 번에 변환하는 행 수 (CSV 텍스트 / Excel 행 모두 이 단위로 디스크에 기록)
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_CACHE_SIZE = 32
+EXCEL_MAX_ROWS = 1_048_576
+CSV_ENCODING = "utf-8-sig"   # Excel에서 한글이 깨지지 않도록 BOM 포함
+
+class ExportFormat(NamedTuple):
+    """내보내기 형식"""
+    extension: str
+    mime: str
+    label: str
+
+EXPORT_FORMATS: Dict[str, ExportFormat] = {
+    "csv": ExportFormat("csv", "text/csv", "📄 CSV 다운로드"),
+    "xlsx": ExportFormat("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                         "📊 Excel 다운로드"),
+}
+
+def iter_csv_chunks(df: pd.DataFrame, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[str]:
+    """DataFrame을 행 묶음 단위 CSV 텍스트로 변환 (첫 묶음에 헤더 포함)"""
+    if len(df) == 0:
+        yield df.to_csv(index=False)
+        return
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=start == 0)
+
+def write_csv(df: pd.DataFrame, path: str, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """CSV 파일로 저장 - 전체 텍스트를 메모리에 만들지 않고 묶음 단위로 기록"""
+    with open(path, "w", encoding=CSV_ENCODING, newline="") as f:
+        for chunk in iter_csv_chunks(df, chunk_rows):
+            f.write(chunk)
+
+def write_xlsx(df: pd.DataFrame, path: str, sheet_name: str = "Data", chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """Excel 파일로 저장 - openpyxl 쓰기 전용 모드로 행을 흘려보내 메모리 사용량을 일정하게 유지"""
+    from openpyxl import Workbook
+
+    if len(df) + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(f"Excel 시트 최대 행 수({EXCEL_MAX_ROWS:,})를 초과합니다: {len(df):,}행")
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    sheet.append([str(column) for column in df.columns])
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows].astype(object)
+        # 결측값은 빈 셀로 기록
+        chunk = chunk.where(chunk.notna(), None)
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append(row)
+    workbook.save(path)
+
+_WRITERS = {"csv": write_csv, "xlsx": write_xlsx}
+
+class ExportManager:
+    """내보내기 파일 관리자 - 요청이 있을 때만 파일을 만들고 (키, 형식)별로 캐시
+
+    키에는 데이터 버전처럼 내용이 바뀌면 함께 바뀌는 값을 사용합니다.
+    파일은 임시 디렉터리에 묶음 단위로 기록되며, 캐시에서 밀려나면 삭제됩니다.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_entries: int = EXPORT_CACHE_SIZE):
+        self._directory = directory or tempfile.mkdtemp(prefix="chatbot-export-")
+        os.makedirs(self._directory, exist_ok=True)
+        self._files = LRUCache(max_entries=max_entries)
+        self._locks: Dict[Hashable, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._counter = 0
+
+    def _lock_for(self, key: Hashable) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def export_path(self, key: Hashable, loader: Callable[[], pd.DataFrame], fmt: str) -> str:
+        """내보내기 파일 경로 - 캐시에 없을 때만 loader로 데이터를 받아 파일 생성"""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"지원하지 않는 내보내기 형식입니다: {fmt}")
+        cache_key = (key, fmt)
+        path = self._files.get(cache_key)
+        if path is not None and os.path.exists(path):
+            return path
+
+        # 같은 파일을 동시에 요청해도 한 번만 생성
+        with self._lock_for(cache_key):
+            path = self._files.get(cache_key)
+            if path is not None and os.path.exists(path):
+                return path
+            with self._locks_guard:
+                self._counter += 1
+                file_name = f"export-{self._counter}.{EXPORT_FORMATS[fmt].extension}"
+            path = os.path.join(self._directory, file_name)
+            partial_path = path + ".part"
+            try:
+                _WRITERS[fmt](loader(), partial_path)
+                os.replace(partial_path, path)
+            finally:
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+            evicted = self._files.put(cache_key, path)
+        with self._locks_guard:
+            self._locks.pop(cache_key, None)
+        if evicted is not None and os.path.exists(evicted[1]):
+            os.remove(evicted[1])
+        return path
+
+    def open(self, key: Hashable, loader: Callable[[], pd.DataFrame], fmt: str) -> BinaryIO:
+        """내보내기 파일을 바이너리 읽기 모드로 열기 (다운로드 버튼의 지연 생성용)"""
+        return open(self.export_path(key, loader, fmt), "rb")
+
+    def export_bytes(self, key: Hashable, loader: Callable[[], pd.DataFrame], fmt: str) -> bytes:
+        """내보내기 파일 내용 반환"""
+        with self.open(key, loader, fmt) as f:
+            return f.read()
+
+    def clear(self):
+        """캐시된 파일 모두 삭제"""
+        self._files.clear()
+        shutil.rmtree(self._directory, ignore_errors=True)
+        os.makedirs(self._directory, exist_ok=True)
+
+_manager: Optional[ExportManager] = None
+_manager_lock = threading.Lock()
+
+def get_export_manager() -> ExportManager:
+    """프로세스 전체에서 공유하는 내보내기 관리자"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ExportManager()
+    return _manager
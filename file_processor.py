@@ -1,68 +1,266 @@
 import pandas as pd
-import base64
-from typing import Tuple, Optional
+import numpy as np
+from typing import Dict, List, Tuple, Optional, NamedTuple
 from data_manager import DataFrameManager
+from cache_utils import LRUCache, content_hash
+from dataset_store import DataSource, get_dataset_store, load_frame
+from summary_engine import get_summary_engine
+from image_pipeline import ImageAttachment
+from telemetry import span
 import streamlit as st
 
-def encode_image(image_file):
-    """이미지 파일을 base64로 인코딩"""
-    return base64.b64encode(image_file.getvalue()).decode('utf-8')
+# 세션별로 보관할 파싱 결과 최대 개수
+INGESTION_CACHE_SIZE = 8
 
-def process_uploaded_file(uploaded_file) -> Tuple[str, Optional[pd.DataFrame]]:
-    """업로드된 파일을 처리하고 텍스트로 변환"""
+# 이 크기를 넘는 CSV는 청크 단위 스트리밍 방식으로 읽음
+CHUNKED_INGESTION_THRESHOLD_BYTES = 100 * 1024 * 1024
+CSV_CHUNK_ROWS = 200_000
+PREVIEW_ROWS = 5
+
+TABULAR_FILE_TYPES = {
+    "text/csv": "CSV",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "XLSX",
+}
+IMAGE_FILE_TYPES = {"image/jpeg", "image/png", "image/gif"}
+
+class IngestionEntry(NamedTuple):
+    """파싱이 완료된 업로드 파일 (캐시 항목) - 데이터는 매니저가 데이터셋 저장소를 통해 보관"""
+    info: str
+    manager: DataFrameManager
+
+class _RunningStats:
+    """청크 단위로 누적하는 숫자형 컬럼 통계 (개수, 평균, 분산, 최소, 최대)"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: pd.Series):
+        values = values.dropna()
+        n = len(values)
+        if n == 0:
+            return
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+        # 두 집단의 평균/분산 병합 (Chan et al.)
+        total = self.count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += chunk_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    @property
+    def std(self) -> float:
+        return (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else float("nan")
+
+def get_ingestion_cache() -> LRUCache:
+    """세션의 파일 파싱 캐시 반환 (파일 내용 해시 기준)"""
+    if "ingestion_cache" not in st.session_state:
+        st.session_state.ingestion_cache = LRUCache(max_entries=INGESTION_CACHE_SIZE)
+    return st.session_state.ingestion_cache
+
+def _file_size(uploaded_file) -> int:
+    size = getattr(uploaded_file, "size", None)
+    return size if size is not None else len(uploaded_file.getbuffer())
+
+def _file_hash(uploaded_file) -> str:
+    """파일 내용 해시 (대용량 파일도 복사 없이 계산, 같은 업로드는 재실행 시 다시 읽지 않음)"""
+    file_id = getattr(uploaded_file, "file_id", None)
+    hashes = st.session_state.setdefault("file_hashes", {})
+    if file_id is not None and file_id in hashes:
+        return hashes[file_id]
+    if hasattr(uploaded_file, "getbuffer"):
+        with uploaded_file.getbuffer() as buffer:
+            file_hash = content_hash(buffer)
+    else:
+        file_hash = content_hash(uploaded_file.getvalue())
+    if file_id is not None:
+        hashes[file_id] = file_hash
+    return file_hash
+
+def load_image_attachment(uploaded_file) -> Optional[ImageAttachment]:
+    """업로드된 이미지를 멀티모달 요청용 첨부로 변환 (이미지가 아니면 None)
+
+    내용 해시를 키로 사용하므로 같은 이미지는 재실행/재업로드해도 한 번만 축소·인코딩됩니다.
+    """
+    if uploaded_file.type not in IMAGE_FILE_TYPES:
+        return None
+    return ImageAttachment(uploaded_file.name, _file_hash(uploaded_file), uploaded_file.getvalue(), uploaded_file.type)
+
+def _store_dataframe(df: pd.DataFrame, file_name: str, store_key: str,
+                     total_rows: Optional[int] = None) -> DataFrameManager:
+    """DataFrame을 데이터셋 저장소에 기록하고 저장된 데이터를 사용하는 매니저 생성"""
+    return _create_manager(get_dataset_store().put(df, key=store_key), file_name, total_rows)
+
+def _create_manager(source: DataSource, file_name: str, total_rows: Optional[int] = None) -> DataFrameManager:
+    """저장된 데이터(또는 DataFrame)를 사용하는 매니저 생성"""
+    manager = DataFrameManager(source, file_name, total_rows=total_rows, lazy=True)
+    # 필터 조회용 컬럼 인덱스는 백그라운드에서 생성
+    manager.build_indexes()
+    return manager
+
+def _parse_csv_chunked(uploaded_file, store_key: str, max_rows: Optional[int] = None) -> IngestionEntry:
+    """대용량 CSV를 청크 단위로 읽으며 스키마, 통계, 미리보기를 점진적으로 계산
+
+    max_rows가 없으면 각 청크를 읽는 즉시 데이터셋 저장소 파일에 레코드 배치로 기록하므로
+    전체 데이터를 메모리에 모으지 않습니다 (청크 간 타입이 맞지 않으면 메모리에 모아 기존 방식으로 저장).
+    max_rows가 지정되면 전체 행 중 균등 무작위 표본만 메모리에 보관합니다.
+    """
+    total_size = max(_file_size(uploaded_file), 1)
+    uploaded_file.seek(0)
+    progress_bar = st.progress(0.0, text=f"📥 {uploaded_file.name} 읽는 중...")
+
+    rng = np.random.default_rng(0)
+    stats: Dict[str, _RunningStats] = {}
+    chunks: List[pd.DataFrame] = []
+    writer = get_dataset_store().writer(store_key) if max_rows is None else None
+    kept, kept_keys = None, None
+    head, tail = None, None
+    total_rows = 0
+    null_counts = None
+
+    for chunk in pd.read_csv(uploaded_file, chunksize=CSV_CHUNK_ROWS):
+        total_rows += len(chunk)
+        if head is None:
+            head = chunk.head(PREVIEW_ROWS)
+        tail = pd.concat([tail, chunk.tail(PREVIEW_ROWS)]).tail(PREVIEW_ROWS) if tail is not None else chunk.tail(PREVIEW_ROWS)
+        chunk_nulls = chunk.isnull().sum()
+        null_counts = chunk_nulls if null_counts is None else null_counts.add(chunk_nulls, fill_value=0)
+        for column in chunk.select_dtypes(include="number").columns:
+            stats.setdefault(column, _RunningStats()).update(chunk[column])
+
+        if writer is not None:
+            if not writer.write(chunk):
+                # 앞 청크와 스키마를 맞출 수 없으면 기록한 행을 읽어 와 메모리에 모음
+                written = writer.abort()
+                chunks = [written, chunk] if written is not None else [chunk]
+                writer = None
+        elif max_rows is None:
+            chunks.append(chunk)
+        else:
+            # 무작위 키가 가장 작은 max_rows개 행을 유지 → 전체 행에 대한 균등 표본
+            keys = rng.random(len(chunk))
+            kept = chunk if kept is None else pd.concat([kept, chunk])
+            kept_keys = keys if kept_keys is None else np.concatenate([kept_keys, keys])
+            if len(kept) > max_rows:
+                selected = np.argpartition(kept_keys, max_rows)[:max_rows]
+                kept, kept_keys = kept.take(selected), kept_keys[selected]
+
+        progress_bar.progress(min(uploaded_file.tell() / total_size, 1.0),
+                              text=f"📥 {uploaded_file.name} 읽는 중... ({total_rows:,}행)")
+
+    if writer is not None:
+        source = writer.finish()
+    else:
+        if max_rows is None:
+            df = pd.concat(chunks) if chunks else pd.DataFrame()
+        else:
+            df = kept.sort_index() if kept is not None else pd.DataFrame()
+        source = get_dataset_store().put(df, key=store_key)
+    progress_bar.empty()
+
+    sampled = len(source) < total_rows
+    info = _build_streamed_summary(uploaded_file.name, source, total_rows, head, tail, stats, null_counts, sampled)
+    return IngestionEntry(info, _create_manager(source, uploaded_file.name, total_rows=total_rows))
+
+def _build_streamed_summary(file_name: str, df: DataSource, total_rows: int,
+                            head: Optional[pd.DataFrame], tail: Optional[pd.DataFrame],
+                            stats: Dict[str, _RunningStats], null_counts: Optional[pd.Series],
+                            sampled: bool) -> str:
+    """청크 단위로 누적한 정보로 요약 텍스트 생성"""
+    info = f"CSV 파일 분석 결과 - {file_name}:\n"
+    info += f"- 행 수: {total_rows}\n"
+    if sampled:
+        info += f"- ⚠️ 샘플링됨: 전체 {total_rows:,}행 중 무작위 {len(df):,}행만 로드되었습니다. 데이터 조작 결과는 표본 기준입니다.\n"
+    info += f"- 열 수: {len(df.columns)}\n"
+    info += f"- 컬럼명: {', '.join(map(str, df.columns.tolist()))}\n"
+    info += f"- 데이터 타입:\n{df.dtypes.to_string()}\n\n"
+    if head is not None:
+        info += f"첫 5행 미리보기:\n{head.to_string()}\n\n"
+    if tail is not None and total_rows > PREVIEW_ROWS:
+        info += f"마지막 5행 미리보기:\n{tail.to_string()}\n\n"
+    if stats:
+        # 개수/평균/표준편차/최소/최대는 전체 행 기준, 사분위수는 로드된 행 기준
+        # 일부 청크에서만 숫자였던 컬럼(문자열이 섞인 컬럼)은 사분위수 없이 표시
+        numeric_columns = [column for column in stats if pd.api.types.is_numeric_dtype(df.dtypes[column])]
+        quantiles = load_frame(df, numeric_columns).quantile([0.25, 0.5, 0.75]) \
+            if len(df) and numeric_columns else None
+        rows = {}
+        for column, column_stats in stats.items():
+            has_quantiles = quantiles is not None and column in quantiles.columns
+            rows[column] = {
+                "count": column_stats.count,
+                "mean": column_stats.mean,
+                "std": column_stats.std,
+                "min": column_stats.min,
+                "25%": quantiles.at[0.25, column] if has_quantiles else float("nan"),
+                "50%": quantiles.at[0.5, column] if has_quantiles else float("nan"),
+                "75%": quantiles.at[0.75, column] if has_quantiles else float("nan"),
+                "max": column_stats.max,
+            }
+        describe_df = pd.DataFrame(rows)
+        label = "기술통계 (사분위수는 표본 기준)" if sampled else "기술통계"
+        info += f"{label}:\n{describe_df.to_string()}\n"
+    if null_counts is not None and null_counts.any():
+        info += f"\n결측값 수:\n{null_counts[null_counts > 0].astype(int).to_string()}"
+    return info
+
+def _parse_table_file(uploaded_file, file_kind: str, store_key: str,
+                      max_rows: Optional[int] = None) -> IngestionEntry:
+    """CSV/XLSX 파일을 읽어 요약과 매니저 생성 (데이터는 데이터셋 저장소에 기록)"""
+    if file_kind == "CSV":
+        if max_rows is not None or _file_size(uploaded_file) > CHUNKED_INGESTION_THRESHOLD_BYTES:
+            return _parse_csv_chunked(uploaded_file, store_key, max_rows)
+        df = pd.read_csv(uploaded_file)
+    else:
+        df = pd.read_excel(uploaded_file)
+    manager = _store_dataframe(df, uploaded_file.name, store_key)
+    info = get_summary_engine().summarize(manager, f"{file_kind} 파일 분석 결과 - {uploaded_file.name}")
+    return IngestionEntry(info, manager)
+
+def _register_dataframe(file_name: str, entry: IngestionEntry):
+    """파싱 결과를 세션에 등록 - 이미 등록된 매니저면 편집 내용을 유지하기 위해 건너뜀"""
+    if "df_managers" not in st.session_state:
+        st.session_state.df_managers = {}
+    if st.session_state.df_managers.get(file_name) is entry.manager:
+        return
+
+    # 세션에는 매니저만 보관 (데이터 자체는 저장소에서 필요할 때 로드)
+    st.session_state.df_managers[file_name] = entry.manager
+    st.session_state.current_file = file_name
+
+def process_uploaded_file(uploaded_file, max_rows: Optional[int] = None) -> Tuple[str, Optional[DataFrameManager]]:
+    """업로드된 파일을 처리하고 텍스트로 변환
+
+    max_rows: CSV에서 메모리에 로드할 최대 행 수 (초과 시 균등 표본, None이면 전체)
+    표 형식 파일이면 (요약 텍스트, DataFrameManager)를, 그 외에는 (텍스트, None)을 반환합니다.
+    """
     try:
         if uploaded_file.type == "text/plain":
             return uploaded_file.read().decode("utf-8"), None
-        elif uploaded_file.type == "text/csv":
-            df = pd.read_csv(uploaded_file)
-            # DataFrame을 세션에 저장
-            st.session_state.dataframes[uploaded_file.name] = df
-            st.session_state.current_df = df
-            
-            # DataFrameManager 인스턴스 생성
-            df_manager = DataFrameManager(df, uploaded_file.name)
-            if "df_managers" not in st.session_state:
-                st.session_state.df_managers = {}
-            st.session_state.df_managers[uploaded_file.name] = df_manager
-            
-            # DataFrame 기본 정보 제공
-            info = f"CSV 파일 분석 결과 - {uploaded_file.name}:\n"
-            info += f"- 행 수: {len(df)}\n"
-            info += f"- 열 수: {len(df.columns)}\n"
-            info += f"- 컬럼명: {', '.join(df.columns.tolist())}\n"
-            info += f"- 데이터 타입:\n{df.dtypes.to_string()}\n\n"
-            info += f"첫 5행 미리보기:\n{df.head().to_string()}\n\n"
-            if len(df) > 5:
-                info += f"마지막 5행 미리보기:\n{df.tail().to_string()}\n\n"
-            info += f"기술통계:\n{df.describe().to_string()}"
-            return info, df
-        elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet":
-            # XLSX 파일 처리
-            df = pd.read_excel(uploaded_file)
-            # DataFrame을 세션에 저장
-            st.session_state.dataframes[uploaded_file.name] = df
-            st.session_state.current_df = df
-            
-            # DataFrameManager 인스턴스 생성
-            df_manager = DataFrameManager(df, uploaded_file.name)
-            if "df_managers" not in st.session_state:
-                st.session_state.df_managers = {}
-            st.session_state.df_managers[uploaded_file.name] = df_manager
-            
-            # DataFrame 기본 정보 제공
-            info = f"XLSX 파일 분석 결과 - {uploaded_file.name}:\n"
-            info += f"- 행 수: {len(df)}\n"
-            info += f"- 열 수: {len(df.columns)}\n"
-            info += f"- 컬럼명: {', '.join(df.columns.tolist())}\n"
-            info += f"- 데이터 타입:\n{df.dtypes.to_string()}\n\n"
-            info += f"첫 5행 미리보기:\n{df.head().to_string()}\n\n"
-            if len(df) > 5:
-                info += f"마지막 5행 미리보기:\n{df.tail().to_string()}\n\n"
-            info += f"기술통계:\n{df.describe().to_string()}"
-            return info, df
-        elif uploaded_file.type in ["image/jpeg", "image/png", "image/gif"]:
+        elif uploaded_file.type in TABULAR_FILE_TYPES:
+            # 내용이 같은 파일은 다시 파싱하지 않고 캐시된 결과 사용
+            cache = get_ingestion_cache()
+            file_hash = _file_hash(uploaded_file)
+            file_key = (file_hash, max_rows)
+            entry = cache.get(file_key)
+            if entry is None:
+                store_key = file_hash if max_rows is None else f"{file_hash}-{max_rows}"
+                with span("file_parse", file=uploaded_file.name, size=_file_size(uploaded_file)) as attrs:
+                    entry = _parse_table_file(uploaded_file, TABULAR_FILE_TYPES[uploaded_file.type], store_key, max_rows)
+                    attrs.update(rows=entry.manager.row_count, columns=len(entry.manager.columns))
+                cache.put(file_key, entry)
+
+            _register_dataframe(uploaded_file.name, entry)
+            return entry.info, entry.manager
+        elif uploaded_file.type in IMAGE_FILE_TYPES:
             return f"이미지 파일이 업로드되었습니다: {uploaded_file.name}", None
         else:
             return f"지원되지 않는 파일 형식입니다: {uploaded_file.type}", None
     except Exception as e:
-        return f"파일 처리 중 오류가 발생했습니다: {str(e)}", None 
\ No newline at end of file
+        return f"파일 처리 중 오류가 발생했습니다: {str(e)}", None
\ No newline at end of file
@@ -0,0 +1,165 @@
+import base64
+import io
+import math
+import threading
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from cache_utils import LRUCache
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow가 없으면 지원 형식의 원본을 그대로 전송
+    Image = None
+
+# 긴 변 기본 상한 (모델 정보의 image_max_side로 모델별 조정)
+DEFAULT_IMAGE_MAX_SIDE = 2048
+# 고해상도(detail=high) 처리 시 짧은 변이 이 크기로 축소되므로 그 이상은 전송할 필요 없음
+IMAGE_SHORT_SIDE_MAX = 768
+JPEG_QUALITY = 85
+IMAGE_CACHE_SIZE = 64
+IMAGE_DETAIL = "auto"
+# 이미지 입력 토큰 추정 (detail=low는 고정, high/auto는 2048 정사각형·짧은 변 768에 맞춘 뒤 512px 타일 수 기준)
+IMAGE_LOW_DETAIL_TOKENS = 85
+IMAGE_TILE_TOKENS = 170
+IMAGE_TILE_SIZE = 512
+IMAGE_FIT_SIDE = 2048
+# 크기를 모르는 data URL은 앞부분만 디코딩해 헤더에서 크기를 읽음 (JPEG의 SOF가 들어갈 만큼)
+IMAGE_HEADER_BASE64_CHARS = 65536
+
+_MIME_BY_FORMAT = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp", "GIF": "image/gif"}
+
+class ImageAttachment(NamedTuple):
+    """업로드된 이미지 (원본 바이트와 내용 해시)"""
+    name: str
+    key: str        # 내용 해시 (인코딩 캐시 키)
+    data: bytes
+    mime: str
+
+class EncodedImage(NamedTuple):
+    """API로 보낼 이미지 (data URL)"""
+    data_url: str
+    width: int
+    height: int
+    size_bytes: int
+
+def target_size(width: int, height: int, max_side: int) -> Tuple[int, int]:
+    """긴 변은 max_side, 짧은 변은 IMAGE_SHORT_SIDE_MAX를 넘지 않도록 비율을 유지해 축소한 크기"""
+    scale = min(1.0, max_side / max(width, height), IMAGE_SHORT_SIDE_MAX / min(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def _has_alpha(image) -> bool:
+    return image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+
+def _data_url(data: bytes, mime: str) -> str:
+    return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+
+def encode_image(attachment: ImageAttachment, max_side: int = DEFAULT_IMAGE_MAX_SIDE) -> EncodedImage:
+    """Pillow로 디코딩 → 목표 해상도로 축소 → 재압축(불투명: JPEG, 투명: PNG)한 data URL
+
+    재압축한 결과가 원본보다 크고 원본이 이미 목표 크기 이하이면 원본을 그대로 사용합니다.
+    """
+    if Image is None:
+        return EncodedImage(_data_url(attachment.data, attachment.mime), 0, 0, len(attachment.data))
+
+    image = Image.open(io.BytesIO(attachment.data))
+    original_format = image.format
+    original_size = image.size
+    width, height = target_size(*original_size, max_side)
+    if image.format == "JPEG":
+        # JPEG는 디코딩 단계에서 바로 축소 (큰 사진의 디코딩 시간/메모리 절약)
+        image.draft("RGB", (width, height))
+    image = ImageOps.exif_transpose(image)  # 회전 정보 반영 (애니메이션 GIF는 첫 프레임)
+    width, height = target_size(*image.size, max_side)
+    if image.size != (width, height):
+        image = image.resize((width, height), Image.LANCZOS)
+
+    output = io.BytesIO()
+    if _has_alpha(image):
+        image.convert("RGBA").save(output, format="PNG", optimize=True)
+        mime = "image/png"
+    else:
+        image.convert("RGB").save(output, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+        mime = "image/jpeg"
+    data = output.getvalue()
+
+    unchanged = target_size(*original_size, max_side) == original_size
+    if unchanged and original_format in _MIME_BY_FORMAT and len(attachment.data) <= len(data):
+        data, mime = attachment.data, _MIME_BY_FORMAT[original_format]
+    return EncodedImage(_data_url(data, mime), width, height, len(data))
+
+class ImageCache:
+    """(이미지 내용 해시, 목표 크기)별 인코딩 결과 캐시 - 같은 이미지는 한 번만 디코딩/압축"""
+
+    def __init__(self, max_entries: int = IMAGE_CACHE_SIZE):
+        self._entries = LRUCache(max_entries=max_entries)
+
+    def get(self, attachment: ImageAttachment, max_side: int = DEFAULT_IMAGE_MAX_SIDE) -> EncodedImage:
+        key = (attachment.key, max_side)
+        encoded = self._entries.get(key)
+        if encoded is None:
+            encoded = encode_image(attachment, max_side)
+            self._entries.put(key, encoded)
+        return encoded
+
+_cache: Optional[ImageCache] = None
+_cache_lock = threading.Lock()
+
+def get_image_cache() -> ImageCache:
+    """프로세스 전체에서 공유하는 이미지 인코딩 캐시"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ImageCache()
+    return _cache
+
+# data URL별 이미지 크기 (인코딩할 때 기록하고, 없으면 헤더에서 읽음)
+_sizes = LRUCache(max_entries=IMAGE_CACHE_SIZE)
+
+def image_parts(attachments, model_info: Dict[str, Any]) -> list:
+    """모델 목표 해상도로 인코딩한 이미지 메시지 조각 목록 (Chat Completions image_url 형식)"""
+    max_side = model_info.get("image_max_side", DEFAULT_IMAGE_MAX_SIDE)
+    cache = get_image_cache()
+    parts = []
+    for attachment in attachments:
+        encoded = cache.get(attachment, max_side)
+        if encoded.width and encoded.height:
+            _sizes.put(encoded.data_url, (encoded.width, encoded.height))
+        parts.append({"type": "image_url", "image_url": {"url": encoded.data_url, "detail": IMAGE_DETAIL}})
+    return parts
+
+def image_tokens(width: int, height: int, detail: str = IMAGE_DETAIL) -> int:
+    """이미지 하나의 입력 토큰 추정 (크기를 모르면 보낼 수 있는 최대 크기로 가정)"""
+    if detail == "low":
+        return IMAGE_LOW_DETAIL_TOKENS
+    if width <= 0 or height <= 0:
+        width, height = DEFAULT_IMAGE_MAX_SIDE, IMAGE_SHORT_SIDE_MAX
+    scale = min(1.0, IMAGE_FIT_SIDE / max(width, height))
+    scale *= min(1.0, IMAGE_SHORT_SIDE_MAX / (min(width, height) * scale))
+    tiles = math.ceil(width * scale / IMAGE_TILE_SIZE) * math.ceil(height * scale / IMAGE_TILE_SIZE)
+    return IMAGE_LOW_DETAIL_TOKENS + IMAGE_TILE_TOKENS * tiles
+
+def _data_url_size(url: str) -> Tuple[int, int]:
+    """data URL 이미지의 크기 (읽을 수 없으면 (0, 0))"""
+    if Image is None or not url.startswith("data:"):
+        return 0, 0
+    start = url.find(",") + 1
+    chunk = url[start:start + IMAGE_HEADER_BASE64_CHARS]
+    try:
+        with Image.open(io.BytesIO(base64.b64decode(chunk[:len(chunk) // 4 * 4]))) as image:
+            return image.size
+    except (OSError, ValueError):
+        return 0, 0
+
+def image_part_tokens(part: Dict[str, Any]) -> int:
+    """image_url 메시지 조각의 입력 토큰 추정"""
+    image_url = part.get("image_url") or {}
+    url = image_url.get("url", "")
+    detail = image_url.get("detail", IMAGE_DETAIL)
+    if detail == "low":
+        return IMAGE_LOW_DETAIL_TOKENS
+    size = _sizes.get(url)
+    if size is None:
+        size = _data_url_size(url)
+        _sizes.put(url, size)
+    return image_tokens(*size, detail)
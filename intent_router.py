@@ -0,0 +1,226 @@
+import re
+from collections import deque
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from cache_utils import LRUCache
+
+# 스키마(컬럼 구성)별로 보관할 라우터 최대 개수
+ROUTER_CACHE_SIZE = 32
+
+# 의도별 키워드 (한국어/영어, 소문자 기준)
+KEYWORD_GROUPS: Dict[str, List[str]] = {
+    "undo": ['되돌리', '되돌려', '실행 취소', 'undo'],
+    "redo": ['다시 실행', 'redo'],
+    "guide": ['할 수 있는', '가능한', '작업', '명령어', '기능'],
+    "ai": ['ai', '인공지능', '머신러닝', 'machine learning', 'data scientist', 'ml', 'artificial intelligence'],
+    "delete": ['삭제', 'delete', '제거', '빼'],
+    "sort": ['정렬', 'sort', '순서'],
+    "ascending": ['오름차순', 'asc', '낮은', '작은'],
+    "descending": ['내림차순', 'desc', '높은', '큰'],
+    "reset": ['원본', '복원', '초기화', 'reset'],
+}
+
+# 미리 컴파일된 패턴
+TOP_PATTERN = re.compile(r'(?:상위|top)\s*(\d+)')
+BOTTOM_PATTERN = re.compile(r'(?:하위|bottom)\s*(\d+)')
+NUMBER_PATTERN = re.compile(r'(\d+)\s*(이상|이하|초과|미만|>=|<=|>|<)')
+ROW_DELETE_PATTERN = re.compile(r'(\d+)(?:번째|행|줄).*?삭제')
+FILTER_TRIGGER_PATTERN = re.compile(r'(?:포함|관련|해당).*?([가-힣a-z0-9\s]+)')
+CONDITION_PATTERN = re.compile(r'[가-힣a-z0-9\s]+')
+STOP_WORDS_PATTERN = re.compile('에서|의|을|를|이|가|으로|에|만|데이터|컬럼|값')
+
+NUMBER_OPERATORS = {
+    '이상': 'ge', '>=': 'ge',
+    '이하': 'le', '<=': 'le',
+    '초과': 'gt', '>': 'gt',
+    '미만': 'lt', '<': 'lt',
+}
+
+
+class AhoCorasick:
+    """여러 키워드를 입력 문자열 한 번의 순회로 찾는 Aho-Corasick 오토마톤"""
+
+    def __init__(self, patterns: Iterable[Tuple[str, Hashable]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, Hashable]]] = [[]]
+
+        for pattern, payload in patterns:
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append((len(pattern), payload))
+
+        # BFS로 실패 링크 구성
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, Hashable]]:
+        """text에서 일치하는 모든 (시작, 끝, payload) 반환"""
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, payload in self._output[state]:
+                matches.append((position + 1 - length, position + 1, payload))
+        return matches
+
+
+class Intent(NamedTuple):
+    """라우팅 결과 - 수행할 작업 이름과 인자"""
+    name: str
+    params: dict
+
+
+class IntentRouter:
+    """데이터셋 스키마별로 한 번 생성되어 사용자 요청을 데이터 조작 의도로 변환하는 라우터"""
+
+    def __init__(self, columns: Sequence[str]):
+        self.columns = list(columns)
+        patterns = [(keyword, ("keyword", (group, keyword)))
+                    for group, keywords in KEYWORD_GROUPS.items() for keyword in keywords]
+        patterns += [(str(column).lower(), ("column", position))
+                     for position, column in enumerate(self.columns)]
+        self._automaton = AhoCorasick(patterns)
+
+    def _scan(self, text: str) -> Tuple[Dict[str, set], Dict[int, Tuple[int, int]]]:
+        """키워드 그룹별 일치 키워드와 컬럼별 첫 일치 구간을 한 번에 수집"""
+        keyword_hits: Dict[str, set] = {}
+        column_hits: Dict[int, Tuple[int, int]] = {}
+        for start, end, (kind, value) in self._automaton.find_all(text):
+            if kind == "keyword":
+                group, keyword = value
+                keyword_hits.setdefault(group, set()).add(keyword)
+            elif value not in column_hits or start < column_hits[value][0]:
+                column_hits[value] = (start, end)
+        return keyword_hits, column_hits
+
+    def route(self, user_input: str) -> List[Intent]:
+        """사용자 요청을 우선순위 순서의 의도 후보 목록으로 변환"""
+        text = user_input.lower()
+        keyword_hits, column_hits = self._scan(text)
+
+        # 더 긴 컬럼명을 우선 (예: 'first_name'이 'name'보다 먼저), 같으면 컬럼 순서
+        matched_columns = sorted(column_hits, key=lambda position: (
+            -(column_hits[position][1] - column_hits[position][0]), position))
+
+        intents: List[Intent] = []
+        if "undo" in keyword_hits:
+            intents.append(Intent("undo", {}))
+        if "redo" in keyword_hits:
+            intents.append(Intent("redo", {}))
+        if "guide" in keyword_hits:
+            intents.append(Intent("guide", {}))
+
+        # 컬럼 기준 상위/하위 (예: "salary 기준 상위 10") - 컬럼명이 상위/하위보다 앞에 있어야 함
+        top_match = TOP_PATTERN.search(text)
+        if top_match:
+            column = self._column_before(matched_columns, column_hits, top_match.start())
+            if column is not None:
+                intents.append(Intent("top_by_column", {"column": column, "k": int(top_match.group(1))}))
+            intents.append(Intent("top", {"k": int(top_match.group(1))}))
+
+        bottom_match = BOTTOM_PATTERN.search(text)
+        if bottom_match:
+            column = self._column_before(matched_columns, column_hits, bottom_match.start())
+            if column is not None:
+                intents.append(Intent("bottom_by_column", {"column": column, "k": int(bottom_match.group(1))}))
+            intents.append(Intent("bottom", {"k": int(bottom_match.group(1))}))
+
+        # 숫자 범위 필터링 (예: "salary 100000 이상")
+        number_match = NUMBER_PATTERN.search(user_input)
+        if number_match:
+            operator = NUMBER_OPERATORS[number_match.group(2)]
+            for position in matched_columns:
+                intents.append(Intent("numeric_filter", {
+                    "column": self.columns[position],
+                    "value": float(number_match.group(1)),
+                    "operator": operator,
+                }))
+
+        # 컬럼 필터링 (키워드 또는 조건 추출)
+        ai_hits = keyword_hits.get("ai", set())
+        ai_keywords = [keyword for keyword in KEYWORD_GROUPS["ai"] if keyword in ai_hits]
+        for position in matched_columns:
+            column = self.columns[position]
+            for keyword in ai_keywords:
+                intents.append(Intent("filter", {"column": column, "condition": keyword, "label": "관련 데이터를"}))
+            for condition in self._extract_conditions(text, *column_hits[position]):
+                intents.append(Intent("filter", {"column": column, "condition": condition, "label": "조건으로"}))
+
+        if "delete" in keyword_hits and matched_columns:
+            intents.append(Intent("drop_column", {"column": self.columns[matched_columns[0]]}))
+
+        row_delete_match = ROW_DELETE_PATTERN.search(user_input)
+        if row_delete_match:
+            intents.append(Intent("drop_row", {"row_number": int(row_delete_match.group(1))}))
+
+        if "sort" in keyword_hits and matched_columns:
+            ascending = "ascending" in keyword_hits or "descending" not in keyword_hits
+            intents.append(Intent("sort", {"column": self.columns[matched_columns[0]], "ascending": ascending}))
+
+        if "reset" in keyword_hits:
+            intents.append(Intent("reset", {}))
+
+        return intents
+
+    def _column_before(self, matched_columns: List[int], column_hits: Dict[int, Tuple[int, int]],
+                       position: int) -> Optional[str]:
+        """position 앞에 나온 컬럼 중 우선순위가 가장 높은 컬럼"""
+        for column_position in matched_columns:
+            if column_hits[column_position][1] <= position:
+                return self.columns[column_position]
+        return None
+
+    @staticmethod
+    def _extract_conditions(text: str, start: int, end: int) -> List[str]:
+        """컬럼명 주변에서 필터 조건 후보 추출 ("포함", "관련" 뒤 → 앞부분 → 뒷부분 순)"""
+        candidates = []
+        trigger_match = FILTER_TRIGGER_PATTERN.search(text, end)
+        if trigger_match:
+            candidates.append(trigger_match.group(1))
+        before_match = CONDITION_PATTERN.search(text, 0, start)
+        if before_match:
+            candidates.append(before_match.group(0))
+        after_match = CONDITION_PATTERN.search(text, end)
+        if after_match:
+            candidates.append(after_match.group(0))
+
+        conditions = []
+        for candidate in candidates:
+            # 불용어 제거
+            condition = STOP_WORDS_PATTERN.sub('', candidate.strip()).strip()
+            if condition and len(condition) > 1 and condition not in conditions:
+                conditions.append(condition)
+        return conditions
+
+
+_router_cache = LRUCache(max_entries=ROUTER_CACHE_SIZE)
+
+
+def get_router(columns: Sequence[str]) -> IntentRouter:
+    """컬럼 구성에 맞는 라우터 반환 (스키마별로 한 번만 생성)"""
+    key = tuple(columns)
+    router = _router_cache.get(key)
+    if router is None:
+        router = IntentRouter(key)
+        _router_cache.put(key, router)
+    return router
@@ -0,0 +1,118 @@
+import os
+import time
+import uuid
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from openai import AsyncOpenAI
+
+from openai_client import create_async_openai_client
+
+# 완료된 작업 결과를 보관하는 시간 (초) - 이 시간이 지나면 정리
+JOB_RESULT_TTL_SECONDS = float(os.environ.get("JOB_RESULT_TTL_SECONDS", "3600"))
+# UI가 작업 상태를 확인하는 간격 (초)
+JOB_POLL_SECONDS = 1.0
+
+class Job:
+    """백그라운드 작업 - 상태 확인, 결과 조회, 취소"""
+
+    def __init__(self, job_id: str, description: str = ""):
+        self.job_id = job_id
+        self.description = description
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._future: Optional[Future] = None
+
+    @property
+    def status(self) -> str:
+        """작업 상태 (running, done, error, cancelled)"""
+        if not self._future.done():
+            return "running"
+        if self._future.cancelled():
+            return "cancelled"
+        return "error" if self._future.exception() is not None else "done"
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.time()) - self.created_at
+
+    def result(self) -> Any:
+        """작업 결과 (실패 시 예외, 취소 시 CancelledError) - 완료 전에는 기다리지 않고 None"""
+        if not self._future.done():
+            return None
+        return self._future.result()
+
+    def error(self) -> Optional[BaseException]:
+        if not self._future.done() or self._future.cancelled():
+            return None
+        return self._future.exception()
+
+class JobManager:
+    """전용 이벤트 루프 스레드에서 비동기 작업(LLM 호출 등)을 실행하는 관리자
+
+    - 제출하면 바로 작업 ID를 돌려주므로 Streamlit 스크립트 스레드가 응답을 기다리며 묶이지 않음
+    - 작업은 프로세스 전체에서 관리되어 페이지 재실행(rerun) 후에도 같은 ID로 결과를 조회
+    - 취소하면 진행 중인 비동기 HTTP 요청까지 함께 중단
+    """
+
+    def __init__(self, result_ttl: float = JOB_RESULT_TTL_SECONDS):
+        self.result_ttl = result_ttl
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._clients: Dict[str, AsyncOpenAI] = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True, name="job-manager")
+        self._thread.start()
+
+    def openai_client(self, api_key: str) -> AsyncOpenAI:
+        """이 관리자의 이벤트 루프에서 사용할 비동기 클라이언트 (API 키별로 하나, 작업 안에서만 호출)"""
+        client = self._clients.get(api_key)
+        if client is None:
+            client = self._clients[api_key] = create_async_openai_client(api_key)
+        return client
+
+    def submit(self, coroutine_function: Callable[[], Awaitable[Any]], description: str = "") -> str:
+        """비동기 함수를 백그라운드에서 실행하고 작업 ID 반환"""
+        self._prune()
+        job = Job(uuid.uuid4().hex, description)
+        job._future = asyncio.run_coroutine_threadsafe(coroutine_function(), self._loop)
+        job._future.add_done_callback(lambda _: setattr(job, "finished_at", time.time()))
+        with self._lock:
+            self._jobs[job.job_id] = job
+        return job.job_id
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        """작업 조회 (없거나 정리된 작업이면 None)"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: Optional[str]) -> bool:
+        """작업 취소 - 실행 중이던 작업을 취소했으면 True"""
+        job = self.get(job_id)
+        return job is not None and job._future.cancel()
+
+    def _prune(self):
+        """보관 시간이 지난 완료 작업 정리"""
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and now - job.finished_at > self.result_ttl]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+def get_job_manager() -> JobManager:
+    """프로세스 전체에서 공유하는 백그라운드 작업 관리자"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = JobManager()
+    return _manager
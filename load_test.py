@@ -0,0 +1,295 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# 부하 테스트 데이터가 실제 데이터셋 저장소/추적 기록을 채우지 않도록 설정 (모듈 import 전에)
+os.environ.setdefault("DATASET_STORE_DIR", tempfile.mkdtemp(prefix="chatbot-load-store-"))
+os.environ.setdefault("TELEMETRY_DIR", "")
+
+import numpy as np
+
+import openai_client
+from ai_handler import AIHandler
+from benchmark import ROUTING_PROMPTS, collect_metadata, make_dataset, reset_peak_rss, rss_mb
+from context_builder import count_tokens
+from data_manager import DataFrameManager, process_data_request
+from job_manager import get_job_manager
+from model_registry import get_registry
+from response_cache import ResponseCache
+from summary_engine import get_summary_engine
+from telemetry import start_trace
+
+DEFAULT_SESSIONS = 10
+DEFAULT_TURNS = 6
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_OUTPUT_DIR = os.path.join(".cache", "load_tests")
+# 추론 모델(백그라운드 작업) 완료 확인 간격 - 앱의 JOB_POLL_SECONDS보다 짧게 해서 측정 오차를 줄임
+JOB_POLL_INTERVAL_SECONDS = 0.05
+MOCK_START_TIMEOUT_SECONDS = 30
+PERCENTILES = (50, 90, 95, 99)
+
+CHAT_PROMPTS = [
+    "급여 평균과 지역별 분포를 알려줘",
+    "이 데이터에서 눈에 띄는 점을 요약해줘",
+    "부서별로 어떤 분석을 해 보면 좋을까?",
+    "입사일과 급여 사이에 관계가 있을까?",
+    "결측값은 어떻게 처리하는 게 좋을까?",
+]
+# 세션마다 이 주기로 데이터 조작 요청을 섞음 (예: 3이면 세 번째 턴마다)
+DATA_TURN_EVERY = 3
+
+class ChatSession:
+    """한 사용자의 대화 세션 - mychatbot.py의 턴 처리(데이터 조작 → AI 응답)를 UI 없이 재현"""
+
+    def __init__(self, index: int, handler: AIHandler, model: str, manager: Optional[DataFrameManager],
+                 uploaded_files: List[str], use_cache: bool):
+        self.session_id = f"load-{index}"
+        self.index = index
+        self.handler = handler
+        self.model = model
+        self.manager = manager
+        self.uploaded_files = uploaded_files
+        self.use_cache = use_cache
+        self.messages: List[Dict[str, Any]] = []
+        # 앱의 세션 상태처럼 최신 데이터 컨텍스트를 대화 기록과 따로 보관
+        self.context_state: Dict[str, Any] = {}
+        self.streaming = get_registry().supports_streaming(model)
+
+    def prompt(self, turn: int) -> str:
+        if self.manager is not None and turn % DATA_TURN_EVERY == DATA_TURN_EVERY - 1:
+            return ROUTING_PROMPTS[(self.index + turn) % len(ROUTING_PROMPTS)]
+        return CHAT_PROMPTS[(self.index + turn) % len(CHAT_PROMPTS)]
+
+    def run_turn(self, turn: int) -> Dict[str, Any]:
+        prompt = self.prompt(turn)
+        self.messages.append({"role": "user", "content": prompt})
+        result: Dict[str, Any] = {"session": self.session_id, "turn": turn, "kind": "chat", "error": None}
+        start = time.perf_counter()
+        with start_trace("turn", session=self.session_id, model=self.model) as trace:
+            data_result, result_df = (None, None)
+            if self.manager is not None:
+                data_result, result_df = process_data_request(prompt, self.manager)
+            if data_result and result_df is not None:
+                result["kind"] = "data"
+                response = data_result
+            else:
+                try:
+                    response = self._ai_response()
+                except Exception as e:
+                    result["error"] = str(e)
+                    response = f"응답 생성 중 오류가 발생했습니다: {e}"
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        if result["kind"] == "chat" and result["error"] is None:
+            if self.streaming:
+                for item in trace.spans:
+                    if "ttft_ms" in item:
+                        result["ttft_ms"] = item["ttft_ms"]
+                        result["completion_tokens"] = item.get("completion_tokens")
+            else:
+                # 비스트리밍 응답의 토큰 사용량은 백그라운드 추적에 기록되므로 여기서는 응답 텍스트로 계산
+                result["completion_tokens"] = count_tokens(response, self.model)
+        self.messages.append({"role": "assistant", "content": response})
+        return result
+
+    def _ai_response(self) -> str:
+        kwargs = dict(model_name=self.model, temperature=0.7, uploaded_files=self.uploaded_files,
+                      use_cache=self.use_cache, df_manager=self.manager, context_state=self.context_state)
+        if not self.streaming:
+            # 앱과 같이 백그라운드 작업으로 제출하고 완료될 때까지 확인
+            jobs = get_job_manager()
+            job_id = self.handler.submit_ai_response(self.messages, **kwargs)
+            job = jobs.get(job_id)
+            while not job.done():
+                time.sleep(JOB_POLL_INTERVAL_SECONDS)
+            if job.error() is not None:
+                raise job.error()
+            return job.result()
+
+        response = self.handler.get_ai_response(self.messages, **kwargs)
+        if isinstance(response, str):
+            raise RuntimeError(response)
+        parts = []
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content is not None:
+                parts.append(chunk.choices[0].delta.content)
+        return "".join(parts)
+
+# ---------- 모의 서버 ----------
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def spawn_mock_server(args: argparse.Namespace) -> subprocess.Popen:
+    """모의 서버를 별도 프로세스로 시작 (부하 드라이버와 GIL을 나눠 쓰지 않도록) 후 OPENAI_BASE_URL 설정"""
+    port = _free_port()
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_openai.py"),
+               "--port", str(port), "--ttft-ms", str(args.ttft_ms), "--tokens-per-second", str(args.tokens_per_second),
+               "--jitter", str(args.jitter), "--error-rate", str(args.error_rate)]
+    if args.recordings:
+        command += ["--recordings", args.recordings]
+    if args.recorded_timing:
+        command.append("--recorded-timing")
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + MOCK_START_TIMEOUT_SECONDS
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                raise RuntimeError("모의 서버를 시작하지 못했습니다.")
+            time.sleep(0.05)
+    openai_client.BASE_URL = f"http://127.0.0.1:{port}/v1"
+    return process
+
+# ---------- 실행/집계 ----------
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {**{f"p{p}": None for p in PERCENTILES}, "max": None, "mean": None}
+    array = np.asarray(values, dtype=float)
+    summary = {f"p{p}": round(float(np.percentile(array, p)), 2) for p in PERCENTILES}
+    return {**summary, "max": round(float(array.max()), 2), "mean": round(float(array.mean()), 2)}
+
+def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    """세션 N개를 동시에 실행 (Streamlit처럼 세션마다 스크립트 스레드 하나) 후 처리량/지연/메모리 집계"""
+    baseline_rss = rss_mb("VmRSS")
+    # 캐시를 쓰면 실제 캐시 파일 대신 임시 경로 사용 (실행마다 빈 캐시에서 시작)
+    response_cache = ResponseCache(os.path.join(tempfile.mkdtemp(prefix="chatbot-load-cache-"), "responses.sqlite3")) \
+        if args.cache else None
+    handler = AIHandler("mock-key", response_cache=response_cache)
+
+    print(f"세션 {args.sessions}개 준비 중...", flush=True)
+    sessions = []
+    for index in range(args.sessions):
+        manager, uploaded_files = None, []
+        if args.rows:
+            manager = DataFrameManager(make_dataset(args.rows, args.columns, seed=index), name=f"load_{index}.csv")
+            uploaded_files = [get_summary_engine().summarize(manager, f"CSV 파일 분석 결과 - load_{index}.csv")]
+        sessions.append(ChatSession(index, handler, args.model, manager, uploaded_files, args.cache))
+    setup_rss = rss_mb("VmRSS")
+
+    results: List[Dict[str, Any]] = []
+    results_lock = threading.Lock()
+
+    def run_session(session: ChatSession):
+        # 세션 시작을 ramp-up 구간에 고르게 분산
+        time.sleep(args.ramp_up * session.index / max(args.sessions, 1))
+        for turn in range(args.turns):
+            result = session.run_turn(turn)
+            with results_lock:
+                results.append(result)
+            if args.think_ms:
+                time.sleep(args.think_ms / 1000)
+
+    print(f"실행 중 (턴 {args.turns}회 × 세션 {args.sessions}개)...", flush=True)
+    tracked = reset_peak_rss()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions, thread_name_prefix="session") as executor:
+        list(executor.map(run_session, sessions))
+    wall_seconds = time.perf_counter() - start
+    peak_rss = rss_mb("VmHWM") if tracked else rss_mb("VmRSS")
+
+    for session in sessions:
+        if session.manager is not None:
+            session.manager.release()
+
+    ok = [item for item in results if item["error"] is None]
+    chat = [item for item in ok if item["kind"] == "chat"]
+    completion_tokens = sum(item.get("completion_tokens") or 0 for item in chat)
+    memory = None
+    if baseline_rss is not None and peak_rss is not None:
+        memory = {
+            "baseline_mb": round(baseline_rss, 1),
+            "after_setup_mb": round(setup_rss, 1),
+            "peak_mb": round(peak_rss, 1),
+            "per_session_mb": round((peak_rss - baseline_rss) / max(args.sessions, 1), 2),
+        }
+    return {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output",)},
+        "wall_seconds": round(wall_seconds, 3),
+        "turns": len(results),
+        "errors": len(results) - len(ok),
+        "turns_per_second": round(len(ok) / wall_seconds, 2) if wall_seconds else None,
+        "completion_tokens_per_second": round(completion_tokens / wall_seconds, 1) if wall_seconds else None,
+        "latency_ms": _percentiles([item["latency_ms"] for item in ok]),
+        "chat_latency_ms": _percentiles([item["latency_ms"] for item in chat]),
+        "data_latency_ms": _percentiles([item["latency_ms"] for item in ok if item["kind"] == "data"]),
+        "ttft_ms": _percentiles([item["ttft_ms"] for item in chat if "ttft_ms" in item]),
+        "memory": memory,
+        "results": results,
+    }
+
+def _print_summary(report: Dict[str, Any]):
+    print(f"\n완료: {report['turns']}턴, 오류 {report['errors']}건, {report['wall_seconds']:.1f}초")
+    print(f"  처리량          {report['turns_per_second']} 턴/초, 응답 토큰 {report['completion_tokens_per_second']}/초")
+    for label, key in (("전체 지연", "latency_ms"), ("AI 응답 지연", "chat_latency_ms"),
+                       ("데이터 조작 지연", "data_latency_ms"), ("첫 토큰 시간", "ttft_ms")):
+        stats = report[key]
+        if stats["p50"] is None:
+            continue
+        print(f"  {label:<14} p50 {stats['p50']:9.1f}ms  p95 {stats['p95']:9.1f}ms  "
+              f"p99 {stats['p99']:9.1f}ms  max {stats['max']:9.1f}ms")
+    if report["memory"]:
+        memory = report["memory"]
+        print(f"  메모리          기준 {memory['baseline_mb']}MB → 최대 {memory['peak_mb']}MB "
+              f"(세션당 {memory['per_session_mb']}MB)")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="모의 OpenAI 서버로 동시 대화 세션을 실행해 처리량, 지연 분포, 세션당 메모리 측정 (네트워크 불필요)")
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS, help="동시 세션 수")
+    parser.add_argument("--turns", type=int, default=DEFAULT_TURNS, help="세션당 대화 턴 수")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="요청할 모델 (비스트리밍 모델은 백그라운드 작업 경로)")
+    parser.add_argument("--rows", type=int, default=10_000, help="세션마다 올릴 데이터 행 수 (0이면 데이터 없이 대화만)")
+    parser.add_argument("--columns", type=int, default=20, help="세션 데이터 컬럼 수")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="세션 시작을 분산할 시간 (초)")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="턴 사이 대기 시간 (ms)")
+    parser.add_argument("--cache", action="store_true", help="응답 캐시 사용 (임시 캐시, 기본은 매 턴 서버로 요청)")
+    parser.add_argument("--base-url", help="이미 실행 중인 모의 서버 주소 (지정하지 않으면 새로 시작)")
+    parser.add_argument("--recordings", help="모의 서버가 재생할 응답 기록 JSONL (기본: 기록 없이 기본 응답)")
+    parser.add_argument("--recorded-timing", action="store_true", help="기록된 응답의 원래 지연으로 재생")
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="모의 서버 첫 토큰 지연 (ms)")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="모의 서버 토큰 생성 속도")
+    parser.add_argument("--jitter", type=float, default=0.2, help="모의 서버 지연 변동 폭")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="모의 서버가 429로 응답할 비율")
+    parser.add_argument("--output", help=f"결과 JSON 경로 (기본: {DEFAULT_OUTPUT_DIR}/<커밋>.json)")
+    args = parser.parse_args(argv)
+    args.sessions = max(args.sessions, 1)
+
+    process = None
+    if args.base_url:
+        openai_client.BASE_URL = args.base_url
+    else:
+        process = spawn_mock_server(args)
+    try:
+        report = run_load(args)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    _print_summary(report)
+
+    meta = collect_metadata()
+    output = args.output or os.path.join(
+        DEFAULT_OUTPUT_DIR, f"{meta['commit'] or 'unknown'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, **report}, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {output}")
+    return 1 if report["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,405 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+from context_builder import count_tokens
+from response_cache import ResponseCache
+
+# 응답 지연 기본값 - 환경변수로 조정 가능
+MOCK_TTFT_MS = float(os.environ.get("MOCK_OPENAI_TTFT_MS", "300"))
+MOCK_TOKENS_PER_SECOND = float(os.environ.get("MOCK_OPENAI_TOKENS_PER_SECOND", "50"))
+# 첫 토큰 시간/토큰 속도에 곱할 무작위 변동 폭 (0.2 → ±20%)
+MOCK_JITTER = float(os.environ.get("MOCK_OPENAI_JITTER", "0.2"))
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_RECORDINGS_PATH = os.path.join(".cache", "mock_openai", "recordings.jsonl")
+DEFAULT_UPSTREAM = "https://api.openai.com/v1"
+# 동시 세션 부하 테스트에서 연결 요청이 거절되지 않도록 충분히 크게
+REQUEST_QUEUE_SIZE = 256
+
+DEFAULT_RESPONSE = (
+    "요청하신 내용을 정리하면 다음과 같습니다. 먼저 데이터의 전체 구조와 주요 컬럼을 확인한 뒤, "
+    "값의 분포와 결측치를 살펴보는 것이 좋습니다. 이어서 관심 있는 지표를 기준으로 그룹별 평균과 "
+    "상위 항목을 비교하면 특징을 빠르게 파악할 수 있습니다. 필요하면 특정 조건으로 필터링하거나 "
+    "정렬해서 다시 확인해 보세요."
+)
+
+# 스트리밍 조각 단위 (단어와 뒤따르는 공백)
+_PIECE_PATTERN = re.compile(r"\s*\S+\s*|\s+")
+
+class Recording(NamedTuple):
+    """기록된 응답 - 재생할 텍스트와 원래 요청의 토큰 수/지연"""
+    key: str
+    prompt_key: str
+    model: str
+    content: str
+    prompt_tokens: int
+    completion_tokens: int
+    ttft_ms: Optional[float] = None
+    duration_ms: Optional[float] = None
+
+def request_keys(model: str, messages: List[Dict[str, Any]]) -> Tuple[str, str]:
+    """(전체 요청 키, 마지막 사용자 메시지 키) - 대화 기록이 조금 달라도 같은 질문이면 재생되도록 두 단계로 찾음"""
+    last_user = next((message for message in reversed(messages) if message.get("role") == "user"), {})
+    return (ResponseCache.make_key(model, messages, None),
+            ResponseCache.make_key("", [{"role": "user", "content": _text(last_user.get("content"))}], None))
+
+def _text(content: Any) -> str:
+    """메시지 내용의 텍스트 부분 (멀티모달 조각 목록이면 text 조각만)"""
+    if isinstance(content, list):
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+def prompt_tokens(model: str, messages: List[Dict[str, Any]]) -> int:
+    return sum(count_tokens(_text(message.get("content")), model) for message in messages)
+
+class RecordingStore:
+    """JSONL 파일에 보관하는 응답 기록 (요청 키와 마지막 사용자 메시지 키로 조회)"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_RECORDINGS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, Recording] = {}
+        self._by_prompt: Dict[str, Recording] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._index(Recording(**json.loads(line)))
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def _index(self, recording: Recording):
+        self._by_key[recording.key] = recording
+        self._by_prompt[recording.prompt_key] = recording
+
+    def models(self) -> List[str]:
+        with self._lock:
+            return sorted({recording.model for recording in self._by_key.values()})
+
+    def find(self, model: str, messages: List[Dict[str, Any]]) -> Optional[Recording]:
+        key, prompt_key = request_keys(model, messages)
+        with self._lock:
+            return self._by_key.get(key) or self._by_prompt.get(prompt_key)
+
+    def add(self, recording: Recording):
+        with self._lock:
+            self._index(recording)
+            if self.path:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(recording._asdict(), ensure_ascii=False) + "\n")
+
+class MockConfig(NamedTuple):
+    ttft_ms: float = MOCK_TTFT_MS
+    tokens_per_second: float = MOCK_TOKENS_PER_SECOND
+    jitter: float = MOCK_JITTER
+    # 기록된 지연을 그대로 재생 (False면 ttft_ms/tokens_per_second 사용)
+    recorded_timing: bool = False
+    # 429(Retry-After 포함)로 응답할 요청 비율 - 재시도 경로 확인용
+    error_rate: float = 0.0
+    # 설정하면 기록이 없는 요청을 이 주소로 전달하고 응답을 기록
+    upstream: Optional[str] = None
+    default_response: str = DEFAULT_RESPONSE
+
+def _jittered(value: float, jitter: float) -> float:
+    return value * random.uniform(1 - jitter, 1 + jitter) if jitter else value
+
+def _pieces(content: str, model: str) -> List[Tuple[str, int]]:
+    """스트리밍으로 보낼 (조각, 누적 토큰 수) 목록"""
+    pieces = []
+    tokens = 0
+    for piece in _PIECE_PATTERN.findall(content):
+        tokens += max(count_tokens(piece, model), 1)
+        pieces.append((piece, tokens))
+    return pieces
+
+def _completion_id() -> str:
+    return f"chatcmpl-mock-{uuid.uuid4().hex[:24]}"
+
+def _usage(prompt: int, completion: int) -> Dict[str, int]:
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+def _chunk(completion_id: str, model: str, created: int, delta: Dict[str, Any],
+           finish_reason: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    """chat completions API와 호환되는 로컬 모의 서버 (스트리밍/비스트리밍 응답 재생)
+
+    기록된 응답이 있으면 그대로, 없으면 기본 응답을 설정한 첫 토큰 시간과 토큰 속도로 보냅니다.
+    upstream을 설정하면 기록이 없는 요청은 실제 API로 전달하고 응답을 기록합니다 (기록 모드).
+    """
+
+    daemon_threads = True
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+    def __init__(self, address: Tuple[str, int], config: MockConfig = MockConfig(),
+                 store: Optional[RecordingStore] = None):
+        super().__init__(address, _MockHandler)
+        self.config = config
+        self.store = store if store is not None else RecordingStore(None)
+        self._upstream: Optional[httpx.Client] = None
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "replayed": 0, "generated": 0, "recorded": 0, "errors": 0}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def upstream_client(self) -> httpx.Client:
+        with self._lock:
+            if self._upstream is None:
+                self._upstream = httpx.Client(base_url=self.config.upstream, timeout=httpx.Timeout(300, connect=10))
+            return self._upstream
+
+    def start(self) -> "MockOpenAIServer":
+        """백그라운드 스레드에서 요청 처리 시작"""
+        threading.Thread(target=self.serve_forever, daemon=True, name="mock-openai").start()
+        return self
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MockOpenAIServer
+
+    def log_message(self, *args):
+        pass
+
+    # ---------- 응답 전송 ----------
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _write_event(self, payload: Any):
+        data = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+        self._write_chunk(f"data: {data}\n\n".encode("utf-8"))
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    # ---------- 요청 처리 ----------
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            models = [{"id": model, "object": "model"} for model in self.server.store.models()]
+            self._send_json(200, {"object": "list", "data": models})
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+        try:
+            params = json.loads(body or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+
+        server = self.server
+        server.count("requests")
+        config = server.config
+        if config.error_rate and random.random() < config.error_rate:
+            server.count("errors")
+            self._send_json(429, {"error": {"message": "Rate limit reached (mock)", "type": "rate_limit_error"}},
+                            headers={"Retry-After": "0.1"})
+            return
+
+        model = params.get("model", "mock-model")
+        messages = params.get("messages", [])
+        recording = server.store.find(model, messages)
+        try:
+            if recording is None and config.upstream:
+                self._forward(body, params)
+                return
+            if recording is None:
+                server.count("generated")
+                recording = Recording("", "", model, config.default_response, prompt_tokens(model, messages),
+                                      count_tokens(config.default_response, model))
+            else:
+                server.count("replayed")
+            self._replay(params, recording)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 클라이언트가 요청을 취소함
+
+    def _timing(self, recording: Recording) -> Tuple[float, float]:
+        """(첫 토큰 시간 초, 초당 토큰 수)"""
+        config = self.server.config
+        ttft_ms, rate = config.ttft_ms, config.tokens_per_second
+        if config.recorded_timing and recording.ttft_ms is not None:
+            ttft_ms = recording.ttft_ms
+            generation_ms = (recording.duration_ms or 0) - recording.ttft_ms
+            if generation_ms > 0 and recording.completion_tokens:
+                rate = recording.completion_tokens / (generation_ms / 1000)
+        return _jittered(ttft_ms, config.jitter) / 1000, max(_jittered(rate, config.jitter), 1e-3)
+
+    def _replay(self, params: Dict[str, Any], recording: Recording):
+        model = params.get("model", recording.model)
+        ttft, rate = self._timing(recording)
+        completion_id = _completion_id()
+        created = int(time.time())
+        start = time.perf_counter()
+        pieces = _pieces(recording.content, model)
+        completion_tokens = pieces[-1][1] if pieces else 0
+
+        if not params.get("stream"):
+            time.sleep(ttft + completion_tokens / rate)
+            self._send_json(200, {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": recording.content},
+                             "finish_reason": "stop"}],
+                "usage": _usage(recording.prompt_tokens, completion_tokens),
+            })
+            return
+
+        self._start_stream()
+        self._write_event(_chunk(completion_id, model, created, {"role": "assistant", "content": ""}))
+        previous = 0
+        for piece, tokens in pieces:
+            # 누적 토큰 수 기준 목표 시각까지 대기 (조각마다 sleep 오차가 쌓이지 않도록)
+            delay = start + ttft + previous / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._write_event(_chunk(completion_id, model, created, {"content": piece}))
+            previous = tokens
+        self._write_event(_chunk(completion_id, model, created, {}, "stop"))
+        if (params.get("stream_options") or {}).get("include_usage"):
+            self._write_event({
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [], "usage": _usage(recording.prompt_tokens, completion_tokens),
+            })
+        self._write_event("[DONE]")
+        self._end_stream()
+
+    def _forward(self, body: bytes, params: Dict[str, Any]):
+        """실제 API로 요청을 전달하고 (스트리밍이면 받는 대로 그대로 전달) 응답을 기록"""
+        server = self.server
+        headers = {"Authorization": self.headers.get("Authorization", ""), "Content-Type": "application/json"}
+        model = params.get("model", "")
+        messages = params.get("messages", [])
+        start = time.perf_counter()
+        first_token = None
+        content: List[str] = []
+        usage: Dict[str, int] = {}
+
+        with server.upstream_client().stream("POST", "/chat/completions", content=body, headers=headers) as response:
+            if response.status_code != 200:
+                data = response.read()
+                self.send_response(response.status_code)
+                self.send_header("Content-Type", response.headers.get("content-type", "application/json"))
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+            if params.get("stream"):
+                self._start_stream()
+                for line in response.iter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    payload = line[len("data: "):]
+                    self._write_chunk(f"{line}\n\n".encode("utf-8"))
+                    if payload == "[DONE]":
+                        continue
+                    chunk = json.loads(payload)
+                    usage = chunk.get("usage") or usage
+                    for choice in chunk.get("choices", []):
+                        text = (choice.get("delta") or {}).get("content")
+                        if text:
+                            first_token = first_token or time.perf_counter()
+                            content.append(text)
+                self._end_stream()
+            else:
+                data = response.read()
+                first_token = time.perf_counter()
+                completion = json.loads(data)
+                usage = completion.get("usage") or {}
+                content.append(completion["choices"][0]["message"].get("content") or "")
+                self._send_json(200, completion)
+
+        end = time.perf_counter()
+        text = "".join(content)
+        key, prompt_key = request_keys(model, messages)
+        server.store.add(Recording(
+            key, prompt_key, model, text,
+            usage.get("prompt_tokens") or prompt_tokens(model, messages),
+            usage.get("completion_tokens") or count_tokens(text, model),
+            round(((first_token or end) - start) * 1000, 2), round((end - start) * 1000, 2),
+        ))
+        server.count("recorded")
+
+def start_mock_server(host: str = DEFAULT_HOST, port: int = 0, config: MockConfig = MockConfig(),
+                      recordings: Optional[str] = DEFAULT_RECORDINGS_PATH) -> MockOpenAIServer:
+    """모의 서버를 백그라운드 스레드로 시작 (port=0이면 빈 포트 사용, base_url 속성으로 주소 확인)"""
+    return MockOpenAIServer((host, port), config, RecordingStore(recordings)).start()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="OpenAI chat completions 호환 로컬 모의 서버 (응답 기록/재생, 지연 조절)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--recordings", default=DEFAULT_RECORDINGS_PATH, help="응답 기록 JSONL 경로")
+    parser.add_argument("--record", nargs="?", const=DEFAULT_UPSTREAM, metavar="UPSTREAM",
+                        help=f"기록이 없는 요청을 실제 API로 전달하고 기록 (기본 {DEFAULT_UPSTREAM})")
+    parser.add_argument("--ttft-ms", type=float, default=MOCK_TTFT_MS, help="첫 토큰까지 지연 (ms)")
+    parser.add_argument("--tokens-per-second", type=float, default=MOCK_TOKENS_PER_SECOND, help="토큰 생성 속도")
+    parser.add_argument("--jitter", type=float, default=MOCK_JITTER, help="지연 변동 폭 (0.2 → ±20%%)")
+    parser.add_argument("--recorded-timing", action="store_true", help="기록된 응답의 원래 지연으로 재생")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429로 응답할 요청 비율")
+    args = parser.parse_args(argv)
+
+    config = MockConfig(args.ttft_ms, args.tokens_per_second, args.jitter, args.recorded_timing,
+                        args.error_rate, args.record)
+    server = MockOpenAIServer((args.host, args.port), config, RecordingStore(args.recordings))
+    mode = f"기록 모드 → {args.record}" if args.record else "재생 모드"
+    print(f"모의 OpenAI 서버: {server.base_url} ({mode}, 기록 {len(server.store)}건)", flush=True)
+    print(f"  OPENAI_BASE_URL={server.base_url} 로 설정하면 앱이 이 서버를 사용합니다.", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"\n요청 통계: {server.stats}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
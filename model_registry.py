@@ -0,0 +1,114 @@
+import os
+import json
+import threading
+from typing import Any, Dict, Optional
+
+try:
+    import yaml
+except ImportError:  # PyYAML이 없으면 JSON 파일만 지원
+    yaml = None
+
+DEFAULT_REGISTRY_PATH = os.environ.get(
+    "MODEL_REGISTRY_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "models.json")
+)
+
+# 레지스트리에 없는 모델에 사용할 기본 정보
+DEFAULT_MODEL_INFO: Dict[str, Any] = {
+    "max_tokens": 1000,
+    "supports_streaming": True,
+    "supports_temperature": True,
+    "supports_vision": False,
+    "reasoning": False,
+    "context_window": 16385,
+    # 이미지 입력 시 긴 변의 최대 픽셀 수 (이보다 크면 축소 후 전송)
+    "image_max_side": 2048,
+}
+
+class ModelRegistry:
+    """모델 정보를 한 번만 구성하고 모델 ID로 바로 조회하는 레지스트리"""
+
+    def __init__(self, categories: Dict[str, Dict[str, Dict[str, Any]]]):
+        self.categories: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._models: Dict[str, Dict[str, Any]] = {}
+        self._category_of: Dict[str, str] = {}
+        for category_name, models in categories.items():
+            self.categories[category_name] = {}
+            for model_id, model_info in models.items():
+                info = self._with_capabilities(model_id, model_info)
+                self.categories[category_name][model_id] = info
+                self._models[model_id] = info
+                self._category_of[model_id] = category_name
+
+    @staticmethod
+    def _with_capabilities(model_id: str, model_info: Dict[str, Any]) -> Dict[str, Any]:
+        """기능 플래그를 미리 계산하여 채운 모델 정보 반환"""
+        info = dict(model_info)
+        info.setdefault("name", model_id)
+        info.setdefault("max_tokens", DEFAULT_MODEL_INFO["max_tokens"])
+        info.setdefault("supports_streaming", True)
+        info.setdefault("reasoning", False)
+        # Reasoning 모델은 temperature를 지원하지 않음
+        info.setdefault("supports_temperature", not info["reasoning"])
+        info.setdefault("supports_vision", False)
+        info.setdefault("image_max_side", DEFAULT_MODEL_INFO["image_max_side"])
+        info.setdefault("context_window", DEFAULT_MODEL_INFO["context_window"])
+        info.setdefault("deprecated", False)
+        return info
+
+    @classmethod
+    def from_file(cls, path: str) -> "ModelRegistry":
+        """JSON 또는 YAML 파일에서 레지스트리 생성"""
+        with open(path, encoding="utf-8") as f:
+            if path.lower().endswith((".yaml", ".yml")):
+                if yaml is None:
+                    raise ValueError("YAML 모델 파일을 읽으려면 PyYAML을 설치해주세요.")
+                categories = yaml.safe_load(f)
+            else:
+                categories = json.load(f)
+        return cls(categories)
+
+    def get(self, model_id: str, default: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """모델 정보 조회"""
+        return self._models.get(model_id, default)
+
+    def get_or_default(self, model_id: str) -> Dict[str, Any]:
+        """모델 정보 조회 (없으면 기본 정보)"""
+        return self._models.get(model_id, DEFAULT_MODEL_INFO)
+
+    def category_of(self, model_id: str) -> Optional[str]:
+        """모델이 속한 카테고리 이름"""
+        return self._category_of.get(model_id)
+
+    def supports_streaming(self, model_id: str) -> bool:
+        return self.get_or_default(model_id)["supports_streaming"]
+
+    def supports_temperature(self, model_id: str) -> bool:
+        return self.get_or_default(model_id)["supports_temperature"]
+
+    def supports_vision(self, model_id: str) -> bool:
+        return self.get_or_default(model_id)["supports_vision"]
+
+    def is_reasoning(self, model_id: str) -> bool:
+        return self.get_or_default(model_id)["reasoning"]
+
+    def context_window(self, model_id: str) -> int:
+        return self.get_or_default(model_id)["context_window"]
+
+    def __contains__(self, model_id: str) -> bool:
+        return model_id in self._models
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_registry() -> ModelRegistry:
+    """프로세스 전체에서 공유하는 모델 레지스트리 (최초 호출 시 한 번만 로드)"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry.from_file(DEFAULT_REGISTRY_PATH)
+    return _registry
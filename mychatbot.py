@@ -1,21 +1,35 @@
 import streamlit as st
 import os
-import pandas as pd
-import io
+import uuid
 from datetime import datetime
+from functools import partial
 from dotenv import load_dotenv
 
 # 로컬 모듈 import
 from data_manager import DataFrameManager, process_data_request
-from file_processor import process_uploaded_file
-from ai_handler import AIHandler, get_model_templates
+from file_processor import process_uploaded_file, load_image_attachment
+from ai_handler import AIHandler, IMAGES_KEY
+from model_registry import get_registry
+from response_cache import ResponseCache
+from stream_renderer import StreamRenderer, DEFAULT_FLUSH_INTERVAL_MS, DEFAULT_FLUSH_CHARS
+from paged_editor import paged_data_editor
+from summary_engine import get_summary_engine
+from export_manager import EXPORT_FORMATS, get_export_manager
+from context_encoder import DATA_CONTEXT_KEY
+from job_manager import JOB_POLL_SECONDS, get_job_manager
+from telemetry import start_trace, get_telemetry
 
 load_dotenv()
 API_KEY = os.environ.get('OPENAI_APIKEY')
 
+@st.cache_resource
+def get_response_cache() -> ResponseCache:
+    """프로세스 전체에서 공유하는 응답 캐시"""
+    return ResponseCache()
+
 # AI 핸들러 초기화
 try:
-    ai_handler = AIHandler(API_KEY)
+    ai_handler = AIHandler(API_KEY, response_cache=get_response_cache())
 except ValueError as e:
     st.error("OpenAI API 키가 설정되지 않았습니다. 환경변수 OPENAI_APIKEY를 설정해주세요.")
     st.stop()
@@ -27,15 +41,90 @@ if "messages" not in st.session_state:
 if "uploaded_files" not in st.session_state:
     st.session_state.uploaded_files = []
 
-if "dataframes" not in st.session_state:
-    st.session_state.dataframes = {}
+# 멀티모달 요청에 첨부할 업로드 이미지
+if "uploaded_images" not in st.session_state:
+    st.session_state.uploaded_images = []
 
-if "current_df" not in st.session_state:
-    st.session_state.current_df = None
+# 이미 메시지에 첨부한 이미지의 내용 해시 (이미지는 처음 보낸 메시지에만 첨부)
+if "sent_image_keys" not in st.session_state:
+    st.session_state.sent_image_keys = set()
 
 if "df_managers" not in st.session_state:
     st.session_state.df_managers = {}
 
+# 현재 편집 중인 파일 이름 (데이터는 매니저가 데이터셋 저장소를 통해 필요할 때 로드)
+if "current_file" not in st.session_state:
+    st.session_state.current_file = None
+
+# 응답을 기다리는 백그라운드 작업 ID (추론 모델)
+if "pending_job" not in st.session_state:
+    st.session_state.pending_job = None
+
+# 성능 추적 기록을 이 세션의 것만 모아 보기 위한 ID
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+def cancel_pending_job():
+    """진행 중인 응답 작업 취소 (HTTP 요청까지 중단)"""
+    if get_job_manager().cancel(st.session_state.pending_job):
+        st.session_state.messages.append({"role": "assistant", "content": "⏹️ 응답 생성이 중지되었습니다."})
+        st.session_state.pending_job = None
+    # 이미 완료된 작업이면 그대로 두어 다음 확인 때 결과를 표시
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def render_pending_job():
+    """백그라운드 응답 작업 상태 표시 - 이 부분만 주기적으로 다시 실행하고, 완료되면 대화에 추가"""
+    if st.session_state.pending_job is None:
+        st.rerun()  # 중지 버튼 등으로 작업이 정리되었으면 전체 화면 갱신
+    job = get_job_manager().get(st.session_state.pending_job)
+    if job is None or job.done():
+        if job is None:
+            content = "응답 작업 정보를 찾을 수 없습니다. 다시 질문해주세요."
+        elif job.status == "done":
+            content = job.result()
+        elif job.status == "error":
+            content = f"AI 응답 생성 중 오류가 발생했습니다: {job.error()}"
+        else:
+            content = "⏹️ 응답 생성이 중지되었습니다."
+        st.session_state.messages.append({"role": "assistant", "content": content})
+        st.session_state.pending_job = None
+        st.rerun()
+    
+    with st.chat_message("assistant"):
+        st.markdown(f"🧠 추론 중입니다... ({job.elapsed:.0f}초 경과, 이 모델은 더 깊이 생각합니다)")
+        st.button("⏹️ 중지", key="cancel_pending_job", on_click=cancel_pending_job)
+
+def render_performance_summary(limit: int = 20):
+    """이 세션의 최근 턴 추적 요약 (마지막 턴의 구간별 소요 시간과 평균 지표)"""
+    records = get_telemetry().recent(limit, session=st.session_state.session_id)
+    traces = [trace for trace in records if trace["kind"] == "turn"]
+    if not traces:
+        return
+    st.subheader("⏱️ 성능 추적")
+    last = traces[0]
+    st.caption(f"마지막 턴: {last['duration_ms']:.0f} ms")
+    st.dataframe(
+        [{"구간": item["name"], "소요 시간(ms)": item["duration_ms"]} for item in last["spans"]],
+        hide_index=True, use_container_width=True
+    )
+    
+    # 추론 모델 응답은 별도의 백그라운드 추적(같은 turn_id)에 기록됨
+    completions = [item for trace in records for item in trace["spans"] if "ttft_ms" in item]
+    def average(values):
+        values = [value for value in values if value is not None]
+        return sum(values) / len(values) if values else None
+    
+    metrics = {
+        "평균 턴 시간 (ms)": average(trace["duration_ms"] for trace in traces),
+        "평균 첫 토큰 시간 (ms)": average(item["ttft_ms"] for item in completions),
+        "평균 초당 토큰": average(item.get("tokens_per_second") for item in completions),
+        "평균 프롬프트 토큰": average(item.get("prompt_tokens") for item in completions),
+        "평균 응답 토큰": average(item.get("completion_tokens") for item in completions),
+    }
+    for label, value in metrics.items():
+        if value is not None:
+            st.metric(label, f"{value:,.0f}" if value >= 100 else f"{value:,.1f}")
+
 def main():
     st.set_page_config(
         page_title="인공지능 모델링 검증 챗봇",
@@ -87,18 +176,22 @@ def main():
     st.markdown("---")
     
     # 데이터 편집기 섹션
-    if st.session_state.current_df is not None:
+    if st.session_state.current_file in st.session_state.df_managers:
         st.subheader("📊 데이터 편집기")
         
         # DataFrame 선택 옵션 (여러 파일이 업로드된 경우)
-        if len(st.session_state.dataframes) > 1:
+        if len(st.session_state.df_managers) > 1:
+            file_names = list(st.session_state.df_managers.keys())
             selected_file = st.selectbox(
                 "편집할 데이터 파일 선택:",
-                options=list(st.session_state.dataframes.keys()),
+                options=file_names,
+                index=file_names.index(st.session_state.current_file),
                 key="df_selector"
             )
             if selected_file:
-                st.session_state.current_df = st.session_state.dataframes[selected_file]
+                st.session_state.current_file = selected_file
+        
+        current_manager = st.session_state.df_managers[st.session_state.current_file]
         
         # 데이터 편집기 표시
         col1, col2 = st.columns([3, 1])
@@ -111,33 +204,21 @@ def main():
                 st.success("✅ 변경사항이 저장되었습니다!")
                 st.rerun()
         
-        # 실시간 편집 가능한 데이터 테이블
-        edited_df = st.data_editor(
-            st.session_state.current_df,
-            use_container_width=True,
-            num_rows="dynamic",  # 행 추가/삭제 가능
-            key="data_editor",
-            height=400
-        )
-        
-        # 편집된 데이터를 실시간으로 세션에 반영
-        st.session_state.current_df = edited_df
-        
-        # 현재 편집 중인 파일명 업데이트
-        if len(st.session_state.dataframes) > 0:
-            current_file_name = list(st.session_state.dataframes.keys())[0] if len(st.session_state.dataframes) == 1 else selected_file
-            st.session_state.dataframes[current_file_name] = edited_df
+        # 현재 페이지만 전송하는 편집 가능한 데이터 테이블 (정렬/필터는 서버에서 처리)
+        paged_data_editor(current_manager, key=f"data_editor_{st.session_state.current_file}", height=400)
         
-        # 데이터 통계 표시
+        # 데이터 통계 표시 (결측값은 컬럼별 캐시된 통계 사용)
+        n_rows, n_columns = current_manager.row_count, len(current_manager.columns)
+        column_stats = get_summary_engine().column_stats(current_manager)
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("총 행 수", len(edited_df))
+            st.metric("총 행 수", n_rows)
         with col2:
-            st.metric("총 열 수", len(edited_df.columns))
+            st.metric("총 열 수", n_columns)
         with col3:
-            st.metric("전체 셀 수", len(edited_df) * len(edited_df.columns))
+            st.metric("전체 셀 수", n_rows * n_columns)
         with col4:
-            st.metric("결측값", edited_df.isnull().sum().sum())
+            st.metric("결측값", sum(stats["nulls"] for stats in column_stats.values()))
         
         st.markdown("---")
           
@@ -148,7 +229,8 @@ def main():
         
         # 모델 선택
         st.subheader("🤖 AI 모델 선택")
-        model_templates = get_model_templates()
+        model_registry = get_registry()
+        model_templates = model_registry.categories
         
         # 모델 카테고리별로 표시
         selected_model = None
@@ -185,11 +267,8 @@ def main():
         current_model = st.session_state.selected_model
         
         # 현재 모델이 deprecated인지 확인
-        is_deprecated = False
-        for category in model_templates.values():
-            if current_model in category:
-                is_deprecated = category[current_model].get('deprecated', False)
-                break
+        model_info = model_registry.get(current_model)
+        is_deprecated = model_info is not None and model_info['deprecated']
         
         if is_deprecated:
             st.warning(f"⚠️ 현재 모델: **{current_model}** (Deprecated)")
@@ -197,32 +276,26 @@ def main():
             st.success(f"✅ 현재 모델: **{current_model}**")
         
         # 선택된 모델 정보 표시
-        for category in model_templates.values():
-            if current_model in category:
-                model_info = category[current_model]
+        if model_info is not None:
+            # 모델 세부 정보를 컨테이너로 묶기
+            with st.container():
+                col1, col2 = st.columns(2)
                 
-                # 모델 세부 정보를 컨테이너로 묶기
-                with st.container():
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.metric("Max Tokens", f"{model_info['max_tokens']:,}")
-                        if 'context_window' in model_info:
-                            st.metric("Context Window", f"{model_info['context_window']:,}")
-                    
-                    with col2:
-                        streaming_status = "✅ 지원" if model_info['supports_streaming'] else "❌ 미지원"
-                        st.metric("스트리밍", streaming_status)
-                        
-                        if 'size' in model_info:
-                            st.metric("모델 크기", model_info['size'])
+                with col1:
+                    st.metric("Max Tokens", f"{model_info['max_tokens']:,}")
+                    st.metric("Context Window", f"{model_info['context_window']:,}")
                 
-                break
+                with col2:
+                    streaming_status = "✅ 지원" if model_info['supports_streaming'] else "❌ 미지원"
+                    st.metric("스트리밍", streaming_status)
+                    
+                    if 'size' in model_info:
+                        st.metric("모델 크기", model_info['size'])
         
         st.divider()
         
-        # Temperature 설정 (o1 모델은 temperature 미지원)
-        if not current_model.startswith("o1"):
+        # Temperature 설정 (Reasoning 모델은 temperature 미지원)
+        if model_registry.supports_temperature(current_model):
             temperature = st.slider(
                 "🌡️ Temperature", 
                 min_value=0.0, 
@@ -233,7 +306,36 @@ def main():
             )
         else:
             st.info("🧠 Reasoning 모델은 Temperature 설정을 지원하지 않습니다.")
-            temperature = 1.0  # o1 모델의 기본값
+            temperature = 1.0  # Reasoning 모델의 기본값
+        
+        # 응답 캐시 설정 (동일한 요청은 저장된 응답 재사용)
+        use_response_cache = st.checkbox(
+            "💾 응답 캐시 사용",
+            value=False,
+            help="같은 모델·대화·설정으로 다시 요청하면 API를 호출하지 않고 저장된 응답을 사용합니다."
+        )
+        if use_response_cache and st.button("🧹 응답 캐시 비우기", use_container_width=True):
+            get_response_cache().clear()
+            st.success("✅ 응답 캐시를 비웠습니다.")
+        
+        # 스트리밍 렌더링 설정 (화면 갱신 주기)
+        with st.expander("🖥️ 스트리밍 렌더링 설정"):
+            flush_interval_ms = st.number_input(
+                "갱신 주기 (ms)",
+                min_value=0,
+                max_value=2000,
+                value=DEFAULT_FLUSH_INTERVAL_MS,
+                step=10,
+                help="이 시간이 지나면 받은 응답을 화면에 반영합니다."
+            )
+            flush_chars = st.number_input(
+                "갱신 글자 수",
+                min_value=1,
+                max_value=5000,
+                value=DEFAULT_FLUSH_CHARS,
+                step=50,
+                help="이만큼 글자가 쌓이면 주기와 관계없이 화면에 반영합니다."
+            )
         
         st.divider()
         
@@ -246,14 +348,32 @@ def main():
             help="텍스트, CSV, Excel(XLSX), 이미지 파일을 업로드할 수 있습니다."
         )
         
+        # 대용량 CSV는 지정한 행 수만큼 무작위 표본으로 로드
+        max_rows = st.number_input(
+            "📏 CSV 최대 로드 행 수 (0 = 제한 없음)",
+            min_value=0,
+            value=0,
+            step=100_000,
+            help="매우 큰 CSV는 이 행 수만큼만 균등 표본으로 메모리에 로드합니다. 통계는 전체 행 기준으로 계산됩니다."
+        )
+        
         if uploaded_files:
             st.session_state.uploaded_files = []
+            st.session_state.uploaded_images = []
             for uploaded_file in uploaded_files:
-                file_info, df = process_uploaded_file(uploaded_file)
+                file_info, df_manager = process_uploaded_file(uploaded_file, max_rows=max_rows or None)
+                image = load_image_attachment(uploaded_file)
+                if image is not None:
+                    st.session_state.uploaded_images.append(image)
+                if df_manager is not None:
+                    # 표 데이터의 상세 정보는 데이터가 바뀔 때만 대화에 한 번 전달되므로 여기서는 간단히 기록
+                    file_info = f"{uploaded_file.name}: 표 데이터 ({df_manager.row_count:,}행 × {len(df_manager.columns)}열)"
                 st.session_state.uploaded_files.append(file_info)
                 st.success(f"✅ {uploaded_file.name} 업로드 완료")
-                if df is not None:
+                if df_manager is not None:
                     st.info(f"📊 {uploaded_file.name}이 편집 가능한 데이터로 로드되었습니다!")
+                    if df_manager.sampled:
+                        st.warning(f"⚠️ 샘플링됨: 전체 {df_manager.total_rows:,}행 중 {df_manager.row_count:,}행만 로드되었습니다.")
         
         st.divider()
         
@@ -262,9 +382,15 @@ def main():
         if st.button("🗑️ 대화 내용 초기화", use_container_width=True):
             st.session_state.messages = []
             st.session_state.uploaded_files = []
-            st.session_state.dataframes = {}
-            st.session_state.current_df = None
+            st.session_state.uploaded_images = []
+            st.session_state.sent_image_keys = set()
+            get_job_manager().cancel(st.session_state.pending_job)
+            st.session_state.pending_job = None
             st.session_state.df_managers = {}
+            st.session_state.current_file = None
+            st.session_state.pop("ingestion_cache", None)
+            st.session_state.pop("file_hashes", None)
+            st.session_state.pop(DATA_CONTEXT_KEY, None)
             st.rerun()
         
         # 통계 정보
@@ -274,132 +400,144 @@ def main():
         
         # 모델 카테고리 표시
         current_model = st.session_state.selected_model
-        model_category = "알 수 없음"
-        for category_name, models in model_templates.items():
-            if current_model in models:
-                model_category = category_name
-                break
+        model_category = model_registry.category_of(current_model) or "알 수 없음"
         st.metric("모델 카테고리", model_category)
+        
+        # 성능 추적 요약 (이번 실행에서 처리한 턴까지 반영되도록 마지막에 채움)
+        performance_container = st.container()
     
 
     # 메인 채팅 인터페이스
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
+            if message.get(IMAGES_KEY):
+                st.caption(f"🖼️ 이미지 {len(message[IMAGES_KEY])}개 첨부")
+    
+    # 추론 모델 응답 대기 중이면 상태만 표시 (스크립트는 응답을 기다리지 않음)
+    if st.session_state.pending_job is not None:
+        render_pending_job()
     
-    # 사용자 입력
-    if prompt := st.chat_input("💬 메시지를 입력하세요..."):
+    # 사용자 입력 (응답 대기 중에는 중복 요청을 막기 위해 비활성화)
+    if prompt := st.chat_input("💬 메시지를 입력하세요...", disabled=st.session_state.pending_job is not None):
         # 사용자 메시지 추가
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        # 아직 보내지 않은 업로드 이미지는 이 메시지에 첨부 (이후 턴에는 이 메시지와 함께만 전송)
+        user_message = {"role": "user", "content": prompt}
+        new_images = [image for image in st.session_state.uploaded_images
+                      if image.key not in st.session_state.sent_image_keys]
+        if new_images:
+            user_message[IMAGES_KEY] = new_images
+            st.session_state.sent_image_keys.update(image.key for image in new_images)
+        st.session_state.messages.append(user_message)
         with st.chat_message("user"):
             st.markdown(prompt)
+            if new_images:
+                st.caption(f"🖼️ 이미지 {len(new_images)}개 첨부")
         
-        # 데이터 조작 요청 처리
-        data_result = None
-        result_df = None
-        
-        # 현재 활성화된 DataFrameManager가 있는지 확인
-        current_df_manager = None
-        if st.session_state.df_managers:
-            # 가장 최근에 업로드된 파일의 매니저 사용
-            latest_file = list(st.session_state.df_managers.keys())[-1]
-            current_df_manager = st.session_state.df_managers[latest_file]
-            
+        # 이 턴의 처리 구간(데이터 작업, 컨텍스트 구성, 모델 응답)을 하나의 추적으로 기록
+        with start_trace("turn", session=st.session_state.session_id,
+                         model=st.session_state.selected_model):
             # 데이터 조작 요청 처리
-            data_result, result_df = process_data_request(prompt, current_df_manager)
-        
-        # AI 응답 생성
-        with st.chat_message("assistant"):
-            message_placeholder = st.empty()
-            full_response = ""
+            data_result = None
+            result_df = None
             
-            # 데이터 조작 결과가 있는 경우 먼저 표시
-            if data_result and result_df is not None:
-                st.markdown(data_result)
-                
-                # 결과 DataFrame 표시
-                st.dataframe(result_df, use_container_width=True)
-                
-                # 다운로드 버튼 추가
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # 조작된 결과 DataFrame을 CSV로 변환
-                    csv_data = result_df.to_csv(index=False).encode('utf-8-sig')
-                    st.download_button(
-                        label="📄 CSV 다운로드",
-                        data=csv_data,
-                        file_name=f"filtered_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                        mime="text/csv",
-                        key=f"csv_{datetime.now().timestamp()}"
-                    )
+            # 현재 활성화된 DataFrameManager가 있는지 확인
+            current_df_manager = st.session_state.df_managers.get(st.session_state.current_file)
+            if current_df_manager is not None:
+                # 데이터 조작 요청 처리
+                data_result, result_df = process_data_request(prompt, current_df_manager)
+            
+            # AI 응답 생성
+            with st.chat_message("assistant"):
+                message_placeholder = st.empty()
+                full_response = ""
                 
-                with col2:
-                    # 조작된 결과 DataFrame을 Excel로 변환
-                    output = io.BytesIO()
-                    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                        result_df.to_excel(writer, index=False, sheet_name='Data')
-                    excel_data = output.getvalue()
+                # 데이터 조작 결과가 있는 경우 먼저 표시
+                if data_result and result_df is not None:
+                    st.markdown(data_result)
                     
-                    st.download_button(
-                        label="📊 Excel 다운로드",
-                        data=excel_data,
-                        file_name=f"filtered_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        key=f"xlsx_{datetime.now().timestamp()}"
-                    )
-                
-                full_response = data_result
-                
-                # 데이터 조작 히스토리 표시
-                if current_df_manager and current_df_manager.operation_history:
-                    with st.expander("🔍 수행된 작업 히스토리"):
-                        for i, operation in enumerate(current_df_manager.operation_history, 1):
-                            st.text(f"{i}. {operation}")
-            
-            else:
-                # 일반 AI 응답 처리
-                try:
-                    response_stream = ai_handler.get_ai_response(
-                        st.session_state.messages,
-                        model_name=st.session_state.selected_model,
-                        temperature=temperature,
-                        uploaded_files=st.session_state.uploaded_files
-                    )
+                    # 결과 DataFrame 표시
+                    st.dataframe(result_df, use_container_width=True)
+                    
+                    # 다운로드 버튼 추가 (파일은 버튼을 누를 때만 생성, 같은 데이터 버전의 같은 요청 결과는 캐시 재사용)
+                    export_key = ("result", current_df_manager.name, current_df_manager.version, prompt)
+                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                    for column, (fmt, export_format) in zip(st.columns(len(EXPORT_FORMATS)), EXPORT_FORMATS.items()):
+                        with column:
+                            st.download_button(
+                                label=export_format.label,
+                                data=partial(get_export_manager().export_bytes, export_key, lambda: result_df, fmt),
+                                file_name=f"filtered_data_{timestamp}.{export_format.extension}",
+                                mime=export_format.mime,
+                                on_click="ignore",
+                                key=f"result_{fmt}"
+                            )
+                    
+                    full_response = data_result
                     
-                    if isinstance(response_stream, str):
-                        # 에러 메시지인 경우
-                        full_response = response_stream
+                    # 데이터 조작 히스토리 표시
+                    if current_df_manager and current_df_manager.operation_history:
+                        with st.expander("🔍 수행된 작업 히스토리"):
+                            for i, operation in enumerate(current_df_manager.operation_history, 1):
+                                st.text(f"{i}. {operation}")
+                
+                elif not get_registry().supports_streaming(st.session_state.selected_model):
+                    # 비스트리밍(추론) 모델은 백그라운드 작업으로 요청하고 완료 여부는 주기적으로 확인
+                    try:
+                        st.session_state.pending_job = ai_handler.submit_ai_response(
+                            st.session_state.messages,
+                            model_name=st.session_state.selected_model,
+                            temperature=temperature,
+                            uploaded_files=st.session_state.uploaded_files,
+                            use_cache=use_response_cache,
+                            df_manager=current_df_manager,
+                            context_state=st.session_state
+                        )
+                    except Exception as e:
+                        full_response = f"AI 응답 생성 중 오류가 발생했습니다: {str(e)}"
                         message_placeholder.markdown(full_response)
                     else:
-                        # 선택된 모델이 스트리밍을 지원하는지 확인
-                        model_templates = get_model_templates()
-                        supports_streaming = True
-                        for category in model_templates.values():
-                            if st.session_state.selected_model in category:
-                                supports_streaming = category[st.session_state.selected_model]['supports_streaming']
-                                break
+                        st.rerun()
+                
+                else:
+                    # 일반 AI 응답 처리 (스트리밍)
+                    try:
+                        response_stream = ai_handler.get_ai_response(
+                            st.session_state.messages,
+                            model_name=st.session_state.selected_model,
+                            temperature=temperature,
+                            uploaded_files=st.session_state.uploaded_files,
+                            use_cache=use_response_cache,
+                            df_manager=current_df_manager,
+                            context_state=st.session_state
+                        )
                         
-                        if supports_streaming:
-                            # 스트리밍 응답 처리
-                            for chunk in response_stream:
-                                if chunk.choices[0].delta.content is not None:
-                                    full_response += chunk.choices[0].delta.content
-                                    message_placeholder.markdown(full_response + "▌")
-                            
+                        if isinstance(response_stream, str):
+                            # 에러 메시지인 경우
+                            full_response = response_stream
                             message_placeholder.markdown(full_response)
                         else:
-                            # 비스트리밍 응답 처리 (o1 모델들)
-                            with st.spinner("🧠 추론 중입니다... (이 모델은 더 깊이 생각합니다)"):
-                                full_response = response_stream.choices[0].message.content
-                                message_placeholder.markdown(full_response)
-                
-                except Exception as e:
-                    full_response = f"응답 생성 중 오류가 발생했습니다: {str(e)}"
-                    message_placeholder.markdown(full_response)
-        
-        # AI 메시지 저장
-        st.session_state.messages.append({"role": "assistant", "content": full_response})
+                            # 스트리밍 응답 처리 (조각을 모아서 렌더링)
+                            renderer = StreamRenderer(
+                                message_placeholder,
+                                flush_interval_ms=flush_interval_ms,
+                                flush_chars=flush_chars
+                            )
+                            for chunk in response_stream:
+                                if chunk.choices and chunk.choices[0].delta.content is not None:
+                                    renderer.write(chunk.choices[0].delta.content)
+                            
+                            full_response = renderer.finish()
+                    
+                    except Exception as e:
+                        full_response = f"응답 생성 중 오류가 발생했습니다: {str(e)}"
+                        message_placeholder.markdown(full_response)
+            
+            # AI 메시지 저장
+            st.session_state.messages.append({"role": "assistant", "content": full_response})
+    
+    with performance_container:
+        render_performance_summary()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
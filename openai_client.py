@@ -0,0 +1,124 @@
+import os
+import time
+import asyncio
+import random
+import threading
+from typing import Dict, Optional
+
+import httpx
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+# API 주소 - 로컬 모의 서버(mock_openai.py) 등으로 바꿀 때 설정 (예: http://127.0.0.1:8765/v1)
+BASE_URL = os.environ.get("OPENAI_BASE_URL") or None
+
+# 타임아웃 (초) - 환경변수로 조정 가능
+REQUEST_TIMEOUT = float(os.environ.get("OPENAI_TIMEOUT", "120"))
+CONNECT_TIMEOUT = float(os.environ.get("OPENAI_CONNECT_TIMEOUT", "10"))
+
+# 연결 풀 (keep-alive 연결 재사용)
+MAX_CONNECTIONS = int(os.environ.get("OPENAI_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("OPENAI_MAX_KEEPALIVE", "20"))
+KEEPALIVE_EXPIRY = float(os.environ.get("OPENAI_KEEPALIVE_EXPIRY", "60"))
+
+# 재시도 (429/5xx/연결 오류에 대해 지터가 있는 지수 백오프)
+MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", "4"))
+BACKOFF_BASE_SECONDS = float(os.environ.get("OPENAI_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX_SECONDS = float(os.environ.get("OPENAI_BACKOFF_MAX", "20"))
+
+_clients: Dict[str, OpenAI] = {}
+_clients_lock = threading.Lock()
+
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY
+    )
+
+def _http_timeout() -> httpx.Timeout:
+    return httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT)
+
+def get_openai_client(api_key: Optional[str]) -> OpenAI:
+    """프로세스 전체에서 공유하는 OpenAI 클라이언트 반환 (API 키별로 하나)"""
+    if not api_key:
+        raise ValueError("OpenAI API 키가 설정되지 않았습니다.")
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            http_client = httpx.Client(limits=_http_limits(), timeout=_http_timeout())
+            # 재시도는 chat_completion()에서 직접 처리하므로 SDK 자체 재시도는 끔
+            client = OpenAI(
+                api_key=api_key,
+                base_url=BASE_URL,
+                http_client=http_client,
+                timeout=_http_timeout(),
+                max_retries=0
+            )
+            _clients[api_key] = client
+        return client
+
+def create_async_openai_client(api_key: Optional[str]) -> AsyncOpenAI:
+    """비동기 OpenAI 클라이언트 생성 - 연결 풀이 이벤트 루프에 묶이므로 루프마다 하나를 만들어 재사용"""
+    if not api_key:
+        raise ValueError("OpenAI API 키가 설정되지 않았습니다.")
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=BASE_URL,
+        http_client=httpx.AsyncClient(limits=_http_limits(), timeout=_http_timeout()),
+        timeout=_http_timeout(),
+        max_retries=0
+    )
+
+def is_retryable_error(error: Exception) -> bool:
+    """재시도할 수 있는 일시적 오류인지 확인 (429, 5xx, 연결/타임아웃)"""
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError, openai.RateLimitError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """서버가 알려준 Retry-After 값 (초)"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """재시도 대기 시간 (full jitter 지수 백오프, Retry-After가 있으면 그 이상)"""
+    delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, BACKOFF_MAX_SECONDS))
+    return delay
+
+def chat_completion(client: OpenAI, max_retries: int = MAX_RETRIES, **params):
+    """chat.completions.create 호출 - 일시적 오류는 백오프 후 재시도
+
+    스트리밍 요청은 응답 스트림이 시작되기 전(연결·상태 코드 단계)의 오류만 재시도합니다.
+    """
+    attempt = 0
+    while True:
+        try:
+            return client.chat.completions.create(**params)
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable_error(e):
+                raise
+            time.sleep(backoff_delay(attempt, _retry_after_seconds(e)))
+            attempt += 1
+
+async def async_chat_completion(client: AsyncOpenAI, max_retries: int = MAX_RETRIES, **params):
+    """chat_completion()의 비동기 버전 - 작업이 취소되면 진행 중인 HTTP 요청도 함께 중단됨"""
+    attempt = 0
+    while True:
+        try:
+            return await client.chat.completions.create(**params)
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable_error(e):
+                raise
+            await asyncio.sleep(backoff_delay(attempt, _retry_after_seconds(e)))
+            attempt += 1
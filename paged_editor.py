@@ -0,0 +1,98 @@
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+import streamlit as st
+
+from data_manager import DataFrameManager
+
+PAGE_SIZE_OPTIONS = (50, 100, 250, 500, 1000)
+DEFAULT_PAGE_SIZE = 100
+NO_SORT = "(정렬 없음)"
+NO_FILTER = "(필터 없음)"
+
+def _view_positions(manager: DataFrameManager, key: str, sort_column: Optional[str], ascending: bool,
+                    filter_column: Optional[str], filter_text: str) -> Optional[np.ndarray]:
+    """정렬/필터가 적용된 행 위치 (서버에서 계산, 같은 조건이면 재실행 간 재사용). 조건이 없으면 None"""
+    if sort_column is None and not (filter_column and filter_text):
+        return None
+
+    view_key = (manager.version, sort_column, ascending, filter_column, filter_text)
+    cached = st.session_state.get(f"{key}_view")
+    if cached is not None and cached[0] == view_key:
+        return cached[1]
+
+    # 정렬 순서와 필터 마스크는 매니저의 캐시/인덱스를 통해 계산
+    positions = manager.sort_order(sort_column, ascending) if sort_column else np.arange(manager.row_count)
+    if filter_column and filter_text:
+        mask = manager.match_column(filter_column, filter_text).to_numpy()
+        positions = positions[mask[positions]]
+    st.session_state[f"{key}_view"] = (view_key, positions)
+    return positions
+
+def _page_controls(manager: DataFrameManager, key: str) -> Tuple[Optional[str], bool, Optional[str], str, int]:
+    """정렬/필터/페이지 크기 선택 컨트롤"""
+    columns = manager.columns
+    col1, col2, col3, col4, col5 = st.columns([2, 1, 2, 2, 1])
+    with col1:
+        sort_column = st.selectbox("정렬 컬럼", [NO_SORT] + columns, key=f"{key}_sort")
+    with col2:
+        ascending = st.radio("정렬 순서", ["오름차순", "내림차순"], key=f"{key}_order") == "오름차순"
+    with col3:
+        filter_column = st.selectbox("필터 컬럼", [NO_FILTER] + columns, key=f"{key}_filter_column")
+    with col4:
+        filter_text = st.text_input("포함할 값", key=f"{key}_filter_text")
+    with col5:
+        page_size = st.selectbox("페이지 크기", PAGE_SIZE_OPTIONS,
+                                 index=PAGE_SIZE_OPTIONS.index(DEFAULT_PAGE_SIZE), key=f"{key}_page_size")
+    return (None if sort_column == NO_SORT else sort_column, ascending,
+            None if filter_column == NO_FILTER else filter_column, filter_text.strip(), page_size)
+
+def paged_data_editor(manager: DataFrameManager, key: str, height: int = 400):
+    """대용량 데이터용 페이지 단위 편집기
+
+    현재 페이지의 행만 브라우저로 보내고, 정렬/필터는 서버에서 행 위치로 계산합니다.
+    편집 내용은 행 위치(현재 데이터 버전 기준)로 매니저에 병합한 뒤 화면을 다시 그립니다.
+    """
+    sort_column, ascending, filter_column, filter_text, page_size = _page_controls(manager, key)
+    try:
+        positions = _view_positions(manager, key, sort_column, ascending, filter_column, filter_text)
+    except ValueError as e:
+        st.warning(f"⚠️ {e}")
+        positions = None
+    total_rows = manager.row_count if positions is None else len(positions)
+
+    page_count = max(math.ceil(total_rows / page_size), 1)
+    page = st.number_input(f"페이지 (전체 {page_count:,}쪽, {total_rows:,}행)", min_value=1,
+                           max_value=page_count, value=1, step=1, key=f"{key}_page")
+    start = (min(page, page_count) - 1) * page_size
+    end = min(start + page_size, total_rows)
+    page_positions = np.arange(start, end) if positions is None else positions[start:end]
+
+    # 편집 후에는 새 키로 편집기를 다시 만들어 반영된 데이터에서 시작
+    nonce_key = f"{key}_nonce"
+    nonce = st.session_state.get(nonce_key, 0)
+    editor_key = f"{key}_editor_{nonce}"
+    st.data_editor(
+        manager.view_rows(page_positions),
+        use_container_width=True,
+        num_rows="dynamic",  # 행 추가/삭제 가능
+        key=editor_key,
+        height=height
+    )
+
+    editor_state = st.session_state.get(editor_key) or {}
+    edited_rows = editor_state.get("edited_rows") or {}
+    added_rows = editor_state.get("added_rows") or []
+    deleted_rows = editor_state.get("deleted_rows") or []
+    if not (edited_rows or added_rows or deleted_rows):
+        return
+
+    # 페이지 내 행 번호 → 현재 데이터의 행 위치
+    manager.apply_edits(
+        edited={int(page_positions[int(row)]): changes for row, changes in edited_rows.items()},
+        added=[row for row in added_rows if row],
+        deleted=[int(page_positions[row]) for row in deleted_rows]
+    )
+    st.session_state[nonce_key] = nonce + 1
+    st.rerun()
@@ -0,0 +1,130 @@
+from typing import Any, Callable, List, NamedTuple, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+class Filter(NamedTuple):
+    """컬럼 값에 대한 조건으로 행 선택"""
+    column: str
+    predicate: Callable[[pd.Series], Any]   # Series -> 불리언 마스크
+
+class Sort(NamedTuple):
+    """컬럼 기준 안정 정렬"""
+    column: str
+    ascending: bool = True
+
+class Head(NamedTuple):
+    """앞부분 k개 행"""
+    k: int
+
+class Tail(NamedTuple):
+    """마지막 k개 행"""
+    k: int
+
+class TopK(NamedTuple):
+    """정렬 후 앞부분 k개 (Sort + Head를 최적화한 결과, 전체 정렬 없음)"""
+    column: str
+    k: int
+    ascending: bool = True
+
+Operation = Union[Filter, Sort, Head, Tail, TopK]
+
+def sort_positions(values: pd.Series, ascending: bool = True) -> np.ndarray:
+    """안정 정렬 순서 (values 기준 위치, 결측값은 마지막)"""
+    return values.reset_index(drop=True).sort_values(ascending=ascending, kind="stable").index.to_numpy()
+
+def top_k_positions(values: pd.Series, k: int, ascending: bool = True) -> np.ndarray:
+    """sort_positions(values, ascending)[:k]와 같은 결과를 전체 정렬 없이 계산 (O(n + k log k))"""
+    array = values.to_numpy() if isinstance(values.dtype, np.dtype) else None
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if array is None or array.dtype.kind not in "if" or k >= len(array):
+        return sort_positions(values, ascending)[:k]
+
+    if array.dtype.kind == "f":
+        candidates = np.flatnonzero(~np.isnan(array))
+        if k >= len(candidates):
+            # 결측값까지 포함해야 하는 경우는 일반 정렬 사용
+            return sort_positions(values, ascending)[:k]
+        key = array[candidates] if ascending else -array[candidates]
+    else:
+        candidates = np.arange(len(array))
+        # 정수 내림차순은 비트 반전(~x = -x - 1)으로 오버플로 없이 뒤집음
+        key = array if ascending else ~array
+
+    kth = np.partition(key, k - 1)[k - 1]
+    smaller = key < kth
+    # 경계값과 같은 행은 앞쪽 위치부터 선택하여 안정 정렬과 동일하게 맞춤
+    equal = np.flatnonzero(key == kth)[:k - int(smaller.sum())]
+    selected = np.concatenate([np.flatnonzero(smaller), equal])
+    order = np.lexsort((candidates[selected], key[selected]))
+    return candidates[selected[order]]
+
+def _push_down_filters(segment: List[Operation]) -> List[Operation]:
+    """필터를 정렬보다 먼저 실행 (안정 정렬과 필터는 순서를 바꿔도 결과가 같음)"""
+    filters = [op for op in segment if isinstance(op, Filter)]
+    others = [op for op in segment if not isinstance(op, Filter)]
+    return filters + others
+
+class QueryPlan:
+    """지연 실행되는 데이터 작업 계획
+
+    작업은 기록만 해 두었다가 결과가 필요할 때 한 번에 최적화하여 실행합니다.
+    - 조건 필터를 정렬 앞으로 이동 (predicate pushdown) → 정렬할 행 수 감소
+    - 연속된 필터는 앞 필터를 통과한 행에만 다음 조건을 평가
+    - 정렬 + 앞부분 k개 → TopK (부분 정렬)
+    - 실행 중에는 행 위치만 다루고, 조건/정렬에 쓰이는 컬럼만 로드 (중간 프레임 없음)
+    """
+
+    def __init__(self, operations: Tuple[Operation, ...] = ()):
+        self.operations = tuple(operations)
+
+    def then(self, operation: Operation) -> "QueryPlan":
+        """작업을 추가한 새 계획 반환"""
+        return QueryPlan(self.operations + (operation,))
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    def optimize(self) -> List[Operation]:
+        """실행할 작업 목록으로 최적화"""
+        # 행 수를 제한하는 작업(Head/Tail) 경계를 넘어서는 필터를 옮기지 않음
+        ordered: List[Operation] = []
+        segment: List[Operation] = []
+        for op in self.operations:
+            if isinstance(op, (Head, Tail, TopK)):
+                ordered.extend(_push_down_filters(segment))
+                ordered.append(op)
+                segment = []
+            else:
+                segment.append(op)
+        ordered.extend(_push_down_filters(segment))
+
+        fused: List[Operation] = []
+        for op in ordered:
+            if isinstance(op, Head) and fused and isinstance(fused[-1], Sort):
+                sort = fused.pop()
+                fused.append(TopK(sort.column, op.k, sort.ascending))
+            else:
+                fused.append(op)
+        return fused
+
+    def execute(self, rows: np.ndarray, take_column: Callable[[str, np.ndarray], pd.Series]) -> np.ndarray:
+        """최적화된 계획을 행 위치 배열에 적용하여 결과 행 위치 반환
+
+        take_column: (컬럼 이름, 기준 데이터의 행 위치) -> 해당 행들의 컬럼 값
+        """
+        for op in self.optimize():
+            if isinstance(op, Head):
+                rows = rows[:op.k]
+            elif isinstance(op, Tail):
+                rows = rows[max(len(rows) - op.k, 0):]
+            else:
+                values = take_column(op.column, rows)
+                if isinstance(op, Filter):
+                    rows = rows[np.asarray(op.predicate(values), dtype=bool)]
+                elif isinstance(op, Sort):
+                    rows = rows[sort_positions(values, op.ascending)]
+                elif isinstance(op, TopK):
+                    rows = rows[top_k_positions(values, op.k, op.ascending)]
+        return rows
@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import closing
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_CACHE_PATH = os.environ.get("RESPONSE_CACHE_PATH", os.path.join(".cache", "responses.sqlite3"))
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 1000
+# 캐시된 응답을 스트림으로 재생할 때 조각 크기
+REPLAY_CHUNK_CHARS = 64
+
+def normalize_content(content: Any) -> Any:
+    """메시지 내용 정규화 (앞뒤 공백 제거, 연속 공백 통일)"""
+    if isinstance(content, str):
+        return " ".join(content.split())
+    return content
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def make_stream_chunk(content: str) -> SimpleNamespace:
+    """OpenAI 스트리밍 조각과 같은 형태의 객체 생성"""
+    delta = SimpleNamespace(content=content, role="assistant")
+    return SimpleNamespace(choices=[SimpleNamespace(index=0, delta=delta, finish_reason=None)])
+
+def make_completion(content: str) -> SimpleNamespace:
+    """OpenAI 비스트리밍 응답과 같은 형태의 객체 생성"""
+    message = SimpleNamespace(content=content, role="assistant")
+    return SimpleNamespace(choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")])
+
+class ResponseCache:
+    """동일한 LLM 요청의 응답을 로컬 SQLite에 저장하는 캐시 (TTL + 크기 제한 LRU)"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT, content TEXT,"
+                " created_at REAL, accessed_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, Any]], temperature: Optional[float],
+                 context_hash: str = "") -> str:
+        """모델, 정규화된 메시지, temperature, 첨부 컨텍스트 해시로 캐시 키 생성"""
+        normalized = [{"role": m.get("role"), "content": normalize_content(m.get("content"))} for m in messages]
+        payload = json.dumps(
+            {"model": model, "messages": normalized, "temperature": temperature, "context": context_hash},
+            ensure_ascii=False, sort_keys=True
+        )
+        return hash_text(payload)
+
+    def get(self, key: str) -> Optional[str]:
+        """캐시된 응답 반환 (없거나 만료되면 None)"""
+        now = time.time()
+        with self._lock, closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT content, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            content, created_at = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            return content
+
+    def put(self, key: str, model: str, content: str):
+        """응답 저장 - 만료된 항목과 용량을 넘는 오래된 항목 정리"""
+        now = time.time()
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, content, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, model, content, now, now)
+            )
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def replay(self, content: str, stream: bool):
+        """캐시된 응답을 API 응답과 같은 형태로 반환 (스트리밍이면 조각 단위로 재생)"""
+        if not stream:
+            return make_completion(content)
+        return (make_stream_chunk(content[i:i + REPLAY_CHUNK_CHARS])
+                for i in range(0, len(content), REPLAY_CHUNK_CHARS))
+
+    def record_stream(self, key: str, model: str, stream) -> Iterator[Any]:
+        """스트리밍 응답을 그대로 전달하면서 끝까지 받은 경우에만 캐시에 저장"""
+        parts = []
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+            yield chunk
+        if parts:
+            self.put(key, model, "".join(parts))
@@ -0,0 +1,82 @@
+import time
+from typing import List
+
+# 기본 플러시 정책: 50ms가 지났거나 200자가 쌓이면 화면 갱신
+DEFAULT_FLUSH_INTERVAL_MS = 50
+DEFAULT_FLUSH_CHARS = 200
+STREAM_CURSOR = "▌"
+
+class StreamRenderer:
+    """스트리밍 응답 조각을 시간/글자 수 기준으로 묶어 점진적으로 렌더링하는 클래스
+
+    - 조각마다 전체 문자열을 다시 그리지 않고, 정책에 따라 모아서 갱신
+    - 완성된 문단(코드 블록 밖의 빈 줄 기준)은 별도 요소로 고정하고 마지막 문단만 다시 그림
+    - finish() 시 전체 텍스트를 하나의 마크다운으로 다시 그려 최종 결과는 기존과 동일
+    """
+
+    def __init__(self, placeholder, flush_interval_ms: int = DEFAULT_FLUSH_INTERVAL_MS,
+                 flush_chars: int = DEFAULT_FLUSH_CHARS, cursor: str = STREAM_CURSOR):
+        self._placeholder = placeholder
+        self._container = placeholder.container()
+        self._tail = self._container.empty()
+        self._flush_interval = flush_interval_ms / 1000
+        self._flush_chars = flush_chars
+        self._cursor = cursor
+        self._pending: List[str] = []
+        self._pending_chars = 0
+        self._text = ""
+        self._frozen_len = 0        # 이미 고정된 문단까지의 길이
+        self._frozen_fences = 0     # 고정된 부분의 코드 블록 구분자(```) 개수
+        self._last_flush = time.monotonic()
+
+    @property
+    def text(self) -> str:
+        """지금까지 받은 전체 텍스트"""
+        if self._pending:
+            return self._text + "".join(self._pending)
+        return self._text
+
+    def write(self, delta: str):
+        """응답 조각 추가 - 플러시 정책을 만족하면 화면 갱신"""
+        if not delta:
+            return
+        self._pending.append(delta)
+        self._pending_chars += len(delta)
+        if (self._pending_chars >= self._flush_chars
+                or time.monotonic() - self._last_flush >= self._flush_interval):
+            self.flush()
+
+    def flush(self):
+        """쌓인 조각을 화면에 반영"""
+        if self._pending:
+            self._text += "".join(self._pending)
+            self._pending = []
+            self._pending_chars = 0
+
+        split = self._find_block_boundary()
+        if split > self._frozen_len:
+            # 완성된 문단은 현재 요소에 고정하고 새 요소에서 이어서 렌더링
+            self._tail.markdown(self._text[self._frozen_len:split])
+            self._tail = self._container.empty()
+            self._frozen_fences += self._text.count("```", self._frozen_len, split)
+            self._frozen_len = split
+        self._tail.markdown(self._text[self._frozen_len:] + self._cursor)
+        self._last_flush = time.monotonic()
+
+    def finish(self) -> str:
+        """스트리밍 종료 - 전체 텍스트를 최종 렌더링하고 반환"""
+        text = self.text
+        self._text = text
+        self._pending = []
+        self._placeholder.markdown(text)
+        return text
+
+    def _find_block_boundary(self) -> int:
+        """고정 가능한 마지막 문단 경계 (코드 블록 내부가 아닌 빈 줄 뒤) 위치 반환"""
+        boundary = self._text.rfind("\n\n", self._frozen_len)
+        while boundary != -1:
+            split = boundary + 2
+            if (self._frozen_fences + self._text.count("```", self._frozen_len, split)) % 2 == 0:
+                return split
+            boundary = self._text.rfind("\n\n", self._frozen_len, boundary)
+        return self._frozen_len
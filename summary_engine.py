@@ -0,0 +1,142 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from cache_utils import LRUCache
+from data_manager import DataFrameManager
+
+# 업로드 요약에 통계를 바로 계산해 넣는 최대 컬럼 수 (나머지는 요청할 때 계산)
+SUMMARY_MAX_COLUMNS = 30
+SUMMARY_PREVIEW_ROWS = 5
+SUMMARY_WORKERS = min(8, os.cpu_count() or 1)
+# 컬럼 통계 캐시 크기 (컬럼 단위)
+STATS_CACHE_SIZE = 4096
+# 완성된 요약/미리보기 텍스트 캐시 크기 (데이터 버전 단위)
+TEXT_CACHE_SIZE = 64
+
+NUMERIC_STATS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+CATEGORICAL_STATS = ["count", "unique", "top", "freq"]
+
+def _is_numeric(series: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+def compute_column_stats(series: pd.Series) -> Dict[str, Any]:
+    """단일 컬럼의 기술통계 계산 (DataFrame.describe()와 같은 항목)"""
+    count = int(series.count())
+    stats: Dict[str, Any] = {"dtype": series.dtype, "count": count, "nulls": len(series) - count}
+    if _is_numeric(series):
+        values = series.dropna()
+        if count:
+            quantiles = values.quantile([0.25, 0.5, 0.75])
+            stats.update({
+                "mean": values.mean(), "std": values.std(), "min": values.min(),
+                "25%": quantiles.iloc[0], "50%": quantiles.iloc[1], "75%": quantiles.iloc[2],
+                "max": values.max(),
+            })
+        else:
+            stats.update({name: np.nan for name in NUMERIC_STATS[1:]})
+    else:
+        counts = series.value_counts()
+        stats.update({
+            "unique": len(counts),
+            "top": counts.index[0] if len(counts) else np.nan,
+            "freq": int(counts.iloc[0]) if len(counts) else np.nan,
+        })
+    return stats
+
+class SummaryEngine:
+    """데이터 요약 엔진 - 컬럼 통계를 필요할 때만, 컬럼별로 병렬 계산하여 캐시
+
+    통계는 컬럼 내용 토큰(DataFrameManager.column_token) 기준으로 캐시되므로
+    편집으로 바뀐 컬럼만 다시 계산하고, 되돌리기(undo)한 버전은 그대로 재사용합니다.
+    """
+
+    def __init__(self, max_workers: int = SUMMARY_WORKERS, stats_cache_size: int = STATS_CACHE_SIZE,
+                 text_cache_size: int = TEXT_CACHE_SIZE):
+        self._stats = LRUCache(max_entries=stats_cache_size)
+        self._texts = LRUCache(max_entries=text_cache_size)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summary")
+
+    def _compute(self, manager: DataFrameManager, column: str, token) -> Dict[str, Any]:
+        stats = compute_column_stats(manager.get_column(column))
+        self._stats.put(token, stats)
+        return stats
+
+    def column_stats(self, manager: DataFrameManager, columns: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """컬럼별 통계 반환 - 캐시에 없는 컬럼만 병렬로 계산"""
+        columns = manager.columns if columns is None else columns
+        result: Dict[str, Dict[str, Any]] = {}
+        pending = {}
+        for column in columns:
+            token = manager.column_token(column)
+            stats = self._stats.get(token)
+            if stats is None:
+                pending[column] = self._executor.submit(self._compute, manager, column, token)
+            else:
+                result[column] = stats
+        for column, future in pending.items():
+            result[column] = future.result()
+        return {column: result[column] for column in columns}
+
+    def describe(self, manager: DataFrameManager, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """DataFrame.describe()와 같은 형태의 통계표 (숫자형 컬럼이 없으면 범주형 통계)"""
+        stats = self.column_stats(manager, columns)
+        numeric = {column: s for column, s in stats.items() if "mean" in s}
+        if numeric:
+            return pd.DataFrame({column: [s[name] for name in NUMERIC_STATS] for column, s in numeric.items()},
+                                index=NUMERIC_STATS)
+        return pd.DataFrame({column: [s[name] for name in CATEGORICAL_STATS] for column, s in stats.items()},
+                            index=CATEGORICAL_STATS)
+
+    def summarize(self, manager: DataFrameManager, title: str) -> str:
+        """업로드 요약 텍스트 - 넓은 표는 앞쪽 컬럼만 계산하여 빠르게 반환 (버전별 캐시)"""
+        key = ("summary", manager.version, title)
+        text = self._texts.get(key)
+        if text is not None:
+            return text
+
+        all_columns = manager.columns
+        columns = all_columns[:SUMMARY_MAX_COLUMNS]
+        stats = self.column_stats(manager, columns)
+        dtypes = pd.Series({column: s["dtype"] for column, s in stats.items()}, dtype=object)
+
+        text = f"{title}:\n"
+        text += f"- 행 수: {manager.row_count}\n"
+        text += f"- 열 수: {len(all_columns)}\n"
+        text += f"- 컬럼명: {', '.join(map(str, all_columns))}\n"
+        if len(columns) < len(all_columns):
+            text += f"- 아래 정보는 처음 {len(columns)}개 컬럼 기준입니다 (나머지 컬럼 통계는 요청 시 계산)\n"
+        text += f"- 데이터 타입:\n{dtypes.to_string()}\n\n"
+        head = manager.preview(SUMMARY_PREVIEW_ROWS)[columns]
+        text += f"첫 5행 미리보기:\n{head.to_string()}\n\n"
+        if manager.row_count > SUMMARY_PREVIEW_ROWS:
+            tail = manager.preview_tail(SUMMARY_PREVIEW_ROWS)[columns]
+            text += f"마지막 5행 미리보기:\n{tail.to_string()}\n\n"
+        text += f"기술통계:\n{self.describe(manager, columns).to_string()}"
+        self._texts.put(key, text)
+        return text
+
+    def preview_text(self, manager: DataFrameManager, rows: int = 10) -> str:
+        """앞부분 미리보기 텍스트 (버전별 캐시 - 대화 턴마다 다시 만들지 않음)"""
+        key = ("preview", manager.version, rows)
+        text = self._texts.get(key)
+        if text is None:
+            text = manager.preview(rows).to_string()
+            self._texts.put(key, text)
+        return text
+
+_engine: Optional[SummaryEngine] = None
+_engine_lock = threading.Lock()
+
+def get_summary_engine() -> SummaryEngine:
+    """프로세스 전체에서 공유하는 요약 엔진"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = SummaryEngine()
+    return _engine
@@ -0,0 +1,349 @@
+import os
+import json
+import atexit
+import time
+import uuid
+import logging
+import tempfile
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from context_builder import count_tokens
+
+# 추적 기록 디렉터리 (turns.jsonl, metrics.prom) - 빈 문자열이면 파일에 기록하지 않음
+TELEMETRY_DIR = os.environ.get("TELEMETRY_DIR", os.path.join(".cache", "telemetry"))
+# 설정하면 이 포트에서 Prometheus 텍스트 형식의 /metrics를 제공
+TELEMETRY_PORT = int(os.environ.get("TELEMETRY_PORT", "0"))
+TELEMETRY_RECENT_TRACES = 200
+# metrics.prom 갱신 주기 (초) - 추적마다 파일 전체를 다시 쓰지 않고 바뀐 경우에만 주기적으로 기록
+TELEMETRY_FLUSH_SECONDS = float(os.environ.get("TELEMETRY_FLUSH_SECONDS", "5"))
+# turns.jsonl 크기 한도 - 넘으면 turns.jsonl.1로 교체하고 새 파일에 기록 (이전 .1은 삭제)
+TELEMETRY_MAX_BYTES = int(float(os.environ.get("TELEMETRY_MAX_MB", "50")) * 1024 * 1024)
+# 파일에 쓰기 전 메모리에 모아 두는 최대 기록 수 (넘으면 오래된 기록부터 버림)
+TELEMETRY_BUFFER_RECORDS = 10_000
+# 소요 시간 히스토그램 구간 (초)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+logger = logging.getLogger(__name__)
+
+_current: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("current_trace", default=None)
+
+class Trace:
+    """대화 한 턴(또는 파일 파싱 등 단독 작업)의 추적 기록 - 구간(span)별 소요 시간과 속성"""
+
+    def __init__(self, kind: str, turn_id: Optional[str] = None, **attributes: Any):
+        self.trace_id = uuid.uuid4().hex
+        self.turn_id = turn_id or self.trace_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes)
+        self.spans: List[Dict[str, Any]] = []
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+        """구간 측정 - 반환된 dict에 속성을 추가할 수 있음"""
+        start = time.perf_counter()
+        attrs = dict(attributes)
+        try:
+            yield attrs
+        finally:
+            self.add_span(name, start, time.perf_counter(), **attrs)
+
+    def add_span(self, name: str, start: float, end: float, **attributes: Any):
+        """perf_counter 기준 시작/끝 시각으로 구간 기록"""
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "offset_ms": round((start - self._start) * 1000, 2),
+                "duration_ms": round((end - start) * 1000, 2),
+                **attributes,
+            })
+
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def finish(self):
+        """추적 종료 - JSONL/Prometheus 지표에 기록 (두 번 호출해도 한 번만 기록)"""
+        if self.duration_ms is not None:
+            return
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 2)
+        get_telemetry().record(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "turn_id": self.turn_id,
+            "kind": self.kind,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            **self.attributes,
+            "spans": list(self.spans),
+        }
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+@contextmanager
+def start_trace(kind: str, **attributes: Any) -> Iterator[Trace]:
+    """추적 시작 - 블록 안의 span() 호출이 이 추적에 기록되고, 블록이 끝나면 저장"""
+    trace = Trace(kind, **attributes)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        trace.finish()
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+    """현재 추적에 구간 기록 (진행 중인 추적이 없으면 이 구간만 담은 단독 추적으로 저장)"""
+    trace = _current.get()
+    if trace is not None:
+        with trace.span(name, **attributes) as attrs:
+            yield attrs
+        return
+    with start_trace(name) as trace, trace.span(name, **attributes) as attrs:
+        yield attrs
+
+def instrument_stream(stream, trace: Optional[Trace], model_name: str, span_name: str = "completion"):
+    """스트리밍 응답을 그대로 전달하면서 첫 토큰 시간, 초당 토큰 수, 토큰 사용량 기록
+
+    사용량은 stream_options={"include_usage": True}로 받은 마지막 조각에서 읽고,
+    없으면(캐시 재생 등) 받은 텍스트로 추정합니다.
+    """
+    if trace is None:
+        yield from stream
+        return
+    start = time.perf_counter()
+    first_token = None
+    usage = None
+    parts = []
+    try:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first_token is None:
+                    first_token = time.perf_counter()
+                parts.append(chunk.choices[0].delta.content)
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            yield chunk
+    finally:
+        record_completion(trace, span_name, model_name, start, time.perf_counter(), first_token,
+                          usage, "".join(parts))
+
+def record_completion(trace: Trace, span_name: str, model_name: str, start: float, end: float,
+                      first_token: Optional[float], usage, text: str):
+    """LLM 응답 구간 기록 (첫 토큰 시간, 초당 토큰 수, 프롬프트/응답 토큰 수)"""
+    attributes: Dict[str, Any] = {"model": model_name}
+    if usage is not None:
+        attributes["prompt_tokens"] = usage.prompt_tokens
+        attributes["completion_tokens"] = usage.completion_tokens
+    else:
+        attributes["completion_tokens"] = count_tokens(text, model_name)
+        attributes["usage_estimated"] = True
+    first_token = first_token if first_token is not None else end
+    attributes["ttft_ms"] = round((first_token - start) * 1000, 2)
+    generation = end - first_token
+    if generation > 0 and attributes["completion_tokens"]:
+        attributes["tokens_per_second"] = round(attributes["completion_tokens"] / generation, 1)
+    trace.add_span(span_name, start, end, **attributes)
+
+# ---------- 집계 (Prometheus 텍스트 형식) ----------
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(**labels: Any) -> str:
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}" if labels else ""
+
+class Telemetry:
+    """추적 기록 저장소 - JSONL 파일, Prometheus 지표(텍스트 파일/HTTP), 최근 추적 목록"""
+
+    def __init__(self, directory: Optional[str] = TELEMETRY_DIR, port: int = TELEMETRY_PORT,
+                 recent: int = TELEMETRY_RECENT_TRACES, flush_seconds: float = TELEMETRY_FLUSH_SECONDS,
+                 max_bytes: int = TELEMETRY_MAX_BYTES):
+        self.directory = directory or None
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()  # 파일 기록 순서 보장 (지표 조회는 기다리지 않음)
+        self._buffer: Deque[str] = deque(maxlen=TELEMETRY_BUFFER_RECORDS)
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=recent)
+        self._spans: Dict[str, _Histogram] = {}
+        self._ttft: Dict[str, _Histogram] = {}
+        self._tokens: Dict[Tuple[str, str], int] = {}
+        self._traces: Dict[str, int] = {}
+        self._dirty = threading.Event()
+        if self.directory:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+            except OSError:
+                logger.warning("추적 기록 디렉터리를 만들 수 없어 파일 기록을 끕니다: %s", self.directory, exc_info=True)
+                self.directory = None
+        if self.directory:
+            threading.Thread(target=self._flush_loop, args=(flush_seconds,), daemon=True,
+                             name="telemetry-flush").start()
+            atexit.register(self.flush)
+        self.server = self._serve(port) if port else None
+
+    def record(self, trace: Trace):
+        """추적 기록 - 지표만 갱신하고 파일 기록은 백그라운드 스레드가 모아서 처리"""
+        record = trace.to_dict()
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n" if self.directory else None
+        with self._lock:
+            self._recent.append(record)
+            self._traces[trace.kind] = self._traces.get(trace.kind, 0) + 1
+            for item in record["spans"]:
+                self._spans.setdefault(item["name"], _Histogram()).observe(item["duration_ms"] / 1000)
+                model = item.get("model")
+                if model is None:
+                    continue
+                if "ttft_ms" in item:
+                    self._ttft.setdefault(model, _Histogram()).observe(item["ttft_ms"] / 1000)
+                for kind in ("prompt", "completion"):
+                    tokens = item.get(f"{kind}_tokens")
+                    if tokens:
+                        self._tokens[(model, kind)] = self._tokens.get((model, kind), 0) + tokens
+            if line is not None:
+                self._buffer.append(line)
+                self._dirty.set()
+
+    def flush(self):
+        """모아 둔 기록을 turns.jsonl에 추가하고 metrics.prom 갱신 - 파일 오류는 로그만 남김
+
+        metrics.prom은 같은 디렉터리의 고유한 임시 파일에 쓴 뒤 통째로 교체합니다
+        (node_exporter textfile 수집기 등이 쓰는 중인 파일을 읽지 않도록).
+        """
+        if not self.directory:
+            return
+        with self._file_lock:
+            with self._lock:
+                self._dirty.clear()
+                lines = list(self._buffer)
+                self._buffer.clear()
+                metrics = self._render_locked()
+            if lines:
+                self._append_turns(lines)
+            temp_path = None
+            try:
+                fd, temp_path = tempfile.mkstemp(prefix=".metrics-", suffix=".tmp", dir=self.directory)
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(metrics)
+                os.replace(temp_path, os.path.join(self.directory, "metrics.prom"))
+            except OSError:
+                logger.warning("metrics.prom 기록 실패", exc_info=True)
+                if temp_path is not None and os.path.exists(temp_path):
+                    try:
+                        os.remove(temp_path)
+                    except OSError:
+                        pass
+
+    def _append_turns(self, lines: List[str]):
+        """turns.jsonl에 추가 - 크기 한도에 이르면 turns.jsonl.1로 교체하고 새 파일에 이어서 기록"""
+        path = os.path.join(self.directory, "turns.jsonl")
+        try:
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            f = open(path, "a", encoding="utf-8")
+            try:
+                for line in lines:
+                    if size >= self.max_bytes:
+                        f.close()
+                        os.replace(path, path + ".1")
+                        f = open(path, "a", encoding="utf-8")
+                        size = 0
+                    f.write(line)
+                    size += len(line.encode("utf-8"))
+            finally:
+                f.close()
+        except OSError:
+            logger.warning("turns.jsonl 기록 실패", exc_info=True)
+
+    def _flush_loop(self, interval: float):
+        while True:
+            self._dirty.wait()
+            self.flush()
+            time.sleep(interval)
+
+    def recent(self, limit: int = 20, session: Optional[str] = None) -> List[Dict[str, Any]]:
+        """최근 추적 기록 (최신순, session을 주면 해당 세션만)"""
+        with self._lock:
+            records = [record for record in reversed(self._recent)
+                       if session is None or record.get("session") == session]
+        return records[:limit]
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            return self._render_locked()
+
+    def _render_locked(self) -> str:
+        lines = ["# HELP chatbot_traces_total 기록된 추적 수", "# TYPE chatbot_traces_total counter"]
+        lines += [f"chatbot_traces_total{_labels(kind=kind)} {count}" for kind, count in sorted(self._traces.items())]
+        lines += _histogram_lines("chatbot_span_seconds", "구간별 소요 시간", "span", self._spans)
+        lines += _histogram_lines("chatbot_ttft_seconds", "첫 토큰까지 걸린 시간", "model", self._ttft)
+        lines += ["# HELP chatbot_tokens_total 토큰 사용량", "# TYPE chatbot_tokens_total counter"]
+        lines += [f"chatbot_tokens_total{_labels(model=model, kind=kind)} {tokens}"
+                  for (model, kind), tokens in sorted(self._tokens.items())]
+        return "\n".join(lines) + "\n"
+
+    def _serve(self, port: int) -> ThreadingHTTPServer:
+        telemetry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = telemetry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True, name="telemetry-metrics").start()
+        return server
+
+def _histogram_lines(name: str, help_text: str, label: str, histograms: Dict[str, _Histogram]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key, histogram in sorted(histograms.items()):
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            lines.append(f"{name}_bucket{_labels(**{label: key, 'le': f'{bound:g}'})} {count}")
+        lines.append(f"{name}_bucket{_labels(**{label: key, 'le': '+Inf'})} {histogram.count}")
+        lines.append(f"{name}_sum{_labels(**{label: key})} {histogram.total:.6f}")
+        lines.append(f"{name}_count{_labels(**{label: key})} {histogram.count}")
+    return lines
+
+_telemetry: Optional[Telemetry] = None
+_telemetry_lock = threading.Lock()
+
+def get_telemetry() -> Telemetry:
+    """프로세스 전체에서 공유하는 추적 기록 저장소 (TELEMETRY_PORT가 있으면 /metrics 제공 시작)"""
+    global _telemetry
+    if _telemetry is None:
+        with _telemetry_lock:
+            if _telemetry is None:
+                _telemetry = Telemetry()
+    return _telemetry